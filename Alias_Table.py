@@ -0,0 +1,205 @@
+"""
+ALIAS TABLE
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for sampling from arbitrary discrete probability
+distributions in constant time, using Walker's alias method, and functions for
+reading such distributions from histogram files.
+
+An alias table is built once from a list of values and their weights. (Relative
+probabilities) Each sample then requires only a single random number, regardless
+of how many values there are.
+
+A histogram file is a tab-separated file with two columns: a value, (an integer)
+and its weight. (A count or a relative probability) Lines starting with "#" are
+ignored. Histograms can be obtained from a previous sequencing run, such as the
+insert size histogram produced by most read aligners.
+"""
+
+# Imported Modules #############################################################
+
+import json
+
+import random as Random
+
+
+
+# Strings ######################################################################
+
+STR__comment = "#"
+
+
+
+# Functions ####################################################################
+
+def Read_Histogram(file_path):
+    """
+    Read the histogram file at [file_path].
+    
+    Return a list containing a list of the values and a list of their weights if
+    successful.
+    Return an empty list if the file could not be read, or contains no values
+    with a positive weight.
+    
+    Read_Histogram(str) -> [list<int>, list<float>]
+    """
+    values = []
+    weights = []
+    try:
+        f = open(file_path, "U")
+        for line in f:
+            if not line.strip() or line.startswith(STR__comment): continue
+            columns = line.split("\t")
+            value = int(columns[0])
+            weight = float(columns[1])
+            if weight < 0:
+                f.close()
+                return []
+            if weight:
+                values.append(value)
+                weights.append(weight)
+        f.close()
+    except:
+        return []
+    if not values: return []
+    return [values, weights]
+
+def Load_Histogram(file_path):
+    """
+    Return an Alias Table for the histogram file at [file_path].
+    Return None if the file is not a valid histogram file.
+    
+    Load_Histogram(str) -> Alias_Table/None
+    """
+    histogram = Read_Histogram(file_path)
+    if not histogram: return None
+    return Alias_Table(histogram[0], histogram[1])
+
+def Load_Profile_Histogram(file_path, entry):
+    """
+    Return an Alias Table for the histogram stored as [entry] in the JSON
+    profile at [file_path]. The histogram is stored as a dictionary of values
+    (as strings) to weights.
+    
+    Return None if the file could not be read, or the profile does not contain
+    a valid histogram for [entry].
+    
+    Load_Profile_Histogram(str, str) -> Alias_Table/None
+    """
+    try:
+        f = open(file_path, "U")
+        histogram = json.loads(f.read()).get(entry)
+        f.close()
+        values = [int(k) for k in histogram if histogram[k] > 0]
+        if not values: return None
+        return Alias_Table(values, [histogram[str(k)] for k in values])
+    except:
+        return None
+
+
+
+# Classes ######################################################################
+
+class Alias_Table:
+    """
+    A precompiled discrete probability distribution, from which values can be
+    sampled in constant time.
+    
+    Each of the n columns of the table has a probability of being chosen of 1/n,
+    and contains a value, the probability of keeping that value, and an alias
+    value which is returned otherwise. A single random number is used to choose
+    both the column and whether or not to return the alias.
+    
+    If all the weights are equal, the results are identical to those of
+    Random.choice(), for the same random numbers.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, values, weights=None):
+        """
+        Creates an Alias Table object, for sampling from [values] with
+        probabilities proportional to [weights]. All values are equally likely
+        if [weights] is not specified.
+        """
+        n = len(values)
+        if weights == None: weights = [1] * n
+        total = float(sum(weights))
+        self.values = list(values)
+        self.size = n
+        self._probs = [weight * n / total for weight in weights]
+        self._aliases = list(values)
+        # Pair each underfull column with an overfull one
+        small = [i for i in range(n) if self._probs[i] < 1.0]
+        large = [i for i in range(n) if self._probs[i] >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large[-1]
+            self._aliases[s] = self.values[l]
+            self._probs[l] -= 1.0 - self._probs[s]
+            if self._probs[l] < 1.0: small.append(large.pop())
+        # Rounding errors
+        for i in small + large: self._probs[i] = 1.0
+    
+    
+    
+    # Sampling Methods #########################################################
+    
+    def Sample(self):
+        """
+        Return a random value from the distribution.
+        """
+        r = Random.random() * self.size
+        i = int(r)
+        if r - i < self._probs[i]: return self.values[i]
+        return self._aliases[i]
+    
+    def Sample_Batch(self, count):
+        """
+        Return a list of [count] random values from the distribution.
+        """
+        random = Random.random
+        size = self.size
+        values = self.values
+        probs = self._probs
+        aliases = self._aliases
+        results = []
+        append = results.append
+        for _ in xrange(count):
+            r = random() * size
+            i = int(r)
+            if r - i < probs[i]: append(values[i])
+            else: append(aliases[i])
+        return results
+    
+    
+    
+    # Modification Methods #####################################################
+    
+    def Scale(self, factor):
+        """
+        Multiply every value of the distribution by [factor].
+        """
+        self.values = [value * factor for value in self.values]
+        self._aliases = [value * factor for value in self._aliases]
+    
+    
+    
+    # Information Methods ######################################################
+    
+    def Get_Max(self):
+        """
+        Return the largest value which can be sampled.
+        """
+        return max(self.values)
+    
+    def Get_Mean(self):
+        """
+        Return the mean of the distribution.
+        """
+        total = 0.0
+        for i in range(self.size):
+            total += (self.values[i] * self._probs[i] +
+                    self._aliases[i] * (1.0 - self._probs[i]))
+        return total / self.size
@@ -0,0 +1,557 @@
+HELP_DOC = """
+BENCHMARK
+(version 1.0)
+by Angelo Chan
+
+This is a program for benchmarking the programs in this (Synthetic In-Silico
+Genome Generator) library, so that performance regressions can be tracked
+across changes to the code.
+
+For each genome scale specified, a chromosome sizes file and a table of genetic
+element coordinates are synthesized. The following stages are then run from
+start to finish:
+    
+    1) Generate_Synthetic_Chromosomes   (Generate_Random_Chromosomes.py)
+    2) Extract_Sequences                (Sequence_Extractor.py)
+    3) Insert_Sequences                 (Sequence_Inserter.py)
+    4) Generate_Fragments               (Generate_Fragments.py)
+    5) Generate_Reads                   (Generate_Reads.py)
+
+Each stage is run in its own process. The wall time, the number of bases
+processed per second, and the peak memory usage (peak RSS) of each stage are
+recorded. The results are appended to a JSON file, along with the current git
+commit (if available), so that results from different runs can be compared.
+
+The peak memory usage cannot be measured on Windows, and will be recorded as
+null.
+
+If a stage fails, the remaining stages for that genome scale are skipped, the
+number of bases processed per second of the failed stage is recorded as null,
+and the benchmark exits with an error once the results have been recorded.
+
+
+
+USAGE:
+    
+    python27 Benchmark.py [-s <scales>] [-o <output_folder>] [-j <json_file>]
+
+
+
+OPTIONAL:
+    
+    scales
+        
+        (DEFAULT: 1M)
+        
+        A comma-separated list of genome sizes to benchmark. The suffixes K, M,
+        and G may be used to denote thousands, millions, and billions of
+        basepairs respectively.
+    
+    output_folder
+        
+        (DEFAULT: Benchmark)
+        
+        The filepath of the folder where the intermediate files for each genome
+        scale will be created.
+    
+    json_file
+        
+        (DEFAULT: Benchmark_Results.json)
+        
+        The filepath of the JSON file which the results will be appended to.
+
+
+
+EXAMPLES SCENARIO EXPLANATION:
+    
+    1:
+    A quick benchmark, using a 1 Mbp genome.
+    
+    2:
+    A full benchmark, using 1 Mbp, 100 Mbp, and 3 Gbp genomes.
+
+EXAMPLES:
+    
+    python27 Benchmark.py
+    
+    python27 Benchmark.py -s 1M,100M,3G -o Path/Benchmark -j Path/Results.json
+
+USAGE:
+    
+    python27 Benchmark.py [-s <scales>] [-o <output_folder>] [-j <json_file>]
+"""
+
+NAME = "Benchmark.py"
+
+
+
+# Configurations ###############################################################
+
+AUTORUN = True
+
+PRINT_ERRORS = True
+PRINT_PROGRESS = True
+PRINT_METRICS = True
+
+
+
+# Minor Configurations #########################################################
+
+CHR_SIZE_MAX = 250000000 # Genomes are split into chromosomes of up to this size
+
+ELEMENT_SPACING = 10000 # Distance between the genetic elements to be extracted
+ELEMENT_SIZE = 300
+
+READ_LENGTH = 150 # Used to calculate fragment density
+
+SEED = 0 # Random seed, for reproducibility
+
+
+
+# Defaults #####################################################################
+"NOTE: altering these will not alter the values displayed in the HELP DOC"
+
+DEFAULT__scales = "1M"
+DEFAULT__output_folder = "Benchmark"
+DEFAULT__json = "Benchmark_Results.json"
+
+
+
+# Imported Modules #############################################################
+
+import sys
+import os
+
+import json
+import multiprocessing
+import platform
+import subprocess
+import time
+
+import random as Random
+
+try:
+    import resource # Unavailable on Windows
+except:
+    resource = None
+
+
+
+import _Controlled_Print as PRINT
+from _Command_Line_Parser import *
+
+import Generate_Random_Chromosomes as GRC
+import Sequence_Extractor as SE
+import Sequence_Inserter as SI
+import Generate_Fragments as GF
+import Generate_Reads as GR
+
+
+
+# Strings ######################################################################
+
+STR__use_help = "\nUse the -h option for help:\n\t python "\
+"Benchmark.py -h"
+
+
+
+STR__invalid_scale = """
+ERROR: Invalid genome scale: {s}
+Please specify a positive integer, optionally followed by K, M, or G."""
+
+
+
+STR__stage_begin = "\nBenchmarking {s} ({c})..."
+STR__stage_failed = "\nERROR: {s} failed with exit code {e}."
+
+STR__error_stages = """
+ERROR: One or more stages failed. Their results have been recorded without a
+throughput."""
+
+STR__results = """
+Stage results ({c}):
+{s}"""
+STR__result_line = "    {s:<32}{t:>10.2f}s{b:>16} bp/s{m:>12} KB"
+
+STR__Benchmark_begin = "\nRunning Benchmark..."
+
+STR__Benchmark_complete = "\nBenchmark successfully finished."
+
+
+
+# Lists ########################################################################
+
+LIST__stages = ["Generate_Synthetic_Chromosomes", "Extract_Sequences",
+        "Insert_Sequences", "Generate_Fragments", "Generate_Reads"]
+
+
+
+# Dictionaries #################################################################
+
+DICT__scale_suffixes = {"K": 1000, "M": 1000000, "G": 1000000000}
+
+
+
+# Apply Globals ################################################################
+
+PRINT.PRINT_ERRORS = PRINT_ERRORS
+PRINT.PRINT_PROGRESS = PRINT_PROGRESS
+PRINT.PRINT_METRICS = PRINT_METRICS
+
+
+
+# Functions ####################################################################
+
+def Benchmark(scales, path_out, path_json):
+    """
+    Benchmark every stage of the genome and read generation pipeline, at each
+    of the specified genome scales, and append the results to a JSON file.
+    
+    @scales
+            (list<str>)
+            The genome scales to be benchmarked, as strings. (Ex. "100M")
+    @path_out
+            (str - dirpath)
+            The folder in which the intermediate files are to be created.
+    @path_json
+            (str - filepath)
+            The JSON file to which the results are to be appended.
+    
+    Return a value of 0 if the function runs successfully.
+    Return a value of 1 if there is a problem with the output folder.
+    Return a value of 2 if there is a problem with the JSON file.
+    Return a value of 3 if any stage failed. (The results are still recorded)
+    
+    Benchmark(list<str>, str, str) -> int
+    """
+    PRINT.printP(STR__Benchmark_begin)
+    # Setup
+    try:
+        if not os.path.isdir(path_out): os.makedirs(path_out)
+    except:
+        return 1
+    run = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": Get_Commit(), "python": platform.python_version(),
+            "platform": platform.platform(), "scales": []}
+    failed = False
+    # Main loop
+    for scale in scales:
+        size = Parse_Scale(scale)
+        results = Benchmark_Scale(scale, size, path_out + "\\" + scale)
+        run["scales"].append({"scale": scale, "genome_size": size,
+                "stages": results})
+        Report_Results(scale, results)
+        if [1 for result in results if result["exit_code"] != 0]: failed = True
+    # Write results
+    try:
+        runs = json.load(open(path_json, "U"))
+        if type(runs) != list: runs = [runs]
+    except:
+        runs = []
+    runs.append(run)
+    try:
+        o = open(path_json, "w")
+        json.dump(runs, o, indent = 2, sort_keys = True)
+        o.close()
+    except:
+        return 2
+    if failed: return 3
+    PRINT.printP(STR__Benchmark_complete)
+    return 0
+
+def Benchmark_Scale(scale, size, path_out):
+    """
+    Benchmark every stage of the pipeline for a genome of [size] basepairs,
+    creating all intermediate files in the folder [path_out].
+    
+    Stages are only run if all preceding stages were successful.
+    
+    Return a list of the results of each stage. (See Run_Stage())
+    
+    Benchmark_Scale(str, int, str) -> list<dict<str:*>>
+    """
+    results = []
+    if not os.path.isdir(path_out): os.makedirs(path_out)
+    # Filepaths
+    path_sizes = path_out + "\\" + "Chr_Sizes.tsv"
+    path_elements = path_out + "\\" + "Elements.tsv"
+    path_genome = path_out + "\\" + "Genome"
+    path_ex_genome = path_out + "\\" + "Excised_Genome"
+    path_ex_seqs = path_out + "\\" + "Excised_Sequences"
+    path_ex_coords = path_out + "\\" + "Excised_Coords.tsv"
+    path_ex_sizes = path_out + "\\" + "Excised_Sizes.tsv"
+    path_in_genome = path_out + "\\" + "Inserted_Genome"
+    path_in_coords = path_out + "\\" + "Inserted_Coords.tsv"
+    path_in_sizes = path_out + "\\" + "Inserted_Sizes.tsv"
+    path_frags = path_out + "\\" + "Fragments.fa"
+    path_r1 = path_out + "\\" + "Reads_r1.fq"
+    path_r2 = path_out + "\\" + "Reads_r2.fq"
+    for path in [path_genome, path_ex_genome, path_ex_seqs, path_in_genome]:
+        if not os.path.isdir(path): os.makedirs(path)
+    # Inputs
+    Write_Benchmark_Inputs(size, path_sizes, path_elements)
+    # Stages
+    stages = [
+        [GRC.Generate_Synthetic_Chromosomes, [path_sizes, path_genome,
+                GRC.DEFAULT__width, GRC.METHOD.EQUAL, GRC.CUTOFFS__equal]],
+        [SE.Extract_Sequences, [path_genome, path_elements, False,
+                path_ex_genome, path_ex_seqs, path_ex_coords, path_ex_sizes]],
+        [SI.Insert_Sequences, [path_ex_genome, path_ex_coords, path_ex_seqs,
+                path_in_genome, path_in_coords, path_in_sizes,
+                SI.DEFAULT__overhang_min, SI.DEFAULT__overhang_max,
+                SI.DEFAULT__overhang_mismatches, SI.DEFAULT__overhang_largest,
+                SI.DEFAULT__mask]],
+        [GF.Generate_Fragments, [path_in_genome, path_frags,
+                [GF.DEFAULT__depth, GF.DEFAULT__cov_dist, GF.DEFAULT__cov_num],
+                READ_LENGTH, [GF.DEFAULT__frag_len, GF.DEFAULT__frag_dist,
+                GF.DEFAULT__frag_num], [GF.DEFAULT__method], ""]],
+        [GR.Generate_Reads, [path_frags, [path_r1, path_r2], GR.DEFAULT__phred,
+                [GR.DEFAULT__read_1_len, GR.DEFAULT__read_2_len],
+                [GR.DEFAULT__avg_quality, GR.DEFAULT__quality_dist,
+                GR.DEFAULT__quality_param], [GR.DEFAULT__avg_dupes,
+                GR.DEFAULT__dupes_dist, GR.DEFAULT__dupes_param],
+                [GR.DEFAULT__min_dupes, GR.DEFAULT__max_dupes],
+                [GR.DEFAULT__avg_trunc, GR.DEFAULT__trunc_dist,
+                GR.DEFAULT__trunc_param], GR.DEFAULT__threads, ""]]]
+    # Run
+    for i in range(len(stages)):
+        stage_name = LIST__stages[i]
+        function, args = stages[i]
+        PRINT.printP(STR__stage_begin.format(s = stage_name, c = scale))
+        if stage_name == "Generate_Reads": bases = Count_FASTA_Bases(path_frags)
+        else: bases = size
+        result = Run_Stage(stage_name, function, args, bases)
+        results.append(result)
+        if result["exit_code"] != 0:
+            PRINT.printE(STR__stage_failed.format(s = stage_name,
+                    e = result["exit_code"]))
+            break
+    return results
+
+def Write_Benchmark_Inputs(size, path_sizes, path_elements):
+    """
+    Write a chromosome sizes file for a genome of [size] basepairs, and a table
+    of evenly spaced genetic elements for Extract_Sequences().
+    
+    The genome is split into as few chromosomes as possible, with no chromosome
+    being larger than CHR_SIZE_MAX.
+    
+    Write_Benchmark_Inputs(int, str, str) -> None
+    """
+    chr_count = (size + CHR_SIZE_MAX - 1)/CHR_SIZE_MAX
+    o_sizes = open(path_sizes, "w")
+    o_elements = open(path_elements, "w")
+    counter = 0
+    for i in range(chr_count):
+        chr_name = "chr" + str(i + 1)
+        chr_size = size/chr_count
+        if i < size % chr_count: chr_size += 1
+        o_sizes.write(chr_name + "\t" + str(chr_size) + "\n")
+        start = ELEMENT_SPACING/2
+        while start + ELEMENT_SIZE <= chr_size:
+            counter += 1
+            if counter % 2: direction = "+"
+            else: direction = "-"
+            values = [chr_name, str(start), str(start + ELEMENT_SIZE - 1),
+                    direction, "Element_" + str(counter), "Benchmark",
+                    "Benchmark"]
+            o_elements.write("\t".join(values) + "\n")
+            start += ELEMENT_SPACING
+    o_sizes.close()
+    o_elements.close()
+
+def Run_Stage(stage_name, function, args, bases):
+    """
+    Run [function] with [args] in a separate process, and return a dictionary
+    containing the stage name, the exit code of the function, the wall time,
+    the number of bases processed per second, and the peak memory usage of the
+    process in KB. The number of bases processed per second is None if the
+    function failed.
+    
+    Running each stage in a separate process ensures that the peak memory usage
+    of each stage is measured separately.
+    
+    Run_Stage(str, function, list, int) -> dict<str:*>
+    """
+    queue = multiprocessing.Queue()
+    p = multiprocessing.Process(target = Run_Stage__PROCESS,
+            args = (queue, function, args))
+    p.start()
+    try:
+        exit_code, wall_time, peak_rss = queue.get()
+    except:
+        exit_code, wall_time, peak_rss = [-1, 0.0, None]
+    p.join()
+    if exit_code != 0: bases_per_sec = None
+    elif wall_time: bases_per_sec = bases/wall_time
+    else: bases_per_sec = 0.0
+    return {"stage": stage_name, "exit_code": exit_code,
+            "wall_time": wall_time, "bases": bases,
+            "bases_per_sec": bases_per_sec, "peak_rss_kb": peak_rss}
+
+def Run_Stage__PROCESS(queue, function, args):
+    """
+    The subprocess component of Run_Stage(). Run [function] with [args], and
+    put the exit code, wall time, and peak memory usage into [queue].
+    
+    Run_Stage__PROCESS(multiprocessing.Queue, function, list) -> None
+    """
+    Random.seed(SEED)
+    start = time.time()
+    try:
+        exit_code = function(*args)
+    except:
+        exit_code = -1
+    wall_time = time.time() - start
+    queue.put([exit_code, wall_time, Get_Peak_RSS()])
+
+def Get_Peak_RSS():
+    """
+    Return the peak memory usage (peak resident set size) of the current
+    process in KB.
+    Return None if this cannot be determined.
+    
+    Get_Peak_RSS() -> int
+    """
+    if not resource: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin": peak = peak/1024 # Bytes on macOS
+    return peak
+
+def Get_Commit():
+    """
+    Return the hash of the current git commit of this library.
+    Return an empty string if this cannot be determined.
+    
+    Get_Commit() -> str
+    """
+    try:
+        dirpath = os.path.dirname(os.path.abspath(__file__))
+        p = subprocess.Popen(["git", "rev-parse", "HEAD"], cwd = dirpath,
+                stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        return p.communicate()[0].strip()
+    except:
+        return ""
+
+def Count_FASTA_Bases(file_path):
+    """
+    Return the total number of nucleotides in a FASTA file.
+    Return 0 if the file cannot be read.
+    
+    Count_FASTA_Bases(str) -> int
+    """
+    total = 0
+    try:
+        f = open(file_path, "U")
+    except:
+        return 0
+    for line in f:
+        if line[0] != ">": total += len(line.rstrip("\n"))
+    f.close()
+    return total
+
+def Parse_Scale(scale):
+    """
+    Return the number of basepairs denoted by a genome scale string, such as
+    "100M" or "3G".
+    Return -1 if the string is invalid.
+    
+    Parse_Scale(str) -> int
+    """
+    multiplier = DICT__scale_suffixes.get(scale[-1:].upper(), 1)
+    if multiplier > 1: scale = scale[:-1]
+    try:
+        size = int(float(scale) * multiplier)
+    except:
+        return -1
+    if size < 1: return -1
+    return size
+
+def Report_Results(scale, results):
+    """
+    Print a summary of the results of each stage for a genome scale.
+    
+    Report_Results(str, list<dict<str:*>>) -> None
+    """
+    sb = ""
+    for result in results:
+        bases_per_sec = result["bases_per_sec"]
+        if bases_per_sec == None: bases_per_sec = "?"
+        else: bases_per_sec = "{:.0f}".format(bases_per_sec)
+        peak_rss = result["peak_rss_kb"]
+        if peak_rss == None: peak_rss = "?"
+        sb += STR__result_line.format(s = result["stage"],
+                t = result["wall_time"], b = bases_per_sec, m = peak_rss) + "\n"
+    PRINT.printM(STR__results.format(c = scale, s = sb))
+
+
+
+# Command Line Parsing #########################################################
+
+def Parse_Command_Line_Input__Benchmark(raw_command_line_input):
+    """
+    Parse the command line input and call the Benchmark function with
+    appropriate arguments if the command line input is valid.
+    """
+    PRINT.printP(STR__parsing_args)
+    # Remove the runtime environment variable and program name from the inputs
+    inputs = Strip_Non_Inputs(raw_command_line_input, NAME)
+    
+    # Help option
+    if inputs and inputs[0] in LIST__help:
+        print(HELP_DOC)
+        return 0
+    
+    # Set up rest of the parsing
+    scales = DEFAULT__scales
+    path_out = DEFAULT__output_folder
+    path_json = DEFAULT__json
+    
+    # Validate optional inputs
+    while inputs:
+        arg = inputs.pop(0)
+        try: # Second argument
+            arg2 = inputs.pop(0)
+        except:
+            PRINT.printE(STR__insufficient_inputs)
+            PRINT.printE(STR__use_help)
+            return 1
+        if arg == "-s": # Scales
+            scales = arg2
+        elif arg == "-o": # Output folder
+            path_out = arg2
+        elif arg == "-j": # JSON file
+            path_json = arg2
+        else: # Invalid
+            arg = Strip_X(arg)
+            PRINT.printE(STR__invalid_argument.format(s = arg))
+            PRINT.printE(STR__use_help)
+            return 1
+    
+    # Validate scales
+    scales = scales.split(",")
+    for scale in scales:
+        if Parse_Scale(scale) == -1:
+            PRINT.printE(STR__invalid_scale.format(s = scale))
+            return 1
+    
+    # Run program
+    exit_state = Benchmark(scales, path_out, path_json)
+    
+    # Exit
+    if exit_state == 0: return 0
+    else:
+        if exit_state == 1: PRINT.printE(STR__IO_error_write_folder_cannot)
+        if exit_state == 2: PRINT.printE(STR__IO_error_write_unable)
+        if exit_state == 3:
+            PRINT.printE(STR__error_stages)
+            return 1
+        PRINT.printE(STR__use_help)
+        return 1
+
+
+
+# Main Loop ####################################################################
+
+if AUTORUN and (__name__ == "__main__"):
+    exit_code = Parse_Command_Line_Input__Benchmark(sys.argv)
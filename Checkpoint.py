@@ -0,0 +1,131 @@
+"""
+CHECKPOINT
+(version 1.0)
+by Angelo Chan
+
+This module contains functions for writing and reading checkpoint files, which
+allow long runs to be resumed after being interrupted.
+
+A checkpoint file is a JSON file recording everything needed to continue a run
+from a particular point: how much of the input has been processed, how many
+bytes of each output file had been written at that point, the state of the
+random number generator, and the metrics accumulated so far. The exact contents
+depend on the program.
+
+A resumed run truncates its output files back to the offsets recorded in the
+checkpoint, restores the random number generator, and continues from where the
+checkpoint was taken. Any output written after the last checkpoint is discarded
+and generated again.
+"""
+
+# Imported Modules #############################################################
+
+import json
+import os
+
+import random as Random
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__CHECKPOINT = "__CHECKPOINT.json"
+
+
+
+# Functions ####################################################################
+
+def Get_Checkpoint_Path(path_out):
+    """
+    Return the filepath of the checkpoint file for the output file [path_out].
+    
+    Get_Checkpoint_Path(str) -> str
+    """
+    return path_out + FILEMOD__CHECKPOINT
+
+def Write_Checkpoint(file_path, state):
+    """
+    Write the checkpoint [state] to [file_path].
+    
+    The checkpoint is written to a temporary file first, which then replaces
+    the previous checkpoint, so an interruption while writing the checkpoint
+    leaves the previous checkpoint intact.
+    
+    Write_Checkpoint(str, dict) -> None
+    """
+    temp_path = file_path + ".tmp"
+    f = open(temp_path, "w")
+    f.write(json.dumps(state, sort_keys = True))
+    f.close()
+    if os.path.exists(file_path): os.remove(file_path)
+    os.rename(temp_path, file_path)
+
+def Read_Checkpoint(file_path):
+    """
+    Read the checkpoint at [file_path].
+    
+    Return the checkpoint state if successful.
+    Return None if the checkpoint file does not exist or is invalid.
+    
+    Read_Checkpoint(str) -> dict/None
+    """
+    try:
+        f = open(file_path, "U")
+        state = json.loads(f.read())
+        f.close()
+    except:
+        return None
+    return state
+
+def Remove_Checkpoint(file_path):
+    """
+    Delete the checkpoint at [file_path], if it exists. Called once a run has
+    been completed successfully.
+    
+    Remove_Checkpoint(str) -> None
+    """
+    if os.path.exists(file_path): os.remove(file_path)
+
+def Settings_Match(state, settings):
+    """
+    Return True if the checkpoint [state] was taken from a run with the same
+    [settings]. The settings are stored in the "settings" entry of the state.
+    
+    Settings_Match(dict, list) -> bool
+    """
+    return state.get("settings") == json.loads(json.dumps(settings))
+
+def Get_RNG_State():
+    """
+    Return the state of the random number generator, in a form which can be
+    stored in a checkpoint.
+    
+    Get_RNG_State() -> list
+    """
+    version, internal, gauss_next = Random.getstate()
+    return [version, list(internal), gauss_next]
+
+def Set_RNG_State(state):
+    """
+    Restore the state of the random number generator from a checkpoint.
+    
+    Set_RNG_State(list) -> None
+    """
+    version, internal, gauss_next = state
+    Random.setstate((version, tuple(internal), gauss_next))
+
+def Open_Truncated(file_path, offset, mode="r+b", buffering=-1):
+    """
+    Open the existing file at [file_path] for writing, discarding everything
+    after the first [offset] bytes. [mode] should be "r+" for text files and
+    "r+b" for binary files.
+    
+    Raise an IOError if the file cannot be opened, or is shorter than [offset].
+    
+    Open_Truncated(str, int, str, int) -> file
+    """
+    if os.path.getsize(file_path) < offset: raise IOError
+    f = open(file_path, mode, buffering)
+    f.seek(offset)
+    f.truncate()
+    return f
@@ -0,0 +1,425 @@
+"""
+COMPOSITION INDEX
+(version 1.0)
+by Angelo Chan
+
+This module contains functions and Classes for building and querying companion
+indexes of the nucleotide composition of chromosome files, (FASTA or packed)
+so that the number of As, Cs, Gs, Ts, and Ns in any region of a chromosome can
+be found in constant time.
+
+An index stores the cumulative counts of each nucleotide at regular intervals
+along the chromosome. (Prefix sums) The composition of a region is found from
+the difference between the cumulative counts at its two ends. Only the bases
+between the nearest sampled positions and the ends of the region need to be
+counted directly, so the cost of a query does not depend on the size of the
+region. Lowercase (soft-masked) bases are counted alongside uppercase bases, and
+all non-ACGT characters are counted as Ns.
+
+Index files are given the same name as the chromosome file they index, with
+FILEMOD__COMPOSITION appended to the end. The counts are stored as a flat array
+of little-endian 64-bit integers, five per sampled position, following a short
+header. Index files are memory-mapped when they are read, so only the sampled
+positions which are queried are ever read from disk. An index records the size
+and modification time of its chromosome file, and will be rebuilt automatically
+by Get_Composition_Index() if the chromosome file changes.
+
+An index can be built while a chromosome is being written, by passing the
+sequence to a Composition Writer object as it is written.
+"""
+
+# Imported Modules #############################################################
+
+import os
+import mmap
+import struct
+
+from Packed_Genome import Count_Packed
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__COMPOSITION = ".comp"
+
+INDEX_MAGIC = "SISGCMP1"
+
+SAMPLE_INTERVAL = 1000 # Number of bases between sampled positions
+BLOCK_SIZE = 1000000 # Number of bases read at a time when building an index
+
+
+
+# Strings ######################################################################
+
+STR__header = "<QdQQ" # File size, modification time, length, interval
+STR__row = "<5Q"
+
+STR__table = "".join([chr(i) for i in range(256)]).upper()
+STR__table = "".join([c in "ACGT" and c or "N" for c in STR__table])
+
+
+
+# Functions ####################################################################
+
+def Count_Composition(seq):
+    """
+    Return a count of the As, Cs, Gs, Ts, and Ns, respectively, in [seq].
+    Lowercase bases are counted alongside uppercase bases, and all non-ACGT
+    characters are counted as Ns.
+    
+    Count_Composition(str) -> [int, int, int, int, int]
+    """
+    seq = seq.translate(STR__table)
+    counts = [seq.count("A"), seq.count("C"), seq.count("G"), seq.count("T")]
+    counts.append(len(seq) - sum(counts))
+    return counts
+
+def Build_Composition_Index(sequence, path_index=""):
+    """
+    Build a composition index for [sequence], a Packed_Sequence or
+    Loaded_Sequence object, and write it to [path_index].
+    
+    @sequence
+            (Packed_Sequence/Loaded_Sequence)
+            The sequence to be indexed.
+    @path_index
+            (str - filepath)
+            The filepath of the index file to be created. If an empty string is
+            supplied, the filepath of [sequence] with FILEMOD__COMPOSITION
+            appended will be used.
+    
+    Return a Composition Writer object containing the index, regardless of
+    whether or not the index file could be written.
+    
+    Build_Composition_Index(Packed_Sequence/Loaded_Sequence, str) ->
+            Composition_Writer
+    """
+    if not path_index: path_index = sequence.file_path + FILEMOD__COMPOSITION
+    writer = Composition_Writer()
+    length = sequence.Get_Length()
+    for start in xrange(1, length + 1, BLOCK_SIZE):
+        writer.Add(sequence.Get_Slice(start, start + BLOCK_SIZE - 1))
+    writer.Write(path_index, sequence.file_path)
+    return writer
+
+def Load_Composition_Index(path_index, sequence=None):
+    """
+    Return a Composition Index object for the index file at [path_index],
+    memory-mapped for reading.
+    
+    Raise an IOError if the file is not a valid composition index.
+    
+    Load_Composition_Index(str, Packed_Sequence/Loaded_Sequence) ->
+            Composition_Index
+    """
+    f = open(path_index, "rb")
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        data.close()
+        raise IOError("Not a composition index file: " + path_index)
+    return Composition_Index(data, sequence)
+
+def Get_Composition_Index(sequence):
+    """
+    Return a Composition Index object for [sequence], a Packed_Sequence or
+    Loaded_Sequence object.
+    
+    The companion index file of the sequence is used if it exists and is up to
+    date. Otherwise, the index is built and written to the companion index
+    file. If the index file cannot be written, the index is kept in memory
+    instead.
+    
+    Get_Composition_Index(Packed_Sequence/Loaded_Sequence) -> Composition_Index
+    """
+    path_index = sequence.file_path + FILEMOD__COMPOSITION
+    if os.path.exists(path_index):
+        try:
+            index = Load_Composition_Index(path_index, sequence)
+            if index.Is_Current(sequence.file_path): return index
+            index.Close()
+        except: # Corrupt or foreign file, rebuild
+            pass
+    writer = Build_Composition_Index(sequence, path_index)
+    return writer.Get_Index(sequence)
+
+
+
+# Classes ######################################################################
+
+class Composition_Writer:
+    """
+    Builds a composition index from a sequence, which is passed to it in order,
+    in pieces of any size.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        """
+        Creates a Composition Writer object which samples the cumulative counts
+        every [interval] bases.
+        """
+        self.interval = interval
+        self.length = 0
+        self.path = "" # The index file, once written
+        self._counts = [0, 0, 0, 0, 0]
+        self._samples = [0, 0, 0, 0, 0]
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Add(self, seq):
+        """
+        Add [seq] to the end of the sequence being indexed.
+        """
+        i = 0
+        while i < len(seq):
+            room = self.interval - (self.length % self.interval)
+            temp = Count_Composition(seq[i:i+room])
+            self._Add_Counts(temp, min(room, len(seq) - i))
+            i += room
+    
+    def Add_Packed(self, data, length):
+        """
+        Add the first [length] nucleotides of [data], a string of bytes produced
+        by Pack_Sequence(), to the end of the sequence being indexed. The
+        sequence being indexed must currently be a multiple of 4 bases long.
+        
+        The packed bytes are counted directly, without being unpacked.
+        """
+        i = 0
+        while i < length:
+            room = self.interval - (self.length % self.interval)
+            size = min(room, length - i)
+            temp = Count_Packed(data[i/4:(i+size+3)/4], size) + [0]
+            self._Add_Counts(temp, size)
+            i += size
+    
+    def _Add_Counts(self, counts, length):
+        """
+        Add the [counts] of [length] bases, none of which lie beyond the next
+        sampled position, to the cumulative counts.
+        """
+        for j in range(5): self._counts[j] += counts[j]
+        self.length += length
+        if self.length % self.interval == 0:
+            self._samples.extend(self._counts)
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Get_Data(self, file_size=0, file_mtime=0.0):
+        """
+        Return the contents of the index file, as a string of bytes.
+        """
+        values = self._samples + self._counts # Totals are always the final row
+        return (INDEX_MAGIC + struct.pack(STR__header, file_size, file_mtime,
+                self.length, self.interval) +
+                struct.pack("<%dQ" % len(values), *values))
+    
+    def Write(self, path_index, path_source):
+        """
+        Write the index to [path_index]. The index will record the size and
+        modification time of the chromosome file at [path_source], which must
+        be complete.
+        
+        Return 0 if successful.
+        Return 1 if the index file could not be written.
+        """
+        try:
+            data = self.Get_Data(os.path.getsize(path_source),
+                    os.path.getmtime(path_source))
+            o = open(path_index, "wb")
+            o.write(data)
+            o.close()
+        except:
+            return 1
+        self.path = path_index
+        return 0
+    
+    def Get_Index(self, sequence=None):
+        """
+        Return a Composition Index object of the index, kept in memory.
+        """
+        return Composition_Index(self.Get_Data(), sequence)
+
+
+
+class Composition_Index:
+    """
+    A read-only composition index of a single chromosome.
+    
+    If a sequence object is attached, the bases between the sampled positions
+    and the ends of each region are read from it, so the composition of any
+    region can be found. Otherwise, only regions which begin and end at sampled
+    positions, or at the end of the chromosome, can be queried.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, data, sequence=None):
+        """
+        Creates a Composition Index object from [data], the contents of an index
+        file, as a memory-map or a string of bytes. [sequence] is the indexed
+        Packed_Sequence or Loaded_Sequence object, if it is available.
+        """
+        self._data = data
+        self.sequence = sequence
+        offset = len(INDEX_MAGIC)
+        values = struct.unpack_from(STR__header, data, offset)
+        self.file_size, self.file_mtime, self.length, self.interval = values
+        self._offset = offset + struct.calcsize(STR__header)
+        self._row_size = struct.calcsize(STR__row)
+        self._last = self.length / self.interval + 1 # Row of the totals
+    
+    def Close(self):
+        """
+        Close the index.
+        """
+        if type(self._data) == mmap.mmap: self._data.close()
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Is_Current(self, path_source):
+        """
+        Return True if the index is up to date with the chromosome file at
+        [path_source].
+        """
+        try:
+            size = os.path.getsize(path_source)
+            mtime = os.path.getmtime(path_source)
+        except:
+            return False
+        return size == self.file_size and mtime == self.file_mtime
+    
+    def Get_Length(self):
+        """
+        Return the length of the indexed chromosome.
+        """
+        return self.length
+    
+    def Get_Totals(self):
+        """
+        Return a count of the As, Cs, Gs, Ts, and Ns, respectively, in the
+        entire chromosome.
+        """
+        return self._Get_Row(self._last)
+    
+    
+    
+    # Query Methods ############################################################
+    
+    def Count(self, start, end):
+        """
+        Return a count of the As, Cs, Gs, Ts, and Ns, respectively, between
+        [start] and [end], inclusive. (1-based) Coordinates beyond either end
+        of the chromosome are trimmed.
+        
+        Count(int, int) -> [int, int, int, int, int]
+        """
+        if start < 1: start = 1
+        if end > self.length: end = self.length
+        if end < start: return [0, 0, 0, 0, 0]
+        counts_end = self._Count_To(end)
+        counts_start = self._Count_To(start - 1)
+        return [counts_end[j] - counts_start[j] for j in range(5)]
+    
+    def Count_GC(self, start, end):
+        """
+        Return the number of G and C bases between [start] and [end], inclusive.
+        (1-based)
+        
+        Count_GC(int, int) -> int
+        """
+        counts = self.Count(start, end)
+        return counts[1] + counts[2]
+    
+    def _Count_To(self, position):
+        """
+        Return the cumulative counts up to and including [position].
+        """
+        if position >= self.length: return self._Get_Row(self._last)
+        i = position / self.interval
+        counts = self._Get_Row(i)
+        remainder = position - (i * self.interval)
+        if remainder:
+            start = (i * self.interval) + 1
+            temp = Count_Composition(self.sequence.Get_Slice(start, position))
+            counts = [counts[j] + temp[j] for j in range(5)]
+        return counts
+    
+    def _Get_Row(self, i):
+        """
+        Return the cumulative counts of the [i]th sampled position.
+        """
+        offset = self._offset + (i * self._row_size)
+        return list(struct.unpack_from(STR__row, self._data, offset))
+
+
+
+class Genome_Composition:
+    """
+    Provides composition queries for the chromosomes of a genome folder, using
+    the composition index of each chromosome.
+    
+    Only the index of the currently open chromosome of the genome folder is
+    kept open.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, genome):
+        """
+        Creates a Genome Composition object for [genome], a Genome_Folder
+        object.
+        """
+        self.genome = genome
+        self._name = ""
+        self._index = None
+    
+    def Close(self):
+        """
+        Close the currently open index, if any.
+        """
+        if self._index: self._index.Close()
+        self._name = ""
+        self._index = None
+    
+    
+    
+    # Query Methods ############################################################
+    
+    def Get_Index(self, chr_name):
+        """
+        Return the Composition Index object of the chromosome named [chr_name],
+        opening or building it if necessary.
+        Return None if there is no such chromosome.
+        """
+        seq = self.genome.Get_Chromosome(chr_name)
+        if not seq: return None
+        if chr_name == self._name and self._index.sequence is seq:
+            return self._index
+        self.Close()
+        self._name = chr_name
+        self._index = Get_Composition_Index(seq)
+        return self._index
+    
+    def Count(self, chr_name, start, end):
+        """
+        Return a count of the As, Cs, Gs, Ts, and Ns, respectively, between
+        [start] and [end], inclusive, (1-based) of the chromosome named
+        [chr_name].
+        Return an empty list if there is no such chromosome.
+        
+        Count(str, int, int) -> [int, int, int, int, int]
+        """
+        index = self.Get_Index(chr_name)
+        if not index: return []
+        return index.Count(start, end)
@@ -0,0 +1,468 @@
+"""
+COORDINATES INDEX
+(version 1.0)
+by Angelo Chan
+
+This module contains functions and Classes for building and querying an on-disk
+interval index over genomic coordinates tables, such as the coordinates tables
+produced by Sequence_Extractor.py and Sequence_Inserter.py.
+
+A coordinates table is a TSV file where the first three columns are:
+    
+    1) Chromosome name
+    2) Start
+    3) End
+
+The index stores, for each chromosome, the rows of the table sorted by their
+start coordinates, alongside a running maximum of their end coordinates and the
+byte offset of each row within the table. A region query is answered with two
+binary searches followed by a scan over the candidate rows only, and returns the
+byte offsets of all rows which overlap the region. The table itself never needs
+to be read in its entirety.
+
+Index files are given the same name as the table they index, with FILEMOD__INDEX
+appended to the end. An index records the size and modification time of its
+table, and will be rebuilt automatically by Get_Index() if the table changes.
+"""
+
+# Imported Modules #############################################################
+
+import os
+import struct
+
+from bisect import bisect_left, bisect_right
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__INDEX = ".cidx"
+
+INDEX_MAGIC = "SISGCIX1"
+
+MAX_COORD = 2**63 - 1 # Used as the end coordinate of whole-chromosome regions
+
+
+
+# Strings ######################################################################
+
+STR__invalid_region = """
+ERROR: Invalid region: {s}
+Please specify either a chromosome name, a region in the format
+"chromosome:start-end", or the filepath of a regions file."""
+
+
+
+# Functions ####################################################################
+
+def Build_Coords_Index(path_table, path_index=""):
+    """
+    Build an interval index for the coordinates table at [path_table] and write
+    it to [path_index].
+    
+    @path_table
+            (str - filepath)
+            The filepath of the coordinates table to be indexed. The first three
+            columns of the table must be the chromosome name, start, and end.
+            Empty lines and lines beginning with a "#" are ignored.
+    @path_index
+            (str - filepath)
+            The filepath of the index file to be created. If an empty string is
+            supplied, [path_table] with FILEMOD__INDEX appended will be used.
+    
+    Return a value of 0 if the function runs successfully.
+    Return a value of 1 if there is a problem reading the table.
+    Return a value of 2 if there is a problem writing the index.
+    Return a value of 3 if the table contains invalid coordinates.
+    
+    Build_Coords_Index(str, str) -> int
+    """
+    if not path_index: path_index = path_table + FILEMOD__INDEX
+    # Read the table
+    try:
+        f = open(path_table, "rb")
+    except:
+        return 1
+    entries = {} # chr_name : list<[start, end, offset]>
+    order = [] # Chromosomes in order of first appearance
+    offset = 0
+    line = f.readline()
+    while line:
+        if line[0] != "#" and line.strip():
+            values = line.split("\t", 3)
+            try:
+                chr_name = values[0]
+                start = int(values[1])
+                end = int(values[2])
+            except:
+                f.close()
+                return 3
+            if chr_name not in entries:
+                entries[chr_name] = []
+                order.append(chr_name)
+            entries[chr_name].append([start, end, offset])
+        offset += len(line)
+        line = f.readline()
+    f.close()
+    table_size = os.path.getsize(path_table)
+    table_mtime = os.path.getmtime(path_table)
+    # Layout
+    header_size = len(INDEX_MAGIC) + struct.calcsize("<QdI")
+    for chr_name in order:
+        header_size += struct.calcsize("<H") + len(chr_name)
+        header_size += struct.calcsize("<QQ")
+    # Write the index
+    try:
+        o = open(path_index, "wb")
+    except:
+        return 2
+    o.write(INDEX_MAGIC)
+    o.write(struct.pack("<QdI", table_size, table_mtime, len(order)))
+    data_offset = header_size
+    for chr_name in order:
+        count = len(entries[chr_name])
+        o.write(struct.pack("<H", len(chr_name)) + chr_name)
+        o.write(struct.pack("<QQ", count, data_offset))
+        data_offset += 4 * 8 * count
+    for chr_name in order:
+        rows = entries[chr_name]
+        rows.sort()
+        count = len(rows)
+        starts = [row[0] for row in rows]
+        ends = [row[1] for row in rows]
+        offsets = [row[2] for row in rows]
+        max_ends = []
+        max_end = 0
+        for end in ends:
+            if end > max_end: max_end = end
+            max_ends.append(max_end)
+        fmt = "<%dQ" % count
+        o.write(struct.pack(fmt, *starts))
+        o.write(struct.pack(fmt, *ends))
+        o.write(struct.pack(fmt, *max_ends))
+        o.write(struct.pack(fmt, *offsets))
+    o.close()
+    return 0
+
+def Get_Index(path_table):
+    """
+    Return a Coords_Index object for the coordinates table at [path_table].
+    
+    The index file is built if it does not exist, or rebuilt if it is out of
+    date with respect to the table.
+    
+    Return None if the index could not be built.
+    
+    Get_Index(str) -> Coords_Index
+    """
+    path_index = path_table + FILEMOD__INDEX
+    if os.path.exists(path_index):
+        try:
+            index = Coords_Index(path_index)
+            if index.Is_Current(path_table): return index
+            index.Close()
+        except: # Corrupt or foreign file, rebuild
+            pass
+    if Build_Coords_Index(path_table, path_index): return None
+    return Coords_Index(path_index)
+
+
+
+def Parse_Region(string):
+    """
+    Parse a region string and return the region as a list containing the
+    chromosome name, the start, and the end. (1-based, inclusive)
+    
+    Valid formats are:
+        chromosome
+        chromosome:start-end
+    
+    Commas in the coordinates are ignored.
+    
+    Return an empty list if the region string is invalid.
+    
+    Parse_Region(str) -> [str, int, int]
+    """
+    if not string: return []
+    if ":" not in string: return [string, 1, MAX_COORD]
+    chr_name, coords = string.rsplit(":", 1)
+    coords = coords.replace(",", "")
+    try:
+        start, end = coords.split("-")
+        start = int(start)
+        end = int(end)
+    except:
+        return []
+    if not chr_name or start < 1 or end < start: return []
+    return [chr_name, start, end]
+
+def Load_Regions(path):
+    """
+    Load a list of regions from a regions file. The regions file is a TSV file
+    where the first three columns are the chromosome name, the start, and the
+    end. (1-based, inclusive, same as the coordinates tables) Lines which only
+    contain a chromosome name will be treated as the entire chromosome.
+    
+    Return an empty list if the regions file could not be read or contains
+    invalid regions.
+    
+    Load_Regions(str) -> list<[str, int, int]>
+    """
+    regions = []
+    try:
+        f = open(path, "U")
+    except:
+        return []
+    for line in f:
+        if line[0] == "#" or not line.strip(): continue
+        values = line.rstrip("\r\n").split("\t")
+        if len(values) < 3:
+            regions.append([values[0], 1, MAX_COORD])
+            continue
+        try:
+            regions.append([values[0], int(values[1]), int(values[2])])
+        except:
+            f.close()
+            return []
+    f.close()
+    return regions
+
+def Get_Regions(string):
+    """
+    Return a list of regions from [string], which is either a region string
+    (see Parse_Region()) or the filepath of a regions file (see
+    Load_Regions()).
+    
+    Return an empty list if [string] is neither.
+    
+    Get_Regions(str) -> list<[str, int, int]>
+    """
+    if os.path.isfile(string): return Load_Regions(string)
+    region = Parse_Region(string)
+    if region: return [region]
+    return []
+
+
+
+# Classes ######################################################################
+
+class Coords_Index:
+    """
+    A read-only interval index over a coordinates table.
+    
+    Only the chromosome directory is read upon construction. The arrays for a
+    chromosome are read from disk the first time that chromosome is queried.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, path_index):
+        """
+        Open the index file at [path_index] and read its chromosome directory.
+        """
+        self.path = path_index
+        self.file = open(path_index, "rb")
+        magic = self.file.read(len(INDEX_MAGIC))
+        if magic != INDEX_MAGIC:
+            self.file.close()
+            raise IOError("Not a coordinates index file: " + path_index)
+        size = struct.calcsize("<QdI")
+        values = struct.unpack("<QdI", self.file.read(size))
+        self.table_size, self.table_mtime, chr_count = values
+        self.directory = {} # chr_name : [count, data_offset]
+        self.chromosomes = []
+        size = struct.calcsize("<QQ")
+        while chr_count:
+            name_len = struct.unpack("<H", self.file.read(2))[0]
+            chr_name = self.file.read(name_len)
+            count, data_offset = struct.unpack("<QQ", self.file.read(size))
+            self.directory[chr_name] = [count, data_offset]
+            self.chromosomes.append(chr_name)
+            chr_count -= 1
+        self._cache = {}
+    
+    def Close(self):
+        """
+        Close the index file.
+        """
+        self.file.close()
+        self._cache = {}
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Is_Current(self, path_table):
+        """
+        Return True if the index is up to date with the table at [path_table].
+        """
+        try:
+            size = os.path.getsize(path_table)
+            mtime = os.path.getmtime(path_table)
+        except:
+            return False
+        return size == self.table_size and mtime == self.table_mtime
+    
+    def Get_Chromosomes(self):
+        """
+        Return a list of all the chromosomes in the index, in the order in which
+        they first appear in the table.
+        """
+        return list(self.chromosomes)
+    
+    
+    
+    # Query Methods ############################################################
+    
+    def Query(self, chr_name, start, end):
+        """
+        Return a list of the byte offsets of all rows in the table which overlap
+        the region [start]-[end] (1-based, inclusive) on chromosome [chr_name].
+        The offsets are returned in the order in which the rows appear in the
+        table.
+        
+        Query(str, int, int) -> list<int>
+        """
+        arrays = self._Load(chr_name)
+        if not arrays: return []
+        starts, ends, max_ends, offsets = arrays
+        lo = bisect_left(max_ends, start) # First row which may reach [start]
+        hi = bisect_right(starts, end) # First row which begins after [end]
+        results = []
+        for i in range(lo, hi):
+            if ends[i] >= start: results.append(offsets[i])
+        results.sort()
+        return results
+    
+    def Query_Regions(self, regions):
+        """
+        Return a list of the byte offsets of all rows in the table which overlap
+        any of the [regions]. Each row is only returned once, and the offsets
+        are returned in the order in which the rows appear in the table.
+        
+        Query_Regions(list<[str, int, int]>) -> list<int>
+        """
+        results = set()
+        for chr_name, start, end in regions:
+            results.update(self.Query(chr_name, start, end))
+        return sorted(results)
+    
+    def _Load(self, chr_name):
+        """
+        Return the arrays of starts, ends, running maximum ends, and row offsets
+        for [chr_name], reading them from disk if necessary.
+        Return an empty list if the chromosome is not in the index.
+        """
+        if chr_name in self._cache: return self._cache[chr_name]
+        if chr_name not in self.directory: return []
+        count, data_offset = self.directory[chr_name]
+        fmt = "<%dQ" % count
+        size = struct.calcsize(fmt)
+        self.file.seek(data_offset)
+        arrays = []
+        for i in range(4):
+            arrays.append(list(struct.unpack(fmt, self.file.read(size))))
+        self._cache[chr_name] = arrays
+        return arrays
+
+
+
+class Indexed_Table_Reader:
+    """
+    A table reader which only reads the rows of a coordinates table which
+    overlap a set of regions, using a Coords_Index to seek directly to them.
+    
+    Has the same reading interface as the Table_Reader from the File_Reader
+    module, and can be used in its place.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path, regions):
+        """
+        Creates an Indexed Table Reader for the table at [file_path], which will
+        only read the rows which overlap [regions].
+        """
+        self.file_path = file_path
+        self.regions = regions
+        self.file = None
+        self._delimiter = "\t"
+        self._offsets = []
+        self._index = 0
+        self._current = []
+    
+    
+    
+    # Parameter Configuration Methods ##########################################
+    
+    def Set_Delimiter(self, delimiter):
+        """
+        Set the delimiter used to separate the values in each row.
+        """
+        self._delimiter = delimiter
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self):
+        """
+        Open the table, building its index if necessary, and determine which
+        rows are to be read.
+        
+        Return 0 if successful.
+        Return 1 if the index could not be built or the table could not be
+        opened.
+        """
+        index = Get_Index(self.file_path)
+        if not index:
+            self._offsets = []
+            return 1
+        self._offsets = index.Query_Regions(self.regions)
+        index.Close()
+        self._index = 0
+        try:
+            self.file = open(self.file_path, "rb")
+        except:
+            self._offsets = []
+            return 1
+        return 0
+    
+    def Close(self):
+        """
+        Close the table if it is open.
+        """
+        if self.file: self.file.close()
+        self.file = None
+    
+    
+    
+    # File Reading Methods #####################################################
+    
+    def End(self):
+        """
+        Return True if there are no more matching rows to be read.
+        """
+        return self._index >= len(self._offsets)
+    
+    def Read(self):
+        """
+        Read the next matching row.
+        """
+        self.file.seek(self._offsets[self._index])
+        self._index += 1
+        line = self.file.readline().rstrip("\r\n")
+        self._current = line.split(self._delimiter)
+    
+    def Get_Current(self):
+        """
+        Return the values of the current row as a list of strings.
+        """
+        return self._current
+    
+    def Get_Count(self):
+        """
+        Return the total number of matching rows.
+        """
+        return len(self._offsets)
+
@@ -0,0 +1,172 @@
+"""
+COVERAGE MAP
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for simulating large-scale variation in the depth
+of coverage along each chromosome: "islands" which are heavily sequenced, and
+"deserts" which are sparsely sequenced.
+
+This is the first layer of a two-layered model. Each chromosome is divided into
+windows, and each window is given a coverage multiplier, drawn from a gamma
+distribution with a mean of 1. The multipliers can be smoothed with a moving
+average over neighbouring windows, so that the depth of coverage changes
+gradually rather than abruptly. The second layer is the existing process which
+places fragment midpoints, with random distances between them. The distances
+are measured in weighted bases, (bases multiplied by the multiplier of their
+window) so the density of fragments in each window is proportional to its
+multiplier.
+
+The cumulative weighted length at the start of every window is stored, so that
+converting a distance in weighted bases into a position is a single binary
+search. (An inverse CDF lookup) Windows are generated as they are needed, as
+the length of a chromosome may not be known in advance.
+
+Each chromosome has its own random number generator, seeded from the main one
+at the start of the chromosome, so the multipliers do not depend on the number
+of fragments generated.
+"""
+
+# Imported Modules #############################################################
+
+import random as Random
+
+from bisect import bisect_right
+from math import ceil
+
+
+
+# Configurations ###############################################################
+
+DECIMAL_PLACES = 4 # For bedGraph output
+
+
+
+# Classes ######################################################################
+
+class Coverage_Map:
+    """
+    A map of the relative depth of coverage along each chromosome, used to
+    convert distances in weighted bases into distances in bases.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, window_size, variability, smoothing=1):
+        """
+        Creates a Coverage Map object.
+        
+        @window_size
+                (int)
+                The size of each window, in bases.
+        @variability
+                (float)
+                The coefficient of variation (standard deviation divided by the
+                mean) of the coverage multipliers. Higher values result in more
+                pronounced islands and deserts.
+        @smoothing
+                (int)
+                The number of neighbouring windows over which the coverage
+                multipliers are averaged, centred on each window. (Rounded up
+                to an odd number) No smoothing is performed if this is 1.
+        """
+        self.window_size = window_size
+        self.variability = variability
+        self.smoothing = smoothing
+        self.chr_name = None # Windows are generated once the first is named
+    
+    def _Reset(self):
+        """
+        Reset the windows and random number generator, for a new chromosome.
+        """
+        self._rng = Random.Random(Random.getrandbits(64))
+        self._raw = []
+        self._multipliers = []
+        self._cumulative = [0.0]
+        self._last = [0, 0.0] # Last position returned, and its weighted value
+    
+    
+    
+    # Window Methods ###########################################################
+    
+    def _Draw(self):
+        """
+        Return a random coverage multiplier, with a mean of 1.
+        """
+        if not self.variability: return 1.0
+        shape = 1 / (self.variability ** 2)
+        return self._rng.gammavariate(shape, 1 / shape)
+    
+    def _Extend(self):
+        """
+        Add the next window to the end of the map.
+        """
+        raw = self._raw
+        i = len(self._multipliers)
+        half = self.smoothing / 2
+        while len(raw) <= i + half: raw.append(self._Draw())
+        if half:
+            values = raw[max(i - half, 0):i + half + 1]
+            multiplier = sum(values) / len(values)
+        else: multiplier = raw[i]
+        self._multipliers.append(multiplier)
+        self._cumulative.append(self._cumulative[-1] +
+                multiplier * self.window_size)
+    
+    def _Get_Weighted(self, position):
+        """
+        Return the number of weighted bases up to and including [position].
+        """
+        i = position / self.window_size
+        while len(self._multipliers) <= i: self._Extend()
+        return (self._cumulative[i] +
+                (position - (i * self.window_size)) * self._multipliers[i])
+    
+    
+    
+    # Query Methods ############################################################
+    
+    def Advance(self, chr_name, position, distance):
+        """
+        Return the position reached by moving [distance] weighted bases along
+        the chromosome named [chr_name], starting from [position].
+        
+        The fraction of a base by which the returned position overshoots is
+        carried over into the next call, if it starts from that position.
+        """
+        if chr_name != self.chr_name:
+            self.chr_name = chr_name
+            self._Reset()
+        if position == self._last[0]: weighted = self._last[1]
+        else: weighted = self._Get_Weighted(position)
+        target = weighted + distance
+        cumulative = self._cumulative
+        while cumulative[-1] <= target: self._Extend()
+        i = bisect_right(cumulative, target) - 1
+        exact = (i * self.window_size) + ((target - cumulative[i]) /
+                self._multipliers[i])
+        result = int(ceil(exact))
+        if result <= position: result = position + 1
+        self._last = [result, target]
+        return result
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Write_BedGraph(self, output, chr_name, chr_len):
+        """
+        Write the coverage multipliers of the windows of the current chromosome,
+        named [chr_name] and [chr_len] bases long, to [output] in bedGraph
+        format.
+        """
+        size = self.window_size
+        while len(self._multipliers) * size < chr_len: self._Extend()
+        template = "%s\t%d\t%d\t%." + str(DECIMAL_PLACES) + "f\n"
+        sb = []
+        for i in range(len(self._multipliers)):
+            start = i * size
+            if start >= chr_len: break
+            end = min(start + size, chr_len)
+            sb.append(template % (chr_name, start, end, self._multipliers[i]))
+        output.write("".join(sb))
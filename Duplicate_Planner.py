@@ -0,0 +1,326 @@
+"""
+DUPLICATE PLANNER
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for planning the duplicate reads generated from
+each fragment, for a whole batch of fragments at once.
+
+Two kinds of duplicates are modelled:
+    
+    PCR duplicates
+            Copies of the same library molecule, produced during library
+            amplification. Each fragment is amplified into a family of copies,
+            whose size is drawn from a probability distribution. PCR errors are
+            introduced into the molecule once, and are therefore shared by every
+            copy in the family. Each copy forms its own cluster, anywhere on the
+            flowcell.
+    
+    Optical duplicates
+            Extra clusters formed from the same molecule as an existing cluster,
+            close to it on the same tile. (Such as through pad hopping on
+            patterned flowcells) The number of optical duplicates of each
+            cluster is geometrically distributed.
+
+Each planned copy has the tile, x, and y coordinates of its cluster, so they can
+be included in Illumina-style read names and used by duplicate marking tools.
+If the coordinates must identify each cluster uniquely, (as they do in
+CASAVA-style read names) they are derived from a running count of clusters
+instead, so that nothing needs to be remembered about previous clusters. The
+flowcell is divided into small square cells, and each cluster is given its own
+cell, by mapping the count onto the cells with a bijective mix. (A
+multiplication modulo the number of cells) The cluster is placed at a random
+spot within its cell, and its optical duplicates at other spots within the same
+cell. Once every cell of a lane has been used, the next lane is used. When a
+simulation is split into shards, each shard uses its own lanes, so that shards
+never share coordinates.
+
+The family sizes and cluster coordinates of a batch of fragments are sampled
+together, and handed out one fragment at a time. (Unique clusters are only
+placed as they are handed out, so only their family sizes are kept pending)
+The plans which have not been handed out yet can be saved in a checkpoint, so
+that a resumed run plans exactly the same duplicates.
+"""
+
+# Imported Modules #############################################################
+
+import random as Random
+
+from math import log
+
+
+
+# Configurations ###############################################################
+
+PLAN_BATCH = 10000 # Number of fragments planned at a time
+
+# Flowcell layout (HiSeq-style tile numbering)
+SURFACES = 2
+SWATHS = 3
+TILES_PER_SWATH = 16
+MAX_X = 30000
+MAX_Y = 30000
+
+# Unique cluster layout
+CELL_SIZE = 8 # Width of the cell of each cluster, in pixels
+CELLS_X = (MAX_X + 1) / CELL_SIZE
+CELLS_Y = (MAX_Y + 1) / CELL_SIZE
+MIX_MULTIPLIER = 2654435761 # A prime, and so coprime to the number of cells
+
+
+
+# Lists ########################################################################
+
+LIST__tiles = [(surface * 1000) + (swath * 100) + tile
+        for surface in range(1, SURFACES + 1)
+        for swath in range(1, SWATHS + 1)
+        for tile in range(1, TILES_PER_SWATH + 1)]
+
+
+
+# Dictionaries #################################################################
+
+DICT__substitutes = {"A": "CGT", "C": "AGT", "G": "ACT", "T": "ACG",
+        "a": "cgt", "c": "agt", "g": "act", "t": "acg"}
+
+
+
+# Classes ######################################################################
+
+class Duplicate_Planner:
+    """
+    Plans the PCR and optical duplicates of each fragment, in batches.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, sampler, duplicate_settings, duplicate_minmax,
+            optical_rate=0, optical_distance=0, coordinates=False,
+            pcr_error_rate=0, unique=False, shard=None):
+        """
+        Creates a Duplicate Planner object.
+        
+        @sampler
+                (function)
+                The function used to draw a single random family size, given the
+                values in [duplicate_settings] as arguments.
+        @duplicate_settings
+                ([int/float, int, *])
+                The mean, distribution method, and distribution parameter of the
+                family sizes. If the parameter is an Alias Table, family sizes
+                are drawn from it directly.
+        @duplicate_minmax
+                ([int, int])
+                The minimum and maximum family size.
+        @optical_rate
+                (float)
+                The probability of a cluster having an optical duplicate. (Or of
+                an optical duplicate having another optical duplicate)
+        @optical_distance
+                (int)
+                The maximum distance, in pixels along each axis, between a
+                cluster and its optical duplicates.
+        @coordinates
+                (bool)
+                Whether or not to plan cluster coordinates. Optical duplicates
+                require cluster coordinates.
+        @pcr_error_rate
+                (float)
+                The per-base probability of a PCR error, shared by every copy in
+                a family.
+        @unique
+                (bool)
+                Whether or not every cluster must have unique coordinates. If
+                so, each cluster also has a lane number, and optical duplicates
+                are kept within CELL_SIZE pixels of their original cluster.
+        @shard
+                ([int, int])
+                The shard number and the number of shards, if only one shard of
+                the simulation is being planned. Shard i of N uses lanes i,
+                i+N, i+2N, etc.
+        """
+        self.sampler = sampler
+        self.duplicate_settings = duplicate_settings
+        self.min_, self.max_ = duplicate_minmax
+        self.optical_rate = optical_rate
+        self.optical_distance = optical_distance
+        self.coordinates = coordinates or bool(optical_rate) or unique
+        self.pcr_error_rate = pcr_error_rate
+        self.unique = unique
+        self._plans = []
+        self._count = 0 # Number of unique clusters planned
+        self._cells = CELLS_X * CELLS_Y * len(LIST__tiles) # Per lane
+        self._lane, self._lanes = shard or [1, 1]
+    
+    
+    
+    # Planning Methods #########################################################
+    
+    def Next(self):
+        """
+        Return the plan for the next fragment: a list containing an entry for
+        each copy to be sequenced. Each entry is a list of the tile, x, and y
+        coordinates of its cluster, (preceded by the lane if clusters are
+        unique) or None if coordinates are not planned.
+        """
+        if not self._plans: self._Plan_Batch()
+        if self.unique: return self._Plan_Clusters__UNIQUE(self._plans.pop())
+        return self._plans.pop()
+    
+    def _Plan_Batch(self):
+        """
+        Plan the duplicates of the next batch of fragments.
+        """
+        # Family sizes
+        min_, max_ = self.min_, self.max_
+        if min_ == max_:
+            sizes = [min_] * PLAN_BATCH
+        else:
+            mean, dist, param = self.duplicate_settings
+            if hasattr(param, "Sample_Batch"): # Alias Table
+                sizes = param.Sample_Batch(PLAN_BATCH)
+            else:
+                sampler = self.sampler
+                sizes = [sampler(mean, dist, param)
+                        for i in xrange(PLAN_BATCH)]
+            sizes = [min(max(size, min_), max_) for size in sizes]
+        # Clusters
+        if not self.coordinates:
+            plans = [[None] * size for size in sizes]
+        elif self.unique:
+            plans = list(sizes) # Placed when handed out
+        else:
+            plans = [self._Plan_Clusters(size) for size in sizes]
+        plans.reverse() # Handed out from the end
+        self._plans = plans
+    
+    def _Plan_Clusters(self, size):
+        """
+        Return the cluster coordinates of a family of [size] copies, and any
+        optical duplicates of those clusters.
+        """
+        random = Random.random
+        randint = Random.randint
+        rate = self.optical_rate
+        distance = self.optical_distance
+        clusters = []
+        for i in xrange(size):
+            tile = Random.choice(LIST__tiles)
+            x = randint(0, MAX_X)
+            y = randint(0, MAX_Y)
+            clusters.append([tile, x, y])
+            while rate and random() < rate: # Optical duplicate
+                x = min(max(x + randint(-distance, distance), 0), MAX_X)
+                y = min(max(y + randint(-distance, distance), 0), MAX_Y)
+                clusters.append([tile, x, y])
+        return clusters
+    
+    def _Plan_Clusters__UNIQUE(self, size):
+        """
+        Return the lane, tile, x, and y coordinates of a family of [size]
+        copies, and any optical duplicates of those clusters, such that no two
+        clusters share the same coordinates.
+        
+        An optical duplicate is not generated if there are no free spots left
+        in the cell within the optical distance of its original cluster.
+        """
+        random = Random.random
+        randint = Random.randint
+        rate = self.optical_rate
+        clusters = []
+        for i in xrange(size):
+            lane, tile, x, y = self._Next_Cell()
+            cell = [[lane, tile, x + randint(0, CELL_SIZE - 1),
+                    y + randint(0, CELL_SIZE - 1)]]
+            while rate and random() < rate: # Optical duplicate
+                cluster = self._Draw_Optical__UNIQUE(cell, x, y)
+                if not cluster: break
+                cell.append(cluster)
+            clusters += cell
+        return clusters
+    
+    def _Next_Cell(self):
+        """
+        Return the lane, tile, and x and y coordinates of the corner, of the
+        cell of the next cluster.
+        """
+        i = self._count
+        self._count += 1
+        lane = self._lane + ((i / self._cells) * self._lanes)
+        cell = (i * MIX_MULTIPLIER) % self._cells
+        per_tile = CELLS_X * CELLS_Y
+        tile = LIST__tiles[cell / per_tile]
+        cell %= per_tile
+        return [lane, tile, (cell / CELLS_Y) * CELL_SIZE,
+                (cell % CELLS_Y) * CELL_SIZE]
+    
+    def _Draw_Optical__UNIQUE(self, cell, x, y):
+        """
+        Return the lane, tile, x, and y coordinates of an optical duplicate of
+        the last cluster in [cell], a list of the clusters in the cell whose
+        corner is at [x] and [y].
+        
+        Return None if there are no free spots in the cell within the optical
+        distance of that cluster.
+        """
+        lane, tile, x1, y1 = cell[-1]
+        distance = self.optical_distance
+        used = set([(cluster[2], cluster[3]) for cluster in cell])
+        spots = [(x2, y2)
+                for x2 in range(max(x, x1 - distance),
+                        min(x + CELL_SIZE, x1 + distance + 1))
+                for y2 in range(max(y, y1 - distance),
+                        min(y + CELL_SIZE, y1 + distance + 1))
+                if (x2, y2) not in used]
+        if not spots: return None
+        x2, y2 = Random.choice(spots)
+        return [lane, tile, x2, y2]
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Apply_PCR_Errors(self, seq):
+        """
+        Return [seq] with PCR errors introduced, to be shared by every copy in
+        its family. The positions of the errors are sampled directly, using
+        geometrically distributed gaps.
+        """
+        rate = self.pcr_error_rate
+        if not rate: return seq
+        if rate >= 1: log_q = None
+        else: log_q = log(1 - rate)
+        pieces = []
+        pos = 0
+        i = -1
+        while True:
+            if log_q: i += int(log(1 - Random.random()) / log_q) + 1
+            else: i += 1
+            if i >= len(seq): break
+            possible = DICT__substitutes.get(seq[i])
+            if not possible: continue
+            pieces.append(seq[pos:i])
+            pieces.append(Random.choice(possible))
+            pos = i + 1
+        if not pieces: return seq
+        pieces.append(seq[pos:])
+        return "".join(pieces)
+    
+    
+    
+    # Checkpoint Methods #######################################################
+    
+    def Get_State(self):
+        """
+        Return the plans which have not been handed out yet, and the number of
+        unique clusters planned, for recording in a checkpoint.
+        """
+        return [self._plans, self._count]
+    
+    def Set_State(self, state):
+        """
+        Restore the plans which had not been handed out yet, and the number of
+        unique clusters planned, from a checkpoint.
+        """
+        if not state: state = [[], 0]
+        self._plans, self._count = state
@@ -0,0 +1,102 @@
+"""
+GC BIAS
+(version 1.0)
+by Angelo Chan
+
+This module contains functions and a Class for simulating GC bias: the
+dependence of the depth of coverage on the GC content of each fragment, as seen
+in real sequencing libraries.
+
+A GC bias curve gives the relative depth of coverage of fragments at various GC
+contents. (As percentages) The curve is precompiled into a table of acceptance
+probabilities for every whole percentage, by linear interpolation. The density
+of candidate fragments is boosted by the highest value of the curve, and each
+candidate is then accepted or rejected according to its GC content. Values of
+the curve above 1 therefore boost coverage, and values below 1 thin it.
+
+The GC bias curve file is a tab-separated file with two columns: a GC content
+percentage, (0 to 100) and the relative depth of coverage at that GC content.
+Lines starting with "#" are ignored.
+
+The GC content of a fragment is found in constant time, from the difference
+between the cumulative GC counts at its two ends. (Prefix sums) For packed
+sequences, these are provided by the composition index of the chromosome. (See
+Composition_Index.py) For sequences read one base at a time, the cumulative GC
+count is kept as each base is read.
+"""
+
+# Strings ######################################################################
+
+STR__comment = "#"
+
+STR__GC_bases = "GCgc"
+
+
+
+# Functions ####################################################################
+
+def Load_GC_Bias(file_path):
+    """
+    Return a GC Bias object for the GC bias curve file at [file_path].
+    
+    Return None if the file could not be read, or contains no positive values.
+    
+    Load_GC_Bias(str) -> GC_Bias/None
+    """
+    points = []
+    try:
+        f = open(file_path, "U")
+        for line in f:
+            if not line.strip() or line.startswith(STR__comment): continue
+            columns = line.split("\t")
+            gc = float(columns[0])
+            weight = float(columns[1])
+            if gc < 0 or gc > 100 or weight < 0:
+                f.close()
+                return None
+            points.append([gc, weight])
+        f.close()
+    except:
+        return None
+    if not [1 for point in points if point[1] > 0]: return None
+    return GC_Bias(points)
+
+
+
+# Classes ######################################################################
+
+class GC_Bias:
+    """
+    A precompiled GC bias curve, giving the probability of accepting a fragment
+    given its GC content.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, points):
+        """
+        Creates a GC Bias object from [points], a list of [GC percentage,
+        relative depth of coverage] pairs.
+        """
+        points = sorted(points)
+        table = []
+        j = 0
+        for percent in range(101):
+            while j < len(points) - 1 and points[j+1][0] < percent: j += 1
+            if percent <= points[0][0]: weight = points[0][1]
+            elif percent >= points[-1][0]: weight = points[-1][1]
+            else:
+                x1, y1 = points[j]
+                x2, y2 = points[j+1]
+                weight = y1 + (y2 - y1) * (percent - x1) / (x2 - x1)
+            table.append(weight)
+        self.boost = max(table)
+        self._probabilities = [weight / self.boost for weight in table]
+    
+    def Get_Probability(self, gc, length):
+        """
+        Return the probability of accepting a fragment of [length] bases, [gc]
+        of which are G or C.
+        """
+        if length < 1: return self._probabilities[0]
+        return self._probabilities[((200 * gc) + length) / (2 * length)]
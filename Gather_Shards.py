@@ -0,0 +1,427 @@
+HELP_DOC = """
+GATHER SHARDS
+(version 1.0)
+by Angelo Chan
+
+This is a program for gathering together the outputs of a simulation which was
+split into "shards", using the --shard option of Generate_Fragments.py or
+Generate_Reads.py.
+
+Each shard outputs a summary file alongside its first output file. Given the
+summary files of every shard, the output files of the shards are concatenated,
+in shard order, into output files with the shard tag removed from their
+filepaths. The metrics of the shards are also combined and reported, as if the
+simulation had been run as a single job.
+
+Compressed outputs remain valid BGZF files, and binary truth files remain valid
+binary truth files.
+
+
+
+USAGE:
+    
+    python27 Gather_Shards.py <summary_file>... [-r Y|N]
+
+
+
+MANDATORY:
+    
+    summary_file
+        
+        The filepaths of the shard summary files, one for each shard.
+
+OPTIONAL:
+    
+    remove
+        (-r)
+        
+        (DEFAULT: N)
+        
+        Whether or not to delete the output files and summary files of the
+        shards once they have been gathered.
+
+
+
+EXAMPLES SCENARIO EXPLANATION:
+    
+    1:
+    Gather the reads of a simulation which was split into 3 shards.
+    
+    2:
+    Gather the fragments of a simulation which was split into 2 shards, and
+    delete the shards afterwards.
+
+EXAMPLES:
+    
+    python27 Gather_Shards.py Path/Frags__READS_r1__SHARD_1of3.fq__SHARD.json
+            Path/Frags__READS_r1__SHARD_2of3.fq__SHARD.json
+            Path/Frags__READS_r1__SHARD_3of3.fq__SHARD.json
+    
+    python27 Gather_Shards.py Path/Genome__FRAGS__SHARD_1of2.fa__SHARD.json
+            Path/Genome__FRAGS__SHARD_2of2.fa__SHARD.json -r Y
+
+USAGE:
+    
+    python27 Gather_Shards.py <summary_file>... [-r Y|N]
+"""
+
+NAME = "Gather_Shards.py"
+
+
+
+# Configurations ###############################################################
+
+AUTORUN = True
+
+WRITE_PREVENT = False # Completely prevent overwritting existing files
+WRITE_CONFIRM = True # Check to confirm overwritting existing files
+
+PRINT_ERRORS = True
+PRINT_PROGRESS = True
+PRINT_METRICS = True
+
+
+
+# Minor Configurations #########################################################
+
+COPY_BUFFER = 4194304 # Number of bytes copied at a time
+
+
+
+# Defaults #####################################################################
+"NOTE: altering these will not alter the values displayed in the HELP DOC"
+
+DEFAULT__remove = False
+
+
+
+# Imported Modules #############################################################
+
+import sys
+import os
+
+
+
+import _Controlled_Print as PRINT
+from _Command_Line_Parser import *
+
+from Shards import *
+from Gzip_File_Writer import *
+from Truth_File import *
+
+import Generate_Fragments as GF
+import Generate_Reads as GR
+
+
+
+# Strings ######################################################################
+
+STR__use_help = "\nUse the -h option for help:\n\t python "\
+"Gather_Shards.py -h"
+
+
+
+STR__invalid_summary = """
+ERROR: Invalid shard summary file: {f}"""
+
+STR__shards_mismatch = """
+ERROR: The shard summary files do not belong to the same simulation.
+Please specify the summary files of a single run, split into shards."""
+
+STR__shards_incomplete = """
+ERROR: The shard summary files are incomplete.
+Please specify the summary file of every shard exactly once."""
+
+STR__shards_unknown = """
+ERROR: Unrecognized program in shard summary files: {s}"""
+
+STR__input_invalid = "\nERROR: An unexpected error occured when reading from "\
+        "the shard output files."
+STR__output_invalid = "\nERROR: An unexpected error occured when writing to "\
+        "the output files."
+
+
+
+STR__Gather_begin = "\nRunning Gather_Shards..."
+
+STR__Gather_complete = "\nGather_Shards successfully finished."
+
+
+
+# Lists ########################################################################
+
+LIST__tools = [GF.NAME, GR.NAME]
+
+
+
+# Apply Globals ################################################################
+
+PRINT.PRINT_ERRORS = PRINT_ERRORS
+PRINT.PRINT_PROGRESS = PRINT_PROGRESS
+PRINT.PRINT_METRICS = PRINT_METRICS
+
+
+
+# Functions ####################################################################
+
+def Gather_Shards(summaries, paths_out, remove=False):
+    """
+    Concatenate the output files of every shard of a simulation, and report the
+    combined metrics.
+    
+    @summaries
+            (list<dict>)
+            The shard summaries, as read from the shard summary files, in shard
+            order.
+    @paths_out
+            (list<str - filepath>)
+            The filepaths of the gathered output files, one for each of the
+            outputs listed in the shard summaries. Empty strings indicate
+            outputs which were not produced.
+    @remove
+            (bool)
+            Whether or not to delete the output files of the shards once they
+            have been gathered.
+    
+    Return a value of 0 if the function runs successfully.
+    Return a value of 1 if there is a problem with the shard output files.
+    Return a value of 2 if there is a problem with the output files.
+    
+    Gather_Shards(list<dict>, list<str>, bool) -> int
+    """
+    PRINT.printP(STR__Gather_begin)
+    # Main loop
+    for i in range(len(paths_out)):
+        if not paths_out[i]: continue
+        try:
+            o = open(paths_out[i], "wb")
+        except:
+            return 2
+        for summary in summaries:
+            last = (summary is summaries[-1])
+            first = (summary is summaries[0])
+            try:
+                Copy_Shard(summary["outputs"][i], o, first, last)
+            except:
+                o.close()
+                return 1
+        o.close()
+    # Remove shards
+    if remove:
+        for summary in summaries:
+            for path in summary["outputs"]:
+                if path: os.remove(path)
+    PRINT.printP(STR__Gather_complete)
+    # Reporting
+    if summaries[0]["tool"] == GF.NAME:
+        outcomes = []
+        for summary in summaries: outcomes += summary["metrics"]
+        GF.Report_Metrics(outcomes)
+    else:
+        totals = [0] * len(summaries[0]["metrics"])
+        for summary in summaries:
+            for j in range(len(totals)): totals[j] += summary["metrics"][j]
+        GR.Report_Metrics(*totals)
+    # Wrap up
+    return 0
+
+
+
+def Copy_Shard(path_in, output, first, last):
+    """
+    Append the contents of the shard output file at [path_in] to [output].
+    
+    The signature of binary truth files is only kept for the [first] shard, and
+    the BGZF end-of-file marker of compressed files is only kept for the [last]
+    shard, so that the gathered file is a valid file of the same type.
+    
+    Raise an IOError if the file cannot be read.
+    
+    Copy_Shard(str, file, bool, bool) -> None
+    """
+    size = os.path.getsize(path_in)
+    f = open(path_in, "rb")
+    start = 0
+    if not first and f.read(len(TRUTH_SIGNATURE)) == TRUTH_SIGNATURE:
+        start = len(TRUTH_SIGNATURE)
+    if not last and size >= len(STR__BGZF_EOF):
+        f.seek(size - len(STR__BGZF_EOF))
+        if f.read() == STR__BGZF_EOF: size -= len(STR__BGZF_EOF)
+    f.seek(start)
+    remaining = size - start
+    while remaining > 0:
+        data = f.read(min(remaining, COPY_BUFFER))
+        if not data: break
+        output.write(data)
+        remaining -= len(data)
+    f.close()
+
+def Validate_Summaries(summaries):
+    """
+    Sort the shard summaries into shard order, and validate that they comprise
+    every shard of a single simulation.
+    
+    Return 0 if the summaries are valid.
+    Return 1 if the summaries do not belong to the same simulation.
+    Return 2 if any shards are missing or duplicated.
+    Return 3 if the summaries were produced by an unrecognized program.
+    
+    Validate_Summaries(list<dict>) -> int
+    """
+    summaries.sort(key = lambda summary: summary["shard"])
+    tool = summaries[0]["tool"]
+    shards = summaries[0]["shards"]
+    for summary in summaries:
+        if summary["tool"] != tool or summary["shards"] != shards: return 1
+        if len(summary["outputs"]) != len(summaries[0]["outputs"]): return 1
+    if [summary["shard"] for summary in summaries] != range(1, shards + 1):
+        return 2
+    if tool not in LIST__tools: return 3
+    return 0
+
+
+
+# Command Line Parsing #########################################################
+
+def Parse_Command_Line_Input__Gather_Shards(raw_command_line_input):
+    """
+    Parse the command line input and call the Gather_Shards function with
+    appropriate arguments if the command line input is valid.
+    """
+    PRINT.printP(STR__parsing_args)
+    # Remove the runtime environment variable and program name from the inputs
+    inputs = Strip_Non_Inputs(raw_command_line_input, NAME)
+    
+    # No inputs
+    if not inputs:
+        PRINT.printE(STR__no_inputs)
+        PRINT.printE(STR__use_help)
+        return 1
+    
+    # Help option
+    if inputs[0] in LIST__help:
+        print(HELP_DOC)
+        return 0
+    
+    # Set up rest of the parsing
+    paths_in = []
+    remove = DEFAULT__remove
+    
+    # Validate inputs
+    while inputs:
+        arg = inputs.pop(0)
+        if arg == "-r": # Remove
+            try:
+                arg2 = inputs.pop(0)
+            except:
+                PRINT.printE(STR__insufficient_inputs)
+                PRINT.printE(STR__use_help)
+                return 1
+            remove = Validate_Bool(arg2)
+            if remove == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg.startswith("-"): # Invalid
+            arg = Strip_X(arg)
+            PRINT.printE(STR__invalid_argument.format(s = arg))
+            PRINT.printE(STR__use_help)
+            return 1
+        else: # Summary file
+            paths_in.append(arg)
+    if not paths_in:
+        PRINT.printE(STR__insufficient_inputs)
+        PRINT.printE(STR__use_help)
+        return 1
+    
+    # Validate summary files
+    summaries = []
+    for path_in in paths_in:
+        summary = Read_Shard_Summary(path_in)
+        if not summary:
+            PRINT.printE(STR__invalid_summary.format(f = path_in))
+            return 1
+        summaries.append(summary)
+    valid = Validate_Summaries(summaries)
+    if valid == 1:
+        PRINT.printE(STR__shards_mismatch)
+        return 1
+    if valid == 2:
+        PRINT.printE(STR__shards_incomplete)
+        return 1
+    if valid == 3:
+        PRINT.printE(STR__shards_unknown.format(s = summaries[0]["tool"]))
+        return 1
+    
+    # Validate output paths
+    shards = summaries[0]["shards"]
+    paths_out = []
+    for path in summaries[0]["outputs"]:
+        if path: path = Remove_Shard_Tag(path, 1, shards)
+        paths_out.append(path)
+        if not path: continue
+        valid_out = Validate_Write_Path(path)
+        if valid_out == 2: return 0
+        if valid_out == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
+    
+    # Run program
+    exit_state = Gather_Shards(summaries, paths_out, remove)
+    
+    # Remove summary files
+    if exit_state == 0 and remove:
+        for path_in in paths_in: os.remove(path_in)
+    
+    # Exit
+    if exit_state == 0: return 0
+    else:
+        if exit_state == 1: PRINT.printE(STR__input_invalid)
+        if exit_state == 2: PRINT.printE(STR__output_invalid)
+        PRINT.printE(STR__use_help)
+        return 1
+
+def Validate_Write_Path(filepath):
+    """
+    Validates the filepath of the output file.
+    Return 0 if the filepath is writtable.
+    Return 1 if the user decides to overwrite an existing file.
+    Return 2 if the user declines to overwrite an existing file.
+    Return 3 if the file exists and the program is set to forbid overwriting.
+    Return 4 if the program is unable to write to the filepath specified.
+    
+    Validate_Write_Path(str) -> int
+    """
+    try:
+        f = open(filepath, "U")
+        f.close()
+    except: # File does not exist.
+        try:
+            f = open(filepath, "w")
+            f.close()
+            return 0 # File does not exist and it is possible to write
+        except:
+            return 4 # File does not exist but it is not possible to write
+    # File exists
+    if WRITE_PREVENT: return 3
+    if WRITE_CONFIRM:
+        confirm = raw_input(STR__overwrite_confirm.format(f = filepath))
+        if confirm not in LIST__yes: return 2
+    # User is not prevented from overwritting and may have chosen to overwrite
+    try:
+        f = open(filepath, "w")
+        f.close()
+        if WRITE_CONFIRM: return 1 # User has chosen to overwrite existing file
+        return 0 # Overwriting existing file is possible
+    except:
+        return 4 # Unable to write to specified filepath
+
+
+
+# Main Loop ####################################################################
+
+if AUTORUN and (__name__ == "__main__"):
+    exit_code = Parse_Command_Line_Input__Gather_Shards(sys.argv)
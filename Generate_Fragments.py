@@ -14,6 +14,23 @@ sequencing process.
 The expected input is a folder containing one or more FASTA files. The fragments
 will be output into a single FASTA file.
 
+Packed ".2bit" files may be used instead of FASTA files. These are not read one
+nucleotide at a time. Instead, the program jumps directly from one fragment
+location to the next, and each fragment's sequence is sliced directly out of the
+packed file. The fragments generated are identical to those which would be
+generated from the equivalent FASTA file.
+
+Alternatively, instead of a FASTA file of fragment sequences, a table of
+fragment coordinates can be output. The Read Generator can generate reads from
+this table and the original genome, without the fragment sequences ever needing
+to be written out.
+
+Fragments can also be restricted to a set of target regions, such as those of
+an exome or other capture panel, with some off-target fragments if desired.
+When packed ".2bit" files are used, the program jumps directly from one target
+region to the next, so the run time depends on the size of the panel rather
+than the size of the genome.
+
 
 
 BACKGROUND INFO:
@@ -58,18 +75,36 @@ distribution specified. However, as long as the average distance is relatively
 small compared to fragment sizes, the coverage at a nucleotide level will
 generally amortize to around the average.
 
-A proper implementation of the "islands and deserts" kind of distribution will
-likely require, at the very least, a two-layered probability generation model.
+A proper implementation of the "islands and deserts" kind of distribution
+requires a two-layered probability generation model. This is available using
+the "--islands" option. The genome is divided into windows, and each window is
+given a random coverage multiplier. The distances between fragment midpoints
+are then scaled by the multipliers, so fragments are densely packed within
+islands and sparse within deserts. The multipliers can be exported as a
+bedGraph file, to compare against the coverage of the reads.
+
+The GC bias of real sequencing libraries can also be simulated using the
+"--gc-bias" option, alongside any of the above. Fragments are generated at a
+higher density, and then each fragment is kept or discarded according to its GC
+content, so the depth of coverage of each fragment follows the GC bias curve
+specified.
 
 
 
 USAGE:
     
     python27 Generate_Fragments.py <input_folder> [-o <output_filepath] [-d
-            <depth_of_coverage>] [-c N|G|U <stdev>|<alpha_mod>|<max_dist>] [-r
-            <read_length>] [-l <avg_frag_len>] [-f N|G|U
-            <stdev>|<alpha_mod>|<max_dist>] [-m <method> [method_sup]...]
-            [-u <unique_id_mod>]
+            <depth_of_coverage>] [-c N|G|U|E
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>] [-r <read_length>]
+            [-l <avg_frag_len>] [-f N|G|U|E
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>] [-m <method>
+            [method_sup]...] [-u <unique_id_mod>] [-t Y|N] [--metrics
+            <metrics_filepath>] [--profile [<pstats_filepath>]] [--checkpoint
+            Y|N] [--resume] [--shard <shard>/<shards>] [--targets
+            <bed_filepath>] [--padding <padding>] [--off-target
+            <off_target_rate>] [--islands <window_size> <variability>]
+            [--smoothing <smoothing>] [--bedgraph <bedgraph_filepath>]
+            [--gc-bias <gc_curve_filepath>]
 
 
 
@@ -78,7 +113,8 @@ MANDATORY:
     input_folder
         
         The filepath of the input folder containing the FASTA file(s) from
-        which the DNA fragments will be generated.
+        which the DNA fragments will be generated. Packed ".2bit" files may be
+        used instead of FASTA files.
 
 OPTIONAL:
     
@@ -87,7 +123,7 @@ OPTIONAL:
         (DEFAULT path generation available)
         
         The filepath of the output file where resultant FASTA file will be
-        output into.
+        output into. (Or the fragment coordinates table, if "-t Y" is used)
     
     depth_of_coverage
         
@@ -124,6 +160,7 @@ OPTIONAL:
             N   Normal variate distribution
             G   Gama variate distribution
             U   Uniform distribution
+            E   Empirical distribution, from a histogram file
     
     stdev
         
@@ -175,6 +212,19 @@ OPTIONAL:
         the fragments are to follow a uniform distribution with a @max_dist of
         50, then all fragment lengths will be between 450 and 550 in length.
     
+    histogram_file
+        
+        (Only applies if an Empirical distribution was specified)
+        
+        The filepath of a histogram file, from which random values are drawn.
+        A histogram file is a tab-separated file with two columns: a value, and
+        its weight. (A count or relative probability) Lines starting with "#"
+        are ignored.
+        
+        For fragment lengths, this allows the insert size histogram of a real
+        sequencing run to be used. The average fragment length is not used. For
+        coverage, the values are the distances between consecutive fragments.
+    
     (-c)
         
         Used to signify that the following parameters pertain to the probability
@@ -213,6 +263,158 @@ OPTIONAL:
         A string prefix which forms part of the fragment ID. Allows fragments
         from different runs to be pooled together and still have unique IDs
         relative to each other.
+    
+    Y|N
+        (-t)
+        
+        (DEFAULT: N)
+        
+        Whether or not to output a table of fragment coordinates instead of a
+        FASTA file of fragment sequences. The table is a TSV file with the
+        following columns:
+            
+            1) Chromosome name
+            2) Start (The first nucleotide of the fragment sequence)
+            3) End (The last nucleotide of the fragment sequence)
+            4) Directionality (+/-)
+            5) Fragment name
+    
+    metrics_filepath
+        (--metrics)
+        
+        (DEFAULT: (None))
+        
+        Progress is reported to stderr periodically during long runs, giving the
+        number of bases processed and fragments generated so far, the current
+        chromosome, the throughput, and the estimated time remaining. If a
+        metrics filepath is specified, each progress report is also written to
+        that file as a single line of JSON.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent reading the genome, sampling,
+        backtracking, assembling strings, and writing once the run is complete.
+        If a filepath is specified after the flag, the run is also profiled
+        using cProfile, and the statistics are saved to said file. (They can be
+        examined using the pstats module)
+    
+    Y|N
+        (--checkpoint)
+        
+        (DEFAULT: N)
+        
+        Whether or not to write a checkpoint after each input file has been
+        processed. A checkpoint records how far the run has progressed, so that
+        an interrupted run can be resumed without starting over. Checkpoints are
+        written to a file alongside @output_filepath, which is deleted once the
+        run finishes.
+    
+    --resume
+        
+        Resume an interrupted run from its last checkpoint. The same arguments
+        as the original run must be used. Output written after the last
+        checkpoint is discarded and generated again.
+    
+    shard/shards
+        (--shard)
+        
+        (DEFAULT: 1/1)
+        
+        Only generate the fragments for one "shard" of the genome, so that a
+        single simulation can be split across multiple machines. The input files
+        (chromosomes) are divided between the shards, largest first, so that
+        each shard has a similar total template size. Shard numbers start at 1.
+        
+        The shard number is inserted into the filepaths of the output files, and
+        into the fragment IDs, so the same arguments can be used for every
+        shard. Each shard also outputs a summary file, which can be used to
+        gather the shards together using Gather_Shards.py.
+    
+    bed_filepath
+        (--targets)
+        
+        (DEFAULT: (None))
+        
+        The filepath of a BED file of target regions, such as the baits of a
+        capture panel. If specified, fragment midpoints are only placed within
+        the target regions, (after padding) at the specified depth of coverage,
+        and at a reduced density elsewhere. The chromosome names in the BED
+        file must match those of the genome.
+    
+    padding
+        (--padding)
+        
+        (DEFAULT: 0)
+        
+        The number of bases added to each side of every target region.
+    
+    off_target_rate
+        (--off-target)
+        
+        (DEFAULT: 0)
+        
+        The density of fragments outside of the target regions, relative to the
+        density of fragments within them. Specify 0 to generate no off-target
+        fragments at all, or a small value, such as 0.05, to simulate the
+        imperfect specificity of a real capture.
+    
+    window_size
+        (--islands)
+        
+        (DEFAULT: (None))
+        
+        The size of the windows of the "islands and deserts" coverage model, in
+        bases. If specified, each window is given a random coverage multiplier,
+        drawn from a gamma distribution with a mean of 1, and the density of
+        fragments within each window is scaled by its multiplier. Cannot be
+        used alongside target regions.
+    
+    variability
+        (--islands)
+        
+        (DEFAULT: (None))
+        
+        The coefficient of variation (the standard deviation divided by the
+        mean) of the coverage multipliers. A value of 0 results in uniform
+        coverage, while values above 1 result in a large proportion of the
+        genome being left in deep deserts.
+    
+    smoothing
+        (--smoothing)
+        
+        (DEFAULT: 1)
+        
+        The number of neighbouring windows over which the coverage multipliers
+        are averaged, so that coverage changes gradually between islands and
+        deserts instead of abruptly. Specify 1 for piecewise-constant coverage.
+    
+    bedgraph_filepath
+        (--bedgraph)
+        
+        (DEFAULT: (None))
+        
+        The filepath of a bedGraph file, to which the coverage multiplier of
+        every window is written, for verification.
+    
+    gc_curve_filepath
+        (--gc-bias)
+        
+        (DEFAULT: (None))
+        
+        The filepath of a GC bias curve file: a tab-separated file with two
+        columns, a GC content percentage (0 to 100) and the relative depth of
+        coverage of fragments with that GC content. Lines starting with "#" are
+        ignored. The curve is linearly interpolated between the values given.
+        The depth of coverage is scaled by the highest value of the curve, (if
+        the distances between fragments are drawn from an empirical
+        distribution, these distances are divided by it instead) and each
+        fragment is then kept with a probability proportional to the value of
+        the curve at its GC content. For packed input files, the GC content of
+        each fragment is found using the composition index of its chromosome,
+        (a ".comp" file alongside the packed file) which is built if it does
+        not exist.
 
 
 
@@ -255,6 +457,23 @@ EXAMPLES SCENARIO EXPLANATION:
     is specified as 800, and the distribution of fragment sizes is specified as
     a normal distribution with a standard deviation of 0. The depth of coverage
     was also increased.
+    
+    8:
+    Output the coordinates of the fragments instead of their sequences. Reads
+    can then be generated using Generate_Reads.py with the "-g" option.
+    
+    9:
+    Simulate an exome capture, with the target regions padded by 100bp, and
+    with off-target regions covered at 5% of the depth of the target regions.
+    
+    10:
+    Simulate islands and deserts of coverage, in 50kb windows, with the coverage
+    changing gradually over 5 windows. The coverage multipliers are exported
+    for verification.
+    
+    11:
+    Simulate a library with GC bias, in which fragments with a high or low GC
+    content are underrepresented, according to the curve in the file specified.
 
 EXAMPLES:
     
@@ -273,14 +492,31 @@ EXAMPLES:
     python27 Generate_Fragments.py Path/GenomeFolder -l 550 -f U 50
     
     python27 Generate_Fragments.py Path/GenomeFolder -l 800 -f N 0 -d 20
+    
+    python27 Generate_Fragments.py Path/GenomeFolder -t Y
+    
+    python27 Generate_Fragments.py Path/GenomeFolder --targets Path/Exome.bed
+            --padding 100 --off-target 0.05
+    
+    python27 Generate_Fragments.py Path/GenomeFolder --islands 50000 0.8
+            --smoothing 5 --bedgraph Path/Coverage.bedGraph
+    
+    python27 Generate_Fragments.py Path/GenomeFolder --gc-bias Path/GC_Curve.tsv
 
 USAGE:
     
     python27 Generate_Fragments.py <input_folder> [-o <output_filepath] [-d
-            <depth_of_coverage>] [-c N|G|U <stdev>|<alpha_mod>|<max_dist>] [-r
-            <read_length>] [-l <avg_frag_len>] [-f N|G|U
-            <stdev>|<alpha_mod>|<max_dist>] [-m <method> [method_sup]...]
-            [-u <unique_id_mod>]
+            <depth_of_coverage>] [-c N|G|U|E
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>] [-r <read_length>]
+            [-l <avg_frag_len>] [-f N|G|U|E
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>] [-m <method>
+            [method_sup]...] [-u <unique_id_mod>] [-t Y|N] [--metrics
+            <metrics_filepath>] [--profile [<pstats_filepath>]] [--checkpoint
+            Y|N] [--resume] [--shard <shard>/<shards>] [--targets
+            <bed_filepath>] [--padding <padding>] [--off-target
+            <off_target_rate>] [--islands <window_size> <variability>]
+            [--smoothing <smoothing>] [--bedgraph <bedgraph_filepath>]
+            [--gc-bias <gc_curve_filepath>]
 """
 
 NAME = "Generate_Fragments.py"
@@ -303,12 +539,17 @@ PRINT_METRICS = True
 # Minor Configurations #########################################################
 
 FILEMOD__FASTA = "__FRAGMENTS.fa"
+FILEMOD__TSV = "__FRAGMENTS.tsv"
+
+PRINT_INTERVAL = 1000000 # Number of bases between progress checks
 
 # For name string
 DEFAULT__STR__unique_id_mod = ""
+STR__shard_id = "S{i}_" # Added to the unique ID of each shard
 ID_SIZE = 15
 STR__forward = "F"
 STR__reverse = "R"
+STR__name = "%s%0" + str(ID_SIZE) + "d__%s_%s_%s" # Precompiled template
 
 
 
@@ -324,6 +565,11 @@ DEFAULT__cov_num = 1
 DEFAULT__frag_dist = 1 # DIST.NORMAL = 1. Alter this if the DIST enum is altered
 DEFAULT__frag_num = 50
 DEFAULT__method = 1
+DEFAULT__coords = False
+DEFAULT__checkpoint = False
+DEFAULT__padding = 0
+DEFAULT__off_target = 0
+DEFAULT__smoothing = 1
 
 
 
@@ -334,15 +580,29 @@ import os
 
 import random as Random
 
+from heapq import heappush, heappop
+
 
 
 import _Controlled_Print as PRINT
+import Profiler as PROFILE
 from NSeq_Match import *
+from Reverse_Complement import *
 from _Command_Line_Parser import *
 from Deque import *
 
 from Chr_FASTA_File_Reader import *
 
+from Packed_Genome import *
+from Progress import *
+from Checkpoint import *
+from Shards import *
+from Alias_Table import *
+from Target_Regions import *
+from Coverage_Map import *
+from GC_Bias import *
+from Composition_Index import *
+
 
 
 # Enums ########################################################################
@@ -351,6 +611,7 @@ class DIST: # For Distribution
     NORMAL=1 # If this is changed, sync relevant defaults
     GAMMA=2
     UNIFORM=3
+    EMPIRICAL=4
 
 class METHOD:
     ALL=1
@@ -386,11 +647,13 @@ For the distribution model, please specify one of:
     NORMAL
     GAMMA
     UNIFORM
+    EMPIRICAL
 
 For the parameter, depending on the distribution model chosen, please specify:
     NORMAL - A non-negative number.
     GAMMA - A non-zero number.
-    UNIFORM - (Unnecessary)"""
+    UNIFORM - (Unnecessary)
+    EMPIRICAL - The filepath of a valid histogram file."""
 
 STR__invalid_frag_param = """
 ERROR: Invalid fragment length parameters:
@@ -401,11 +664,13 @@ For the distribution model, please specify one of:
     NORMAL
     GAMMA
     UNIFORM
+    EMPIRICAL
 
 For the parameter, depending on the distribution model chosen, please specify:
     NORMAL - A non-negative number.
     GAMMA - A non-zero number.
-    UNIFORM - A non-negative integer."""
+    UNIFORM - A non-negative integer.
+    EMPIRICAL - The filepath of a valid histogram file."""
 
 STR__invalid_read_len = """
 ERROR: Invalid read length: {s}
@@ -415,6 +680,34 @@ STR__invalid_frag_len = """
 ERROR: Invalid fragment length: {s}
 Please specify a positive integer."""
 
+STR__invalid_shard = """
+ERROR: Invalid shard specified: {s}
+Please specify the shard number and the number of shards, in the format "i/N".
+The shard number must be between 1 and N."""
+
+STR__invalid_padding = """
+ERROR: Invalid target region padding: {s}
+Please specify a non-negative integer."""
+
+STR__invalid_off_target = """
+ERROR: Invalid off-target rate: {s}
+Please specify a number between 0 and 1."""
+
+STR__invalid_islands = """
+ERROR: Invalid islands and deserts settings:
+    (Window size): {s1}
+    (Variability): {s2}
+Please specify a positive integer for the window size, and a non-negative
+number for the variability."""
+
+STR__invalid_smoothing = """
+ERROR: Invalid number of windows to smooth over: {s}
+Please specify a positive integer."""
+
+STR__islands_targets = """
+ERROR: The islands and deserts coverage model cannot be used alongside target
+regions."""
+
 STR__invalid_method = """
 ERROR: Invalid fragmentation method: {s}
 Please specify one of:
@@ -429,6 +722,12 @@ STR__output_invalid = "\nERROR: An unexpected error occured when writing to "\
         "the output file."
 STR__generation_invalid = "\nERROR: An unexpected error occured during the "\
         "fragment generation process."
+STR__checkpoint_invalid = "\nERROR: No checkpoint matching these arguments "\
+        "was found to resume from."
+STR__targets_invalid = "\nERROR: The target regions file could not be read, "\
+        "or contains no valid regions."
+STR__gc_bias_invalid = "\nERROR: The GC bias curve file could not be read, or "\
+        "contains no valid values."
 
 
 
@@ -462,6 +761,8 @@ non-negative number."""]
 LIST__normal = ["N", "n", "NORMAL", "Normal", "normal", "NORM", "Norm", "norm"]
 LIST__gamma = ["G", "g", "GAMMA", "Gamma", "gamma"]
 LIST__uniform = ["U", "u", "UNIFORM", "Uniform", "uniform", "UNI", "Uni", "uni"]
+LIST__empirical = ["E", "e", "EMPIRICAL", "Empirical", "empirical", "EMP",
+        "Emp", "emp"]
 
 
 
@@ -471,6 +772,7 @@ DICT__dists = {}
 for i in LIST__normal: DICT__dists[i] = DIST.NORMAL
 for i in LIST__gamma: DICT__dists[i] = DIST.GAMMA
 for i in LIST__uniform: DICT__dists[i] = DIST.UNIFORM
+for i in LIST__empirical: DICT__dists[i] = DIST.EMPIRICAL
 
 DICT__methods = {}
 for i in LIST__all: DICT__methods[i] = METHOD.ALL
@@ -488,7 +790,10 @@ PRINT.PRINT_METRICS = PRINT_METRICS
 # Functions ####################################################################
 
 def Generate_Fragments(path_in, path_out, depth_settings, read_len,
-            frag_settings, method_settings, unique_id_mod):
+            frag_settings, method_settings, unique_id_mod, coords=False,
+            metrics_path="", checkpoint=False, resume=False, shard=None,
+            target_settings=None, island_settings=None, bedgraph_path="",
+            gc_bias_path=""):
     """
     Generate a series of DNA fragments from the DNA templates in a folder of
     FASTA files.
@@ -496,7 +801,8 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
     @path_in
             (str - dirpath)
             The filepath of the folder containing the FASTA file(s) containing
-            the original DNA templates which the fragments are based on.
+            the original DNA templates which the fragments are based on. Packed
+            ".2bit" files may be used instead of FASTA files.
     @path_out
             (str - filepath)
             The file to which the output is written.
@@ -514,6 +820,7 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
                         0: Normal distribution
                         1: Gamma distribution
                         2: Uniform distribution
+                        3: Empirical distribution
                 3)  (float)
                     The paramter variable to use for the statistical
                     distribution specified by the second variable in this list.
@@ -531,6 +838,8 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
                             This variable is the difference between the mean of
                             the distribution, and either the upper or lower
                             limits of the distribution range.
+                        EMPIRICAL DISTRIBUTION:
+                            This variable is the filepath of a histogram file.
     @read_len
             (int)
             The intended total length of the reads which will be generated by
@@ -549,6 +858,7 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
                         0: Normal distribution
                         1: Gamma distribution
                         2: Uniform distribution
+                        3: Empirical distribution
                 3)  (float)
                     The paramter variable to use for the statistical
                     distribution specified by the second variable in this list.
@@ -565,6 +875,8 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
                             This variable is the difference between the mean of
                             the distribution, and either the upper or lower
                             limits of the distribution range.
+                        EMPIRICAL DISTRIBUTION:
+                            This variable is the filepath of a histogram file.
     @method_settings
             ([int, *...])
             The "method for determining fragment starts and ends" settings.
@@ -581,6 +893,49 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
             A string prefix which forms part of the fragment ID. Allows
             fragments from different runs to be pooled together and still have
             unique IDs relative to each other.
+    @coords
+            (bool)
+            Whether or not to output a table of fragment coordinates instead of
+            a FASTA file of fragment sequences.
+    @metrics_path
+            (str - filepath)
+            The filepath of the file to which progress reports are written, as
+            JSON lines. Progress reports are only written to stderr if this is
+            an empty string.
+    @checkpoint
+            (bool)
+            Whether or not to write a checkpoint after each input file has been
+            processed.
+    @resume
+            (bool)
+            Whether or not to resume an interrupted run from its last
+            checkpoint.
+    @shard
+            ([int, int])
+            The shard number and the number of shards, if only one shard of the
+            genome is to be processed. A shard summary file is also written.
+    @target_settings
+            ([str, int, float])
+            The filepath of a BED file of target regions, the padding added to
+            each side of every target region, and the density of off-target
+            fragments relative to on-target fragments. If specified, fragments
+            are only generated within the target regions, (and at a reduced
+            density outside of them) instead of across the whole genome.
+    @island_settings
+            ([int, float, int])
+            The window size, coefficient of variation, and number of windows to
+            smooth over, for the "islands and deserts" coverage model. Cannot
+            be used alongside [target_settings].
+    @bedgraph_path
+            (str - filepath)
+            The filepath of the bedGraph file to which the coverage multipliers
+            of the "islands and deserts" coverage model are written, if any.
+    @gc_bias_path
+            (str - filepath)
+            The filepath of the GC bias curve file, if any. If specified, the
+            depth of coverage is scaled by the highest value of the curve, and
+            each fragment is then kept with a probability proportional to the
+            value of the curve at its GC content.
     
     Return a value of 0 if the function runs successfully.
     Return a value of 1 if there is a problem accessing the data or if there are
@@ -588,38 +943,109 @@ def Generate_Fragments(path_in, path_out, depth_settings, read_len,
     Return a value of 2 if there is a problem with the output file.
     Return a value of 3 if there is a problem during the fragment generation
             process.
+    Return a value of 5 if there is no valid checkpoint to resume from.
+    Return a value of 6 if there is a problem with the target regions file.
+    Return a value of 7 if there is a problem with the GC bias curve file.
     
     Generate_Fragments(str, str, [int, int, float], int, [int, int, float],
-            [int, *...]) -> int
+            [int, *...], str, bool, str, bool, bool, [int, int],
+            [str, int, float], [int, float, int], str, str) -> int
     """
     # Setup reporting
     outcomes = [] # Outcomes are added after each input file is processed
+    # Checkpoint
+    checkpoint_path = Get_Checkpoint_Path(path_out)
+    settings = [path_in, path_out, depth_settings, read_len, frag_settings,
+            method_settings, unique_id_mod, coords, shard, target_settings,
+            island_settings, bedgraph_path, gc_bias_path]
+    if resume:
+        state = Read_Checkpoint(checkpoint_path)
+        if not state or not Settings_Match(state, settings): return 5
+    else: state = None
+    # Coverage
+    if target_settings:
+        coverage = Load_Target_Regions(*target_settings)
+        if not coverage: return 6
+    elif island_settings: coverage = Coverage_Map(*island_settings)
+    else: coverage = None
+    # GC bias
+    if gc_bias_path:
+        gc_bias = Load_GC_Bias(gc_bias_path)
+        if not gc_bias: return 7
+    else: gc_bias = None
     # Setup the I/O
-    paths_in = Get_Files_W_Extensions(path_in, LIST__FASTA)
+    paths_in = Get_Files_W_Extensions(path_in, LIST__FASTA + LIST__2BIT)
     if not paths_in: return 1
+    if shard: paths_in = Select_Shard_Paths(paths_in, shard[0], shard[1])
     try:
-        o = open(path_out, "w")
+        if state: o = Open_Truncated(path_out, state["output"], "r+")
+        else: o = open(path_out, "w")
+        o = PROFILE.Wrap_File(o, "Writing")
+        if not bedgraph_path: bedgraph = None
+        elif state:
+            bedgraph = Open_Truncated(bedgraph_path, state["bedgraph"], "r+")
+        else: bedgraph = open(bedgraph_path, "w")
+        progress = Progress_Reporter(NAME, "bases",
+                Get_Template_Size(paths_in), metrics_path, append = resume)
     except:
         return 2
+    # Resume
+    files_done = 0
+    if state:
+        files_done = state["files"]
+        outcomes = state["outcomes"]
+        Set_RNG_State(state["rng"])
+        progress.End_Section(state["bases"],
+                fragments = sum([outcome[0] for outcome in outcomes]))
+        progress.Skip(0)
     # Main loop
     PRINT.printP(STR__GenFrags_begin)
-    for path in paths_in:
-        outcome = Generate_Fragments__FILE(path, o, depth_settings,
-                read_len, frag_settings, method_settings, unique_id_mod)
+    for path in paths_in[files_done:]:
+        if Is_2Bit_Path(path):
+            outcome = Generate_Fragments__2BIT(path, o, depth_settings,
+                    read_len, frag_settings, method_settings, unique_id_mod,
+                    coords, progress, coverage, bedgraph, gc_bias)
+        else:
+            outcome = Generate_Fragments__FILE(path, o, depth_settings,
+                    read_len, frag_settings, method_settings, unique_id_mod,
+                    coords, progress, coverage, bedgraph, gc_bias)
         if outcome: outcomes.append(outcome)
         else:
             o.close()
+            if bedgraph: bedgraph.close()
+            progress.Finish()
             return 3
+        # Checkpoint
+        files_done += 1
+        if checkpoint:
+            o.flush()
+            if bedgraph: bedgraph.flush()
+            Write_Checkpoint(checkpoint_path, {"settings": settings,
+                    "files": files_done, "output": o.tell(),
+                    "bedgraph": bedgraph and bedgraph.tell(),
+                    "rng": Get_RNG_State(), "outcomes": outcomes,
+                    "bases": progress.Get_Done()})
     # Finish up
     o.close()
+    if bedgraph: bedgraph.close()
+    progress.Finish()
+    if checkpoint: Remove_Checkpoint(checkpoint_path)
+    if shard:
+        try:
+            Write_Shard_Summary(path_out + FILEMOD__SHARD, NAME, shard[0],
+                    shard[1], [path_out], outcomes)
+        except:
+            return 2
     PRINT.printP(STR__GenFrags_complete)
     # Reporting
     Report_Metrics(outcomes)
+    PROFILE.Report()
     # Wrap up
     return 0
 
 def Generate_Fragments__FILE(path_in, output, depth_settings, read_len,
-            frag_settings, method_settings, unique_id_mod):
+            frag_settings, method_settings, unique_id_mod, coords=False,
+            progress=None, coverage=None, bedgraph=None, gc_bias=None):
     """
     Generate a series of DNA fragments from the DNA template in the input file
     specified by [path_in].
@@ -656,82 +1082,91 @@ def Generate_Fragments__FILE(path_in, output, depth_settings, read_len,
             A string prefix which forms part of the fragment ID. Allows
             fragments from different runs to be pooled together and still have
             unique IDs relative to each other.
+    @coords
+            (bool)
+            Whether or not to output fragment coordinates instead of fragment
+            sequences.
+    @progress
+            (Progress_Reporter)
+            The reporter to which progress is reported, if any.
+    @coverage
+            (Target_Regions/Coverage_Map)
+            The target regions to which fragments are restricted, or the map of
+            the relative depth of coverage along the chromosome, if any. The
+            distances between fragment midpoints are measured in weighted bases
+            instead of bases.
+    @bedgraph
+            (file)
+            The file to which the coverage multipliers of [coverage] (a
+            Coverage Map) are written in bedGraph format, if any.
+    @gc_bias
+            (GC_Bias)
+            The GC bias curve used to decide whether to keep each fragment, if
+            any. The cumulative GC count is kept as each base is read, so the GC
+            content of each fragment is found in constant time.
     
     Return a list containing the number of number of fragments generated and
     their total length.
     Return an empty list if an error occured.
     
     Generate_Fragments(str, str/file, [int, int, float], int, [int, int, float],
-            [int, *...], str) -> [int, int]
+            [int, *...], str, bool, Progress_Reporter,
+            Target_Regions/Coverage_Map, file, GC_Bias) -> [int, int]
     """
     # Metrics setup
     count = 0
     total = 0
     
     # Unpack
-    depth, depth_method, depth_param = depth_settings
-    frag_len, frag_len_method, frag_len_param = frag_settings
     method = method_settings[0]
     
     # Calculations
-    average_dist = float(read_len)/depth
-    
-    # Calculations (maximum length)
-    if frag_len_method == DIST.NORMAL: max_len = 5 * frag_len
-    if frag_len_method == DIST.GAMMA: max_len = 5 * frag_len
-    if frag_len_method == DIST.UNIFORM: max_len = 5 * frag_len + frag_len_param
-    
-    # Calculate (distribution parameters)
-    if depth_method == DIST.GAMMA:
-        if depth_param < 0:
-            flag = True
-            depth_param = -depth_param
-        else: flag = False
-        beta = (average_dist / depth_param) ** 0.5
-        alpha = average_dist / beta
-        depth_param = [alpha, beta, flag]
-    elif depth_method == DIST.UNIFORM:
-        lower = int(average_dist) - frag_len_param
-        upper = int(average_dist + 0.5) + frag_len_param
-        depth_param = range(lower, upper+1)
-        average_dist = 0
-    
-    if frag_len_method == DIST.GAMMA:
-        if frag_len_param < 0:
-            flag = True
-            frag_len_param = -frag_len_param
-        else: flag = False
-        beta = (frag_len / frag_len_param) ** 0.5
-        alpha = frag_len / beta
-        frag_len_param = [alpha, beta, flag]
-    elif frag_len_method == DIST.UNIFORM:
-        lower = frag_len - frag_len_param
-        upper = frag_len + frag_len_param
-        frag_len_param = range(lower, upper+1)
-        frag_len = 0
+    if gc_bias: boost = gc_bias.boost
+    else: boost = 1
+    params = Calculate_Frag_Params(depth_settings, read_len, frag_settings,
+            boost)
+    average_dist, depth_method, depth_param = params[:3]
+    frag_len, frag_len_method, frag_len_param, max_len = params[3:]
     
     # I/O setup
     f = Chr_FASTA_Reader(path_in, True)
-    if type(output) == str: o = open(output, "w")
+    if type(output) == str: o = PROFILE.Wrap_File(open(output, "w"), "Writing")
     else: o = output
+    chr_name = f.Get_Name()
     
     # Setup
-    until_next = 1
+    if coverage: until_next = coverage.Advance(chr_name, 0, 1)
+    else: until_next = 1
     new_frags = 0
     
     current_index = 0
     counter = 0
-    frags = [] # Unfinished frags [start, end, direction, seq]
+    frags = [] # Unfinished frags [start, end, direction, seq, (keep, gc)]
     
     previous = Deque(max_len, "N")
     
+    # GC bias (cumulative GC counts of the previous bases)
+    gc_total = 0
+    if gc_bias: previous_gc = Deque(max_len + 1, 0)
+    
+    # Progress
+    if progress: progress.Begin_Section(chr_name)
+    report_at = PRINT_INTERVAL
+    
     # Main Loop
     while not f.End():
         f.Read()
         current_index += 1
         n = f.Get_Current()
         
+        if progress and current_index >= report_at:
+            progress.Update(current_index, fragments = count)
+            report_at += PRINT_INTERVAL
+        
         previous.Add(n)
+        if gc_bias:
+            if n in STR__GC_bases: gc_total += 1
+            previous_gc.Add(gc_total)
         
         # Calculate next frag, also number of frags at current position
         until_next -= 1
@@ -745,26 +1180,38 @@ def Generate_Fragments__FILE(path_in, output, depth_settings, read_len,
             if until_next < 1:
                 new_frags = 2 - until_next
                 until_next = 1
-            
+            if coverage:
+                until_next = (coverage.Advance(chr_name, current_index,
+                        until_next) - current_index)
+        
         # For all frags
         temp = []
         for frag in frags: # [start, end, direction, seq]
             frag[3].append(n)
             if current_index == frag[1]: # End of frag reached
+                if gc_bias: # Discard
+                    gc = gc_total - frag[5]
+                    if frag[4] >= gc_bias.Get_Probability(gc, len(frag[3])):
+                        continue
                 counter += 1
-                seq = "".join(frag[3])
                 if frag[2]:
                     direction = STR__forward
                 else:
                     direction = STR__reverse
-                    seq = Get_Complement(seq, True)
                 name = Generate_Frag_Name(unique_id_mod, counter, frag[0],
                         direction, frag[1])
                 # Write
-                s = ">" + name + "\n" + seq + "\n"
+                if coords:
+                    seq_start = frag[1] - len(frag[3]) + 1
+                    s = Generate_Frag_Coords(chr_name, seq_start, frag[1],
+                            frag[2], name)
+                else:
+                    seq = "".join(frag[3])
+                    if not frag[2]: seq = Reverse_Complement(seq)
+                    s = ">" + name + "\n" + seq + "\n"
                 o.write(s)
                 # Metrics
-                size = end - start + 1
+                size = len(frag[3])
                 count += 1
                 total += size
             else: # Frag still going
@@ -783,6 +1230,8 @@ def Generate_Fragments__FILE(path_in, output, depth_settings, read_len,
             coin_flip = Random.random()
             if coin_flip < 0.5: sense = True
             else: sense = False
+            # GC bias
+            if gc_bias: keep = Random.random()
             # Coordinates
             half = length/2
             if length % 2 == 1: # Odd length
@@ -805,14 +1254,299 @@ def Generate_Fragments__FILE(path_in, output, depth_settings, read_len,
             else:
                 # Not out of bounds
                 seq = previous.PollR(backtrack)
-                frags.append([start, end, sense, seq])
+                frag = [start, end, sense, seq]
+                if gc_bias:
+                    frag += [keep, previous_gc.PollR(backtrack + 1)[0]]
+                frags.append(frag)
+    
+    # Close file
+    if type(output) == str: o.close()
+    if bedgraph: coverage.Write_BedGraph(bedgraph, chr_name, current_index)
+    if progress: progress.End_Section(current_index, fragments = count)
+    
+    # Return
+    return [count, total]
+
+def Generate_Fragments__2BIT(path_in, output, depth_settings, read_len,
+            frag_settings, method_settings, unique_id_mod, coords=False,
+            progress=None, coverage=None, bedgraph=None, gc_bias=None):
+    """
+    Generate a series of DNA fragments from the DNA template in the packed file
+    specified by [path_in].
+    
+    The packed file version of Generate_Fragments__FILE(). Rather than reading
+    the template one nucleotide at a time, this function jumps directly from
+    each fragment midpoint to the next, and slices each fragment's sequence
+    directly out of the packed file once its end coordinate is known. Random
+    numbers are generated in the same order as in Generate_Fragments__FILE(), so
+    the same fragments will be generated as from an equivalent FASTA file.
+    
+    If target regions are specified as [coverage], the program also jumps
+    directly from one target region to the next, skipping the bases in between.
+    
+    If a GC bias curve is specified, the GC content of each fragment is found in
+    constant time using the composition index of the chromosome, which is built
+    in a single pass if it does not already exist.
+    
+    See Generate_Fragments__FILE() documentation for details on the parameters.
+    
+    Return a list containing the number of number of fragments generated and
+    their total length.
+    Return an empty list if an error occured.
+    
+    Generate_Fragments__2BIT(str, str/file, [int, int, float], int,
+            [int, int, float], [int, *...], str, bool, Progress_Reporter,
+            Target_Regions/Coverage_Map, file, GC_Bias) -> [int, int]
+    """
+    # Metrics setup
+    count = 0
+    total = 0
+    
+    # Unpack
+    method = method_settings[0]
+    
+    # Calculations
+    if gc_bias: boost = gc_bias.boost
+    else: boost = 1
+    params = Calculate_Frag_Params(depth_settings, read_len, frag_settings,
+            boost)
+    average_dist, depth_method, depth_param = params[:3]
+    frag_len, frag_len_method, frag_len_param, max_len = params[3:]
+    
+    # I/O setup
+    try:
+        f = Packed_Sequence(path_in)
+    except:
+        return []
+    if type(output) == str: o = PROFILE.Wrap_File(open(output, "w"), "Writing")
+    else: o = output
+    chr_name = f.Get_Name()
+    chr_len = f.Get_Length()
+    if gc_bias: composition = Get_Composition_Index(f)
+    
+    # Setup
+    if coverage: current_index = coverage.Advance(chr_name, 0, 1)
+    else: current_index = 1
+    counter = 0
+    order = 0 # Order of creation, for frags which end at the same position
+    frags = [] # Heap of frags [end, order, start, seq_start, sense, keep]
+    
+    # Progress
+    if progress: progress.Begin_Section(chr_name)
+    report_at = PRINT_INTERVAL
+    
+    # Main Loop
+    while True:
+        if progress and current_index >= report_at:
+            progress.Update(min(current_index, chr_len), fragments = count)
+            report_at = (current_index - (current_index % PRINT_INTERVAL) +
+                    PRINT_INTERVAL)
+        
+        # Frags which end at or before the current position
+        if current_index > chr_len: limit = chr_len
+        else: limit = current_index
+        while frags and frags[0][0] <= limit:
+            end, order_, start, seq_start, sense, keep = heappop(frags)
+            if gc_bias: # Discard
+                gc = composition.Count_GC(seq_start, end)
+                length = end - seq_start + 1
+                if keep >= gc_bias.Get_Probability(gc, length): continue
+            counter += 1
+            if sense: direction = STR__forward
+            else: direction = STR__reverse
+            name = Generate_Frag_Name(unique_id_mod, counter, start, direction,
+                    end)
+            # Write
+            if coords:
+                s = Generate_Frag_Coords(chr_name, seq_start, end, sense, name)
+            else:
+                seq = f.Get_Slice(seq_start, end)
+                if not sense: seq = Reverse_Complement(seq)
+                s = ">" + name + "\n" + seq + "\n"
+            o.write(s)
+            # Metrics
+            count += 1
+            total += end - seq_start + 1
+        if current_index > chr_len: break
+        
+        # Random until next, and number of new frags
+        until_next = Custom_Random_Distribution(average_dist, depth_method,
+                depth_param)
+        until_next = int(until_next + 0.5)
+        new_frags = 1
+        if until_next < 1:
+            new_frags = 2 - until_next
+            until_next = 1
+        
+        # New frags
+        while new_frags > 0:
+            new_frags -= 1
+            # Length
+            length = Custom_Random_Distribution(frag_len, frag_len_method,
+                    frag_len_param)
+            if length < 3: length = 3
+            if length > max_len: length = max_len
+            # Coin Flip
+            coin_flip = Random.random()
+            if coin_flip < 0.5: sense = True
+            else: sense = False
+            # GC bias
+            if gc_bias: keep = Random.random()
+            else: keep = None
+            # Coordinates
+            half = length/2
+            if length % 2 == 1: # Odd length
+                backtrack = half + 1
+                start = current_index - half + 1
+                end = current_index + half
+            else: # Even length
+                if sense:
+                    backtrack = half
+                    start = current_index - half + 1
+                    end = current_index + half
+                else:
+                    backtrack = half + 1
+                    start = current_index - half
+                    end = current_index + half - 1
+            # Out Of Bounds
+            if current_index - backtrack >= 0 and end <= chr_len:
+                seq_start = current_index - backtrack + 1
+                heappush(frags, [end, order, start, seq_start, sense, keep])
+                order += 1
+        
+        # Jump to next
+        if coverage:
+            current_index = coverage.Advance(chr_name, current_index,
+                    until_next)
+        else: current_index += until_next
     
     # Close file
+    if gc_bias: composition.Close()
+    f.Close()
     if type(output) == str: o.close()
+    if bedgraph: coverage.Write_BedGraph(bedgraph, chr_name, chr_len)
+    if progress: progress.End_Section(chr_len, fragments = count)
     
     # Return
     return [count, total]
 
+def Get_Template_Size(paths_in):
+    """
+    Return the total size of the DNA templates in the files in [paths_in], for
+    the purpose of progress reporting. The sizes of packed files are exact,
+    while the sizes of FASTA files are approximated by their file sizes.
+    
+    Return 0 if the size could not be determined.
+    
+    Get_Template_Size(list<str>) -> int
+    """
+    size = 0
+    try:
+        for path in paths_in:
+            if Is_2Bit_Path(path):
+                f = Packed_Sequence(path)
+                size += f.Get_Length()
+                f.Close()
+            else:
+                size += os.path.getsize(path)
+    except:
+        return 0
+    return size
+
+def Select_Shard_Paths(paths_in, shard, shards):
+    """
+    Return the input files to be processed by the specified shard, in their
+    original order.
+    
+    Whole input files are divided between the shards. Files are assigned to the
+    shard with the smallest total template size so far, largest first, so the
+    division is deterministic and as even as possible.
+    
+    Select_Shard_Paths(list<str>, int, int) -> list<str>
+    """
+    sizes = [Get_Template_Size([path]) for path in paths_in]
+    order = sorted(range(len(paths_in)), key = lambda i: (-sizes[i],
+            paths_in[i]))
+    totals = [0] * shards
+    assigned = [[] for i in range(shards)]
+    for i in order:
+        smallest = totals.index(min(totals))
+        totals[smallest] += sizes[i]
+        assigned[smallest].append(i)
+    return [paths_in[i] for i in sorted(assigned[shard - 1])]
+
+def Calculate_Frag_Params(depth_settings, read_len, frag_settings, boost=1):
+    """
+    Return the processed and expanded versions of the "depth of coverage" and
+    "fragment length" settings, as used by the fragment generation functions.
+    
+    See Generate_Fragments() documentation for details on the parameters.
+    
+    The density of fragments is multiplied by [boost], (used to offset the
+    fragments discarded by a GC bias model) by dividing all distances between
+    fragments by it, including those drawn from an empirical histogram.
+    
+    Return a list containing the average distance between fragments, the depth
+    distribution method and its parameters, the average fragment length, the
+    fragment length distribution method and its parameters, and the maximum
+    fragment length.
+    
+    Calculate_Frag_Params([int, int, float], int, [int, int, float], float) ->
+            [float, int, *, int, int, *, int]
+    """
+    # Unpack
+    depth, depth_method, depth_param = depth_settings
+    frag_len, frag_len_method, frag_len_param = frag_settings
+    
+    # Calculations
+    average_dist = float(read_len)/(depth * boost)
+    
+    # Calculations (maximum length)
+    if frag_len_method == DIST.NORMAL: max_len = 5 * frag_len
+    if frag_len_method == DIST.GAMMA: max_len = 5 * frag_len
+    if frag_len_method == DIST.UNIFORM: max_len = 5 * frag_len + frag_len_param
+    
+    # Calculate (distribution parameters)
+    if depth_method == DIST.GAMMA:
+        if depth_param < 0:
+            flag = True
+            depth_param = -depth_param
+        else: flag = False
+        beta = (average_dist / depth_param) ** 0.5
+        alpha = average_dist / beta
+        depth_param = [alpha, beta, flag]
+    elif depth_method == DIST.UNIFORM:
+        lower = int(average_dist) - depth_param
+        upper = int(average_dist + 0.5) + depth_param
+        depth_param = Alias_Table(range(lower, upper+1))
+        average_dist = 0
+    elif depth_method == DIST.EMPIRICAL:
+        depth_param = Load_Histogram(depth_param)
+        if boost != 1: depth_param.Scale(1.0 / boost)
+        average_dist = 0
+    
+    if frag_len_method == DIST.GAMMA:
+        if frag_len_param < 0:
+            flag = True
+            frag_len_param = -frag_len_param
+        else: flag = False
+        beta = (frag_len / frag_len_param) ** 0.5
+        alpha = frag_len / beta
+        frag_len_param = [alpha, beta, flag]
+    elif frag_len_method == DIST.UNIFORM:
+        lower = frag_len - frag_len_param
+        upper = frag_len + frag_len_param
+        frag_len_param = Alias_Table(range(lower, upper+1))
+        frag_len = 0
+    elif frag_len_method == DIST.EMPIRICAL:
+        frag_len_param = Load_Histogram(frag_len_param)
+        frag_len = 0
+        max_len = max(frag_len_param.Get_Max(), 3)
+    
+    # Return
+    return [average_dist, depth_method, depth_param, frag_len, frag_len_method,
+            frag_len_param, max_len]
+
 def Report_Metrics(outcomes):
     """
     Print a report into the command line interface of the total number of
@@ -871,6 +1605,7 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
                 0: Normal distribution
                 1: Gamma distribution
                 2: Uniform distribution
+                3: Empirical distribution
     @param
             (*)
             Varies depending on the distribution method chosen:
@@ -883,12 +1618,15 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
                     Gamma distribution, and a flag indicating whether to
                     flip-shift the result or not.
                 UNIFORM:
-                    If @mean is 0, then @param is a list of values, one of which
-                    will be chosen at random with equal probability.
+                    If @mean is 0, then @param is an Alias Table of values, one
+                    of which will be chosen at random with equal probability.
                     If @mean is not zero, then @param is the number to add,
                     essentially resulting in a series of numbers which are
                     either FLOOR(@mean) or CEILING(@mean), the average of which
                     is @mean.
+                EMPIRICAL:
+                    (Alias_Table)
+                    An Alias Table of the histogram from which values are drawn.
     @must_positive
             (bool)
             Whether or not to forcibly make the result positive if it is
@@ -902,7 +1640,9 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
             if r > mean: return param+1
             else: return param
         else:
-            r = Random.choice(param)
+            r = param.Sample()
+    elif method == DIST.EMPIRICAL:
+        r = param.Sample()
     else:
         if method == DIST.NORMAL:
             r = Random.normalvariate(mean, param)
@@ -914,6 +1654,24 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
         if r < 0: r = -r
     return r
     
+def Generate_Frag_Coords(chr_name, start, end, sense, name):
+    """
+    Generate a row of a fragment coordinates table for a DNA fragment.
+    
+    @chr_name    (str)
+    @start       (int)
+    @end         (int)
+    @sense       (bool)
+    @name        (str)
+    
+    Generate_Frag_Coords(str, int, int, bool, str) -> str
+    """
+    if sense: direction = "+"
+    else: direction = "-"
+    sb = (chr_name + "\t" + str(start) + "\t" + str(end) + "\t" + direction +
+            "\t" + name + "\n")
+    return sb
+
 def Generate_Frag_Name(unique_id, counter, start, direction, end):
     """
     Generate a name for a DNA fragment based on how many fragments have already
@@ -925,11 +1683,27 @@ def Generate_Frag_Name(unique_id, counter, start, direction, end):
     @direction   (str)
     @end         (str)
     
-    Generate_Name(str, int, str, str, str) -> str
+    Generate_Frag_Name(str, int, str, str, str) -> str
     """
-    sb = Pad_Str(str(counter), ID_SIZE, "0", 0)
-    sb = unique_id + sb + "__" + str(start) + "_" + direction + "_" + str(end)
-    return sb
+    return STR__name % (unique_id, counter, start, direction, end)
+
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the functions and methods which make up the
+    main stages of this program.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(Chr_FASTA_Reader, "Read", "Reading")
+    PROFILE.Instrument(Packed_Sequence, "Get_Slice", "Reading")
+    PROFILE.Instrument(Loaded_Sequence, "Get_Slice", "Reading")
+    PROFILE.Instrument(globals(), "Custom_Random_Distribution", "Sampling")
+    PROFILE.Instrument(Deque, "Add", "Backtracking")
+    PROFILE.Instrument(Deque, "PollR", "Backtracking")
+    PROFILE.Instrument(globals(), "Reverse_Complement", "String assembly")
+    PROFILE.Instrument(globals(), "Generate_Frag_Name", "String assembly")
+    PROFILE.Instrument(Composition_Index, "Count", "GC bias")
+
 
 
 
@@ -955,6 +1729,12 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
         print(HELP_DOC)
         return 0
     
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
     # Initial validation (Redundant in current version)
     if len(inputs) < 1:
         PRINT.printE(STR__insufficient_inputs)
@@ -974,8 +1754,7 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
         return 1
     
     # Set up rest of the parsing
-    path_out = Generate_Default_Output_File_Path_From_Folder(path_in,
-            FILEMOD__FASTA)
+    path_out = ""
     read_len = DEFAULT__read_len
     depth = DEFAULT__depth
     cov_dist = DEFAULT__cov_dist
@@ -985,10 +1764,25 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
     frag_num = DEFAULT__frag_num
     method = DEFAULT__method
     unique_id_mod = DEFAULT__STR__unique_id_mod
+    coords = DEFAULT__coords
+    metrics_path = ""
+    checkpoint = DEFAULT__checkpoint
+    resume = False
+    shard = None
+    targets_path = ""
+    padding = DEFAULT__padding
+    off_target = DEFAULT__off_target
+    island_settings = None
+    smoothing = DEFAULT__smoothing
+    bedgraph_path = ""
+    gc_bias_path = ""
     
     # Validate optional inputs (except output path)
     while inputs:
         arg = inputs.pop(0)
+        if arg == "--resume": # No further arguments
+            resume = True
+            continue
         try: # Second argument
             arg2 = inputs.pop(0)
         except:
@@ -1046,6 +1840,59 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
                 return 1
         elif arg == "-u":
             unique_id_mod = arg2
+        elif arg == "-t": # Output coordinates
+            coords = Validate_Bool(arg2)
+            if coords == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--metrics": # Progress metrics file
+            metrics_path = arg2
+        elif arg == "--checkpoint": # Checkpoints
+            checkpoint = Validate_Bool(arg2)
+            if checkpoint == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--shard": # Shard
+            shard = Parse_Shard(arg2)
+            if not shard:
+                PRINT.printE(STR__invalid_shard.format(s = arg2))
+                return 1
+        elif arg == "--targets": # Target regions
+            targets_path = arg2
+        elif arg == "--padding": # Target region padding
+            padding = Validate_Int_NonNeg(arg2)
+            if padding == -1:
+                PRINT.printE(STR__invalid_padding.format(s = arg2))
+                return 1
+        elif arg == "--off-target": # Off-target rate
+            off_target = Validate_Float_NonNeg(arg2)
+            if off_target == -1 or off_target > 1:
+                PRINT.printE(STR__invalid_off_target.format(s = arg2))
+                return 1
+        elif arg == "--islands": # Islands and deserts
+            try: # Third argument
+                arg3 = inputs.pop(0)
+            except:
+                PRINT.printE(STR__insufficient_inputs)
+                PRINT.printE(STR__use_help)
+                return 1
+            window_size = Validate_Int_Positive(arg2)
+            variability = Validate_Float_NonNeg(arg3)
+            if window_size == -1 or variability == -1:
+                PRINT.printE(STR__invalid_islands.format(s1 = arg2, s2 = arg3))
+                return 1
+            island_settings = [window_size, variability]
+        elif arg == "--smoothing": # Islands and deserts smoothing
+            smoothing = Validate_Int_Positive(arg2)
+            if smoothing == -1:
+                PRINT.printE(STR__invalid_smoothing.format(s = arg2))
+                return 1
+        elif arg == "--bedgraph": # Coverage multipliers
+            bedgraph_path = arg2
+        elif arg == "--gc-bias": # GC bias curve
+            gc_bias_path = arg2
         else: # Invalid
             arg = Strip_X(arg)
             PRINT.printE(STR__invalid_argument.format(s = arg))
@@ -1054,21 +1901,62 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
     
     # Processing
     if read_len == -1: read_len = frag_len
-    
-    # Validate output path
-    valid_out = Validate_Write_Path(path_out)
-    if valid_out == 2: return 0
-    if valid_out == 3:
-        PRINT.printE(STR__IO_error_write_forbid)
-        return 1
-    if valid_out == 4:
-        PRINT.printE(STR__IO_error_write_unable)
-        return 1
+    if targets_path: target_settings = [targets_path, padding, off_target]
+    else: target_settings = None
+    if island_settings:
+        if target_settings:
+            PRINT.printE(STR__islands_targets)
+            PRINT.printE(STR__use_help)
+            return 1
+        island_settings.append(smoothing)
+    else: bedgraph_path = ""
+    if not path_out:
+        if coords: filemod = FILEMOD__TSV
+        else: filemod = FILEMOD__FASTA
+        path_out = Generate_Default_Output_File_Path_From_Folder(path_in,
+                filemod)
+    if shard:
+        path_out = Add_Shard_Tag(path_out, shard[0], shard[1])
+        if metrics_path:
+            metrics_path = Add_Shard_Tag(metrics_path, shard[0], shard[1])
+        if bedgraph_path:
+            bedgraph_path = Add_Shard_Tag(bedgraph_path, shard[0], shard[1])
+        unique_id_mod += STR__shard_id.format(i = shard[0])
+    
+    # Validate output path (Existing outputs are expected when resuming)
+    if not resume:
+        valid_out = Validate_Write_Path(path_out)
+        if valid_out == 2: return 0
+        if valid_out == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
+    if metrics_path and not resume:
+        valid_out = Validate_Write_Path(metrics_path)
+        if valid_out == 2: return 0
+        if valid_out == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
+    if bedgraph_path and not resume:
+        valid_out = Validate_Write_Path(bedgraph_path)
+        if valid_out == 2: return 0
+        if valid_out == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
     
     # Run program
     exit_state = Generate_Fragments(path_in, path_out, [depth, cov_dist,
             cov_num], read_len, [frag_len, frag_dist, frag_num], [method],
-            unique_id_mod)
+            unique_id_mod, coords, metrics_path, checkpoint, resume, shard,
+            target_settings, island_settings, bedgraph_path, gc_bias_path)
     
     # Exit
     if exit_state == 0: return 0
@@ -1076,6 +1964,9 @@ def Parse_Command_Line_Input__Generate_Fragments(raw_command_line_input):
         if exit_state == 1: PRINT.printE(STR__input_invalid)
         if exit_state == 2: PRINT.printE(STR__output_invalid)
         if exit_state == 3: PRINT.printE(STR__generation_invalid)
+        if exit_state == 5: PRINT.printE(STR__checkpoint_invalid)
+        if exit_state == 6: PRINT.printE(STR__targets_invalid)
+        if exit_state == 7: PRINT.printE(STR__gc_bias_invalid)
         PRINT.printE(STR__use_help)
         return 1
 
@@ -1089,8 +1980,8 @@ def Validate_Dist_Params(method, param):
     parameters are valid.
     Return an empty list if the parameters are invalid.
     
-    Valid values for [method] include "Normal", "Gamma", and "Uniform", and all
-    capitalization variants of these strings.
+    Valid values for [method] include "Normal", "Gamma", "Uniform", and
+    "Empirical", and all capitalization variants of these strings.
     
     Regarding param:
         
@@ -1104,6 +1995,9 @@ def Validate_Dist_Params(method, param):
         
         For a uniform distribution, [param] is how far away from the average the
         distribution range goes.
+        
+        For an empirical distribution, [param] is the filepath of a valid
+        histogram file.
     
     Validate_Dist_Params(str, str) -> list<*>
     """
@@ -1117,6 +2011,8 @@ def Validate_Dist_Params(method, param):
     elif dist == 3: # Uniform
         param = Validate_Int_NonNeg(param)
         if param == -1: return []
+    elif dist == 4: # Empirical
+        if not Read_Histogram(param): return []
     else:
         return []
     return [dist, param]
@@ -1160,7 +2056,8 @@ def Validate_Write_Path(filepath):
 
 def Validate_FASTA_Folder(dirpath):
     """
-    Validates the dirpath of the input file as containing FASTA files.
+    Validates the dirpath of the input file as containing FASTA files. (Or
+    packed ".2bit" files)
     Return 0 if the dirpath is valid and contains at least 1 FASTA file.
     Return 1 if the dirpath is valid but contains no FASTA files.
     Return 2 if the dirpath is invalid.
@@ -1169,7 +2066,7 @@ def Validate_FASTA_Folder(dirpath):
     """
     try:
         os.listdir(dirpath)
-        files = Get_Files_W_Extensions(dirpath, LIST__FASTA)
+        files = Get_Files_W_Extensions(dirpath, LIST__FASTA + LIST__2BIT)
         if len(files) > 0: return 0
         return 1
     except:
@@ -13,12 +13,28 @@ combined, form a synthetic genome.
 The resultant FASTA files are output into the output folder, which can either be
 specified by the user, or automatically generated.
 
+Alternatively, the chromosomes can be output as packed ".2bit" files instead of
+FASTA files. These are roughly a quarter of the size and can be read directly by
+the other programs in this library.
+
+If the EQUAL method is used with packed output, the packed files are generated
+directly from random bits, with each random byte becoming four nucleotides.
+This is much faster than generating nucleotides one at a time, but will not
+produce the same sequences as the FASTA output for a given random seed.
+
+A composition index can also be written alongside each chromosome, recording
+the cumulative counts of each nucleotide at regular intervals. The index is
+built while the chromosome is being written, and allows other programs in this
+library to find the composition of any region of the chromosome in constant
+time. (See Composition_Index.py)
+
 
 
 USAGE:
     
     python27 Generate_Random_Chromosomes.py <chr_sizes_file>
             [-o <output_folder>] [-w <file_width>] [-m <method> [m2]]
+            [-f <format>] [--index Y|N] [--profile [<pstats_filepath>]]
 
 
 
@@ -73,6 +89,36 @@ OPTIONAL:
                 A float, denoting either the percentage of nucleotides which
                 are GC, or a decimal number denoting the fraction of nucleotides
                 which are GC.
+    
+    format
+        
+        (DEFAULT: FASTA)
+        
+        The file format of the output files. Valid formats are:
+            
+            FASTA
+                Plain text FASTA files.
+            
+            2BIT
+                Packed binary files, with 2 bits per nucleotide. (UCSC ".2bit"
+                format) The file width is not applicable to this format.
+    
+    --index
+        
+        (DEFAULT: N)
+        
+        Whether or not to write a composition index alongside each chromosome.
+        The index file is given the same name as the chromosome file, with
+        ".comp" appended to the end.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent generating, counting, and writing
+        nucleotides once the run is complete. If a filepath is specified after
+        the flag, the run is also profiled using cProfile, and the statistics
+        are saved to said file. (They can be examined using the pstats module)
 
 EXAMPLES:
     
@@ -84,11 +130,18 @@ EXAMPLES:
     
     python27 Generate_Random_Chromosomes.py data\chr_sizes.tsv
             -o data\test_genome -w 40 -m GC 55
+    
+    python27 Generate_Random_Chromosomes.py data\chr_sizes.tsv
+            -o data\test_genome -f 2BIT
+    
+    python27 Generate_Random_Chromosomes.py data\chr_sizes.tsv
+            -o data\test_genome --index Y
 
 USAGE:
     
     python27 Generate_Random_Chromosomes.py <chr_sizes_file>
             [-o <output_folder>] [-w <file_width>] [-m <method> [*]]
+            [-f <format>] [--index Y|N] [--profile [<pstats_filepath>]]
 """
 
 NAME = "Generate_Random_Chromosomes.py"
@@ -111,6 +164,7 @@ PRINT_METRICS = True
 # Minor Configurations #########################################################
 
 FILEMOD__FASTA = ".fa"
+FILEMOD__2BIT = ".2bit"
 
 
 
@@ -119,6 +173,8 @@ FILEMOD__FASTA = ".fa"
 
 DEFAULT__width = 80
 DEFAULT__method = 0 # METHOD.EQUAL = 0. If the METHOD enum is altered, sync this
+DEFAULT__packed = False
+DEFAULT__index = False
 
 
 
@@ -132,8 +188,12 @@ import random as Random
 
 
 import _Controlled_Print as PRINT
+import Profiler as PROFILE
 from _Command_Line_Parser import *
 
+from Packed_Genome import *
+from Composition_Index import *
+
 
 
 # Enums ########################################################################
@@ -169,6 +229,12 @@ Numbers between 1 and 100 inclusive will be interpretted as a percentage.
 Numbers less than 1 but greater than or equal to 0 will be interpretted as a
 decimal fraction."""
 
+STR__invalid_format = """
+ERROR: Invalid output file format: {s}
+Please specify one of:
+    FASTA
+    2BIT"""
+
 STR__invalid_GC = """
 ERROR: Invalid GC content: {s}
 Please specify either a number between 0 and 100 inclusive.
@@ -198,6 +264,9 @@ LIST__no = ["N", "n", "NO", "No", "no", "F", "f", "FALSE", "False", "false"]
 LIST__equal = ["E", "e", "EQUAL", "Equal", "equal"]
 LIST__gc = ["GC", "gc"]
 
+LIST__fasta = ["FASTA", "Fasta", "fasta", "FA", "fa"]
+LIST__2bit = ["2BIT", "2Bit", "2bit"]
+
 CUTOFFS__equal = [0.25, 0.5, 0.75] # A, C, G, T
 
 
@@ -221,7 +290,7 @@ PRINT.PRINT_METRICS = PRINT_METRICS
 # Functions ####################################################################
 
 def Generate_Synthetic_Chromosomes(path_in, path_out, width, method,
-        method_supplementary):
+        method_supplementary, packed=False, index=False):
     """
     Generate a series of FASTA files each containing a synthetic chromosome.
     
@@ -259,14 +328,24 @@ def Generate_Synthetic_Chromosomes(path_in, path_out, width, method,
                     Cutoffs used against randomly generated numbers to
                     determine nucleotide assignment. See Generate_Cutoffs_GC()
                     for more details.
+    @packed
+            (bool)
+            Whether to output packed ".2bit" files instead of FASTA files.
+    @index
+            (bool)
+            Whether to write a composition index alongside each chromosome.
     
     Return a value of 0 if the function runs successfully.
     Return a value of 1 if there is a problem with the chromsome sizes file.
     
-    Generate_Synthetic_Chromosomes(str, str, int, float, *) -> int
+    Generate_Synthetic_Chromosomes(str, str, int, float, *, bool, bool) -> int
     """
     # Setup reporting
     outcomes = [] # Outcomes are added to the list after every chromosome
+    
+    # File extension
+    if packed: file_ext = FILEMOD__2BIT
+    else: file_ext = FILEMOD__FASTA
 
     # Main loop
     PRINT.printP(STR__GSC_begin)
@@ -278,16 +357,24 @@ def Generate_Synthetic_Chromosomes(path_in, path_out, width, method,
     while line:
         # Parse
         values = Parse_TSV_Line(line)
-        chr_file_name = path_out + "\\" + values[0] + FILEMOD__FASTA
+        chr_file_name = path_out + "\\" + values[0] + file_ext
         try: # Get chromosome size
             size = int(values[1])
         except: # Invalid chromosome size
             f.close()
             return 1
         # Generate chromosome
-        if method in [METHOD.EQUAL, METHOD.GC]:
+        if packed and method == METHOD.EQUAL:
+            outcome = Generate_Synthetic_Chromosome__PACKED(values[0],
+                    chr_file_name, size, index)
+            if not outcome:
+                f.close()
+                return 2
+            outcomes.append(outcome)
+        elif method in [METHOD.EQUAL, METHOD.GC]:
             outcome = Generate_Synthetic_Chromosome__CUTOFFS(values[0],
-                    chr_file_name, size, width, method_supplementary)
+                    chr_file_name, size, width, method_supplementary, packed,
+                    index)
             if not outcome:
                 f.close()
                 return 2
@@ -300,6 +387,7 @@ def Generate_Synthetic_Chromosomes(path_in, path_out, width, method,
     # Reporting
     if method in [METHOD.EQUAL, METHOD.GC]:
         Report_Metrics__CUTOFFS(outcomes)
+    PROFILE.Report()
 
     # Wrap up
     return 0
@@ -318,9 +406,9 @@ def Parse_TSV_Line(line):
 
 
 def Generate_Synthetic_Chromosome__CUTOFFS(chr_name, path_out, chr_size, width, 
-        cutoffs):
+        cutoffs, packed=False, index=False):
     """
-    Generate a FASTA file containing a synthetic chromosome.
+    Generate a FASTA file (or packed file) containing a synthetic chromosome.
     
     @chr_name
             (str)
@@ -349,25 +437,39 @@ def Generate_Synthetic_Chromosome__CUTOFFS(chr_name, path_out, chr_size, width,
             nucleotide is a Guanine. If the randomly generated number is
             greater than the third float, the resulting nucleotide is a 
             Thymine.
+    @packed
+            (bool)
+            Whether to output a packed ".2bit" file instead of a FASTA file.
+            If True, @width only determines how many nucleotides are generated
+            before they are passed on to be packed.
+    @index
+            (bool)
+            Whether to write a composition index alongside the chromosome. The
+            index is built from the nucleotides as they are written.
     
     Return a list of A, C, G, and T counts.
     Return an empty list if an error occured.
     
-    Generate_Synthetic_Chromosomes(str, str, int, int, [float, float, float]) 
-    -> [int, int, int, int]
+    Generate_Synthetic_Chromosomes(str, str, int, int, [float, float, float],
+    bool, bool) -> [int, int, int, int]
     """
     # Validate
-    try:
-        o = open(path_out, "w")
-    except:
-        return []
-    # Name
-    o.write(">" + chr_name + "\n")
+    if packed:
+        o = Packed_File_Writer()
+        if o.Open(path_out, chr_name): return []
+    else:
+        try:
+            o = PROFILE.Wrap_File(open(path_out, "w"), "Writing")
+        except:
+            return []
+        # Name
+        o.write(">" + chr_name + "\n")
     # Setup
     sb = ""
     total = 0
     char_count = 0
     counts = [0,0,0,0]
+    if index: composition = Composition_Writer()
     # Loop
     while total < chr_size:
         n = Generate_Random_Nucleotide__CUTOFFS(cutoffs, counts)
@@ -375,16 +477,95 @@ def Generate_Synthetic_Chromosome__CUTOFFS(chr_name, path_out, chr_size, width,
         total += 1
         char_count += 1
         if char_count == width:
-            o.write(sb + "\n")
+            if packed: o.Write(sb)
+            else: o.write(sb + "\n")
+            if index: composition.Add(sb)
             sb = ""
             char_count = 0
     # Finish
-    if char_count: o.write(sb + "\n")
-    o.close()
+    if packed:
+        if char_count: o.Write(sb)
+        o.Close()
+    else:
+        if char_count: o.write(sb + "\n")
+        o.close()
+    if index:
+        composition.Add(sb)
+        if composition.Write(path_out + FILEMOD__COMPOSITION, path_out):
+            return []
     return counts
 
 
 
+def Generate_Synthetic_Chromosome__PACKED(chr_name, path_out, chr_size,
+        index=False):
+    """
+    Generate a packed file containing a synthetic chromosome, where all
+    nucleotides have an equal probability of occuring.
+    
+    The packed sequence is generated directly from random bits, with every
+    random byte becoming four nucleotides, rather than generating nucleotides
+    one at a time.
+    
+    @chr_name
+            (str)
+            The name of the chromosome.
+    @path_out
+            (str - filepath)
+            The filepath for the file where the synthetic chromosome will be
+            created.
+    @chr_size
+            (int)
+            The size of the chromosome created, in basepairs.
+    @index
+            (bool)
+            Whether to write a composition index alongside the chromosome. The
+            index is built from the packed bytes as they are written.
+    
+    Return a list of A, C, G, and T counts.
+    Return an empty list if an error occured.
+    
+    Generate_Synthetic_Chromosome__PACKED(str, str, int, bool) -> [int, int,
+            int, int]
+    """
+    # Validate
+    o = Packed_File_Writer()
+    if o.Open(path_out, chr_name): return []
+    # Setup
+    remaining = chr_size
+    counts = [0,0,0,0]
+    if index: composition = Composition_Writer()
+    # Loop
+    while remaining > 0:
+        length = min(remaining, BUFFER_SIZE) # BUFFER_SIZE is a multiple of 4
+        data = Generate_Random_Bytes((length+3)/4)
+        temp = Count_Packed(data, length)
+        for i in range(4): counts[i] += temp[i]
+        o.Write_Packed(data, length)
+        if index: composition.Add_Packed(data, length)
+        remaining -= length
+    # Finish
+    o.Close()
+    if index:
+        if composition.Write(path_out + FILEMOD__COMPOSITION, path_out):
+            return []
+    return counts
+
+def Generate_Random_Bytes(byte_count):
+    """
+    Generate a string of [byte_count] random bytes.
+    
+    Random.getrandbits() is used, rather than os.urandom(), so that the output
+    is reproducible when a random seed is set.
+    
+    Generate_Random_Bytes(int) -> str
+    """
+    if byte_count < 1: return ""
+    r = Random.getrandbits(8*byte_count)
+    return ("%0*x" % (2*byte_count, r)).decode("hex")
+
+
+
 def Generate_Random_Nucleotide__CUTOFFS(cutoffs, counts=[0,0,0,0]):
     """
     Generate a random nucleotide using the cutoffs specified.
@@ -491,6 +672,23 @@ def Report_Metrics__CUTOFFS(outcomes):
     PRINT.printM(STR__metrics_G.format(N = str_G, P = str_Gp))
     PRINT.printM(STR__metrics_T.format(N = str_T, P = str_Tp))
 
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the functions and methods which make up the
+    main stages of this program.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(globals(), "Generate_Random_Nucleotide__CUTOFFS",
+            "Sampling")
+    PROFILE.Instrument(globals(), "Generate_Random_Bytes", "Sampling")
+    PROFILE.Instrument(globals(), "Count_Packed", "Counting")
+    PROFILE.Instrument(Composition_Writer, "Add", "Counting")
+    PROFILE.Instrument(Composition_Writer, "Add_Packed", "Counting")
+    for name in ["Write", "Write_Packed", "Close"]:
+        PROFILE.Instrument(Packed_File_Writer, name, "Writing")
+
+
 
 
 # Command Line Parsing #########################################################
@@ -515,6 +713,12 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
         print(HELP_DOC)
         return 0
     
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
     # Initial validation (Redundant in current version)
     if len(inputs) < 1:
         PRINT.printE(STR__insufficient_inputs)
@@ -533,6 +737,8 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
     width = DEFAULT__width
     method = DEFAULT__method
     method_supplementary = CUTOFFS__equal # A, C, G, T # The default
+    packed = DEFAULT__packed
+    index = DEFAULT__index
     path_out = Generate_Default_Output_Folder_Path(path_in)
     
     # Validate optional inputs (except output path)
@@ -553,7 +759,8 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
                 return 1
         elif arg == "-m": # Method
             if arg2 in LIST__equal:
-                cutoffs = CUTOFFS__equal
+                method = METHOD.EQUAL
+                method_supplementary = CUTOFFS__equal
             elif arg2 in LIST__gc:
                 try:
                     arg3 = inputs.pop(0)
@@ -564,12 +771,26 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
                 if GC == -1:
                     PRINT.printE(STR__invalid_GC.format(s = arg3))
                     return 1
+                method = METHOD.GC
                 method_supplementary = Generate_Cutoffs_GC(GC)
                 
             else:
                 PRINT.printE(STR__invalid_method)
                 PRINT.printE(STR__use_help)
                 return 1
+        elif arg == "-f": # Output format
+            if arg2 in LIST__fasta: packed = False
+            elif arg2 in LIST__2bit: packed = True
+            else:
+                PRINT.printE(STR__invalid_format.format(s = arg2))
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--index": # Composition index
+            index = Validate_Bool(arg2)
+            if index == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
         else: # Invalid
             arg = Strip_X(arg)
             PRINT.printE(STR__invalid_argument.format(s = arg))
@@ -577,7 +798,9 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
             return 1
 
     # Validate output path
-    valid_out = Validate_Folder_Path(path_out, path_in)
+    if packed: file_ext = FILEMOD__2BIT
+    else: file_ext = FILEMOD__FASTA
+    valid_out = Validate_Folder_Path(path_out, path_in, file_ext)
     if valid_out == 0: pass
     elif valid_out == 1: PRINT.printM(STR__overwrite_accept)
     else:
@@ -592,7 +815,7 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
     
     # Run program
     exit_state = Generate_Synthetic_Chromosomes(path_in, path_out, width,
-            method, method_supplementary)
+            method, method_supplementary, packed, index)
     
     # Exit
     if exit_state == 0: return 0
@@ -603,13 +826,16 @@ def Parse_Command_Line_Input__Generate_Synthetic_Genome(raw_command_line_input):
 
 
 
-def Validate_Folder_Path(folder_path, chr_sizes_filepath):
+def Validate_Folder_Path(folder_path, chr_sizes_filepath,
+            file_ext=FILEMOD__FASTA):
     """
     Validates the writepath of the output folder.
     Attempts to create the folder if it does not exist.
 
     Assumes that @chr_sizes_filepath is a valid filepath.
     
+    [file_ext] is the file extension of the files which are to be created.
+    
     Return 0 if the folder path is valid and empty* and can be written into.
     Return 1 if the folder path is valid and the user decides to overwrite
             existing files.
@@ -625,7 +851,7 @@ def Validate_Folder_Path(folder_path, chr_sizes_filepath):
     * Empty - Not necessarily empty, but does not containing any naming
             conflicts with the names in the chromosome sizes file.
     
-    Validate_Folder_Path(str, str) -> int
+    Validate_Folder_Path(str, str, str) -> int
     """
     # Create folder if it does not exist
     if not os.path.isdir(folder_path):
@@ -656,7 +882,7 @@ def Validate_Folder_Path(folder_path, chr_sizes_filepath):
     line = f.readline()
     while line:
         values = line.split("\t")
-        temp_path = folder_path + "\\" + values[0] + FILEMOD__FASTA
+        temp_path = folder_path + "\\" + values[0] + file_ext
         # See if file already exists
         try:
             exist = os.path.exists(temp_path)
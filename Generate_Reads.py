@@ -9,16 +9,66 @@ It is designed to be paired up the Fragment Generator from this (Synthetic
 In-Silico Genome Generator) library, which imitates the DNA fragmentation
 process, and mimicks the NGS DNA sequencing process.
 
+Instead of a FASTA file of fragment sequences, a fragment coordinates table (as
+produced by the Fragment Generator using the "-t" option) can be used as input,
+alongside the genome folder (FASTA or ".2bit" files) from which the fragments
+were generated. Fragment sequences are then sliced out of the genome as needed
+and are never written to disk.
+
+The reads can be output as gzip-compressed FASTQ files. (BGZF format) The
+compression is performed by multiple threads while reads are being generated.
+
+The forward and reverse reads can also be output into a single interleaved FASTQ
+file, where each forward read is immediately followed by its mate. All reads are
+then written through one buffered output stream.
+
+A "truth" file can also be output, recording the true origin of every read,
+(chromosome, position, strand, CIGAR string, and the positions of any injected
+mismatches) so that aligners can be scored without parsing read names. The
+chromosome is only known if a fragment coordinates table is used as input.
+
+Insertion and deletion errors can also be simulated, at rates which increase
+within homopolymer runs.
+
+Long reads, such as those of PacBio or Oxford Nanopore sequencers, can also be
+simulated instead of short paired reads. Each fragment is then read once, from
+its start, with a read length drawn from a probability distribution.
+
+Reads longer than their fragment can also continue into adapter sequences, and
+then into poly-G tails, (as produced by two-colour sequencing chemistries) the
+way real reads do, instead of being truncated.
+
+Duplicate reads are planned for batches of fragments at once. PCR duplicates
+can share PCR errors, and optical duplicates can be generated close to their
+original cluster, with the tile, x, and y coordinates of each cluster included
+in the read names, for benchmarking duplicate marking tools.
+
+Reads can also be given compact, Illumina CASAVA-style names, which keep the
+FASTQ files small. Each name is made unique by its cluster coordinates, and the
+fragment and copy each read came from are then recorded in the truth file only.
+
 
 
 USAGE:
     
     python27 Generate_Reads.py <input_filepath> [-o <output_filepath_r1>
             <output_filepath_r2>] [-r <read_1_len> <read_2_len>] [-p <phred>]
-            [-q <avg_quality> N|G|U <stdev>|<alpha_mod>|<max_dist>] [-d
-            <avg_duplicates> N|G|U <stdev>|<alpha_mod>|<max_dist>] [-m
-            <min_duplicates> <max_duplicates>] [-t <avg_truncation> N|G|U
-            <stdev>|<alpha_mod>|<max_dist>] [-x <threads>] [-u <unique_id_mod>]
+            [-q <avg_quality> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-d
+            <avg_duplicates> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-m
+            <min_duplicates> <max_duplicates>] [-t <avg_truncation> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-x
+            <threads>] [-u <unique_id_mod>] [-g <genome_folder>] [-z Y|N] [-i
+            Y|N] [-s <truth_filepath>] [--metrics <metrics_filepath>] [--profile
+            [<pstats_filepath>]] [--checkpoint <checkpoint_interval>] [--resume]
+            [--shard <shard>/<shards>] [--quality-profile <quality_profile>]
+            [--indels <insertion_rate> <deletion_rate> <homopolymer_mod>]
+            [--long-reads <avg_read_length> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [--adapters
+            <adapter_1> <adapter_2>] [--poly-g Y|N] [--optical <optical_rate>
+            <optical_distance>] [--pcr-errors <pcr_error_rate>] [--casava Y|N]
+            [--max-n <max_n_fraction>]
 
 
 
@@ -28,6 +78,9 @@ MANDATORY:
         
         The filepath of the input folder containing the FASTA file from which
         the DNA reads will be generated.
+        
+        If a genome folder is specified, this is the filepath of a fragment
+        coordinates table instead.
 
 OPTIONAL:
     
@@ -108,6 +161,8 @@ OPTIONAL:
             N   Normal variate distribution
             G   Gama variate distribution
             U   Uniform distribution
+            E   Empirical distribution, from a histogram file
+            L   Log-normal distribution
     
     stdev
         
@@ -143,13 +198,29 @@ OPTIONAL:
         
         The furthest away from the specified average which a randomly generated
         value can be.
+    
+    histogram_file
+        
+        (Only applies if an Empirical distribution was specified)
+        
+        The filepath of a histogram file, from which random values are drawn.
+        A histogram file is a tab-separated file with two columns: a value, and
+        its weight. (A count or relative probability) Lines starting with "#"
+        are ignored. The average specified is not used.
+    
+    sigma
+        
+        (Only applies if a Log-normal distribution was specified)
+        
+        The standard deviation of the natural logarithm of the values. The
+        average of the values is the average specified.
         
     threads
         
         (DEFAULT: 1)
         
-        (Multithreading is not yet implemented. This is a placeholder.)
-        The number of threads to use.
+        The number of threads to use for compressing each output file, if the
+        output is compressed.
     
     unique_id_mod
     
@@ -158,6 +229,281 @@ OPTIONAL:
         A string prefix which forms part of the fragment ID. Allows reads from
         different runs to be pooled together and still have unique IDs relative
         to each other.
+    
+    genome_folder
+        
+        (DEFAULT: (None))
+        
+        The filepath of the genome folder (FASTA or ".2bit" files) from which
+        the fragments in the input fragment coordinates table were generated.
+        Specifying a genome folder indicates that the input file is a fragment
+        coordinates table rather than a FASTA file.
+    
+    Y|N
+        (-z)
+        
+        (DEFAULT: N)
+        
+        Whether or not to output gzip-compressed FASTQ files. Output files with
+        a gzip file extension (".gz") are always compressed.
+    
+    Y|N
+        (-i)
+        
+        (DEFAULT: N)
+        
+        Whether or not to output the forward and reverse reads into a single
+        interleaved FASTQ file. If so, only @output_filepath_r1 is used.
+    
+    truth_filepath
+        
+        (DEFAULT: (None))
+        
+        The filepath of the truth file to be output. No truth file is output if
+        this is not specified. Truth files are tab-separated text files with the
+        following columns:
+            
+            1) Read name
+            2) Chromosome name ("*" if the input is a FASTA file)
+            3) Position (1-based, of the leftmost nucleotide)
+            4) Strand (+/-)
+            5) CIGAR string
+            6) Mismatch positions (1-based, within the read, or "." if none)
+            7) Origin (Only with --casava. The name the read would otherwise
+               have had, describing its fragment and copy number)
+        
+        If the filepath ends in ".bin", the truth file is output in a compact
+        binary format instead. (See Truth_File.py for details)
+    
+    quality_profile
+        (--quality-profile)
+        
+        (DEFAULT: (None))
+        
+        The filepath of a quality profile, which is used to generate the quality
+        scores of the reads instead of the distribution specified with "-q".
+        The quality scores generated by a quality profile depend on the position
+        within the read, and optionally on the quality score of the previous
+        base, so they can decay along the read like those of real reads.
+        
+        A quality profile is a JSON file, as produced by Profile_FASTQ.py from
+        a real sequencing run. If the profile also contains a truncation length
+        distribution, it replaces the distribution specified with "-t". If the
+        profile also contains a substitution matrix, (profiles of SAM files) the
+        bases substituted by sequencing errors depend on the true base, its
+        quality score, and the preceding base, instead of being chosen
+        uniformly.
+        
+        Alternatively, a FASTQ file (".fq" or ".fastq", gzipped or not) may be
+        specified, and a quality profile will be learned from its reads. Its
+        quality scores must use the same phred system as @phred.
+    
+    insertion_rate
+        (--indels)
+        
+        (DEFAULT: 0)
+        
+        The probability of an insertion error occuring at each base, outside of
+        homopolymer runs.
+    
+    deletion_rate
+        (--indels)
+        
+        (DEFAULT: 0)
+        
+        The probability of a deletion error occuring at each base, outside of
+        homopolymer runs.
+    
+    homopolymer_mod
+        (--indels)
+        
+        (DEFAULT: 0)
+        
+        How much each additional base in a homopolymer run increases the rates
+        of insertion and deletion errors within that run. For a run of length
+        L, the rates are multiplied by:
+            
+            1 + homopolymer_mod * (L - 1)
+        
+        Insertions within homopolymer runs lengthen the run. The CIGAR strings
+        in the truth file record the insertions and deletions in each read.
+    
+    avg_read_length
+        (--long-reads)
+        
+        (DEFAULT: (None))
+        
+        Generate long reads instead of short paired reads. Each fragment is read
+        once, from its start, as a single read whose length is drawn from the
+        probability distribution which follows. (Reads cannot be longer than
+        their fragment) All reads are output to @output_filepath_r1, and the
+        read lengths and truncation settings are ignored.
+        
+        Unless "--indels" is also specified, the insertion rate, deletion rate,
+        and homopolymer modifier default to 0.03, 0.04, and 0.5 respectively.
+        
+        Sequencing errors are placed by skipping directly from one error to the
+        next, rather than testing every base. Quality scores are generated for
+        the whole read at once. (This is fastest for quality profiles, and for
+        empirical and uniform distributions)
+    
+    adapter_1
+        (--adapters)
+        
+        (DEFAULT: (None))
+        
+        The adapter sequence which forward reads continue into, when they are
+        longer than their fragment. The read-through bases are recorded as soft
+        clipped in the truth file. Reads are truncated instead if no adapters
+        are specified. (Not used for long reads)
+        
+        For Illumina TruSeq adapters, specify:
+            AGATCGGAAGAGCACACGTCTGAACTCCAGTCA
+    
+    adapter_2
+        (--adapters)
+        
+        (DEFAULT: (None))
+        
+        The adapter sequence which reverse reads continue into, when they are
+        longer than their fragment.
+        
+        For Illumina TruSeq adapters, specify:
+            AGATCGGAAGAGCGTCGTGTAGGGAAAGAGTGT
+    
+    poly_g
+        (--poly-g)
+        
+        (DEFAULT: N)
+        
+        Whether or not reads which run past the end of their fragment, (and
+        adapter, if specified) continue into a poly-G tail, as seen with
+        two-colour sequencing chemistries, instead of being truncated.
+    
+    optical_rate
+        (--optical)
+        
+        (DEFAULT: (None))
+        
+        The probability of each cluster having an optical duplicate: an extra
+        copy of the read or read pair, close to the original cluster on the
+        same tile. Optical duplicates can have optical duplicates of their own.
+        
+        If specified, the tile, x, and y coordinates of the cluster of each read
+        are appended to its name, (separated by colons) where duplicate marking
+        tools expect to find them. Specify 0 to include the coordinates without
+        generating optical duplicates.
+    
+    optical_distance
+        (--optical)
+        
+        (DEFAULT: (None))
+        
+        The maximum distance, in pixels along each axis, between a cluster and
+        its optical duplicates.
+    
+    pcr_error_rate
+        (--pcr-errors)
+        
+        (DEFAULT: 0)
+        
+        The per-base probability of a PCR error occuring in each fragment. PCR
+        errors are shared by all the duplicates of a fragment, unlike sequencing
+        errors. They are not recorded as mismatches in the truth file.
+    
+    casava
+        (--casava)
+        
+        (DEFAULT: N)
+        
+        Whether or not to give reads compact, Illumina CASAVA-style names, such
+        as:
+            SIM:1:FC1:1:1101:15377:2048 1:N:0:1
+        instead of names which describe the fragment each read came from. The
+        fields are the instrument, (prefixed by @unique_id_mod) the run number,
+        the flowcell, the lane, and the tile, x, and y coordinates of the
+        cluster. The instrument, run number, and flowcell are the same for
+        every read, and no two clusters share the same coordinates. (Lanes
+        after the first are only used once the first lane is full) Optical
+        duplicates are kept within 8 pixels of their original cluster. Both
+        mates share the same name.
+        
+        The true origin of each read should then be recorded in a truth file,
+        where the names of forward and reverse reads end in "/1" and "/2"
+        respectively. The fragment and copy number of each read are recorded
+        as its origin.
+    
+    max_n_fraction
+        (--max-n)
+        
+        (DEFAULT: 1)
+        
+        The maximum proportion of a fragment's bases which can be Ns. Fragments
+        with a greater proportion of Ns, such as those overlapping assembly
+        gaps, produce no reads. If a genome folder is specified, the N content
+        of each fragment is found using the composition index (".comp" file)
+        of its chromosome, which is built if it does not already exist.
+    
+    metrics_filepath
+        (--metrics)
+        
+        (DEFAULT: (None))
+        
+        Progress is reported to stderr periodically during long runs, giving the
+        amount of input processed, the number of fragments, reads, and bases
+        generated so far, the current chromosome, the throughput, and the
+        estimated time remaining. If a metrics filepath is specified, each
+        progress report is also written to that file as a single line of JSON.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent reading fragments, sampling,
+        assembling strings, and writing once the run is complete. If a filepath
+        is specified after the flag, the run is also profiled using cProfile,
+        and the statistics are saved to said file. (They can be examined using
+        the pstats module)
+    
+    checkpoint_interval
+        (--checkpoint)
+        
+        (DEFAULT: 0)
+        
+        The number of fragments to process between checkpoints. A checkpoint
+        records how far the run has progressed, so that an interrupted run can
+        be resumed without starting over. Checkpoints are written to a file
+        alongside @output_filepath_r1, which is deleted once the run finishes.
+        Specify 0 to disable checkpoints.
+    
+    --resume
+        
+        Resume an interrupted run from its last checkpoint. The same arguments
+        as the original run must be used. Output written after the last
+        checkpoint is discarded and generated again.
+    
+    shard/shards
+        (--shard)
+        
+        (DEFAULT: 1/1)
+        
+        Only generate the reads for one "shard" of the input file, so that a
+        single simulation can be split across multiple machines. The input file
+        is divided into byte ranges of equal size, and each shard processes the
+        fragments which start within its range. Shard numbers start at 1.
+        
+        Each shard only reads the input file up to the end of its range.
+        However, FASTA input files are parsed from the start to reach the first
+        fragment of the shard, so every shard parses most of the input file.
+        Fragment coordinates tables do not have this cost.
+        
+        Read names remain unique across shards. The shard number is added to
+        @unique_id_mod, or with --casava, each shard uses its own lanes.
+        
+        The shard number is inserted into the filepaths of all the output files,
+        so the same arguments can be used for every shard. Each shard also
+        outputs a summary file, which can be used to gather the shards together
+        using Gather_Shards.py.
 
 CONTEXTUAL FLAGS:
 (For specifying probability distribution parameters)
@@ -176,6 +522,11 @@ CONTEXTUAL FLAGS:
         
         Used to signify that the following parameters pertain to the probability
         distribution of truncation length.
+    
+    (--long-reads)
+        
+        Used to signify that the following parameters pertain to the probability
+        distribution of long read lengths.
 
 
 
@@ -196,6 +547,46 @@ EXAMPLES SCENARIO EXPLANATION:
     
     5:
     Single-end, 75bp sequencing.
+    
+    6:
+    Fragments are supplied as a fragment coordinates table, with sequences
+    taken from a packed genome.
+    
+    7:
+    Compressed output, using 4 compression threads per output file.
+    
+    8:
+    Compressed interleaved output, with both mates in a single file.
+    
+    9:
+    Reads from a fragment coordinates table, with a truth file for scoring
+    aligners.
+    
+    10:
+    Reads with insertion and deletion errors, which are three times as likely
+    in homopolymer runs of length 3, with a truth file recording their CIGAR
+    strings.
+    
+    11:
+    Long reads, with log-normally distributed lengths averaging 15kb, and low
+    quality scores.
+    
+    12:
+    Reads which continue into Illumina TruSeq adapters, and then into poly-G
+    tails, when their fragment is too short.
+    
+    13:
+    Duplicate reads for benchmarking duplicate marking tools. Each fragment has
+    1-5 PCR duplicates, which share PCR errors, and 2% of clusters have optical
+    duplicates within 100 pixels.
+    
+    14:
+    Reads with compact CASAVA-style names, with their true origins recorded in
+    a truth file.
+    
+    15:
+    Reads from a fragment coordinates table, skipping fragments which are more
+    than half Ns.
 
 EXAMPLES:
     
@@ -208,15 +599,54 @@ EXAMPLES:
     python27 Generate_Reads.py Path/Input_Frags.fa -d 3 U 2 -m 1 5
     
     python27 Generate_Reads.py Path/Input_Frags.fa -r 75 0
+    
+    python27 Generate_Reads.py Path/Input_Frags.tsv -g Path/Genome_2Bit
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa -z Y -x 4
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa -i Y -z Y
+    
+    python27 Generate_Reads.py Path/Input_Frags.tsv -g Path/Genome -s
+            Path/Truth.tsv
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa --indels 0.0005 0.001 1 -s
+            Path/Truth.tsv
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa --long-reads 15000 L 0.5 -q
+            12 N 3
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa --adapters
+            AGATCGGAAGAGCACACGTCTGAACTCCAGTCA AGATCGGAAGAGCGTCGTGTAGGGAAAGAGTGT
+            --poly-g Y
+    
+    python27 Generate_Reads.py Path/Input_Frags.fa -d 2 G 2 -m 1 5 --optical
+            0.02 100 --pcr-errors 0.0001
+    
+    python27 Generate_Reads.py Path/Input_Frags.tsv -g Path/Genome --casava Y
+            -s Path/Truth.tsv
+    
+    python27 Generate_Reads.py Path/Input_Frags.tsv -g Path/Genome --max-n 0.5
 
 USAGE:
     
     python27 Generate_Reads.py <input_filepath> [-o <output_filepath_r1>
             <output_filepath_r2>] [-r <read_1_len> <read_2_len>] [-p <phred>]
-            [-q <avg_quality> N|G|U <stdev>|<alpha_mod>|<max_dist>] [-d
-            <avg_duplicates> N|G|U <stdev>|<alpha_mod>|<max_dist>] [-m
-            <min_duplicates> <max_duplicates>] [-t <avg_truncation> N|G|U
-            <stdev>|<alpha_mod>|<max_dist>] [-x <threads>] [-u <unique_id_mod>]
+            [-q <avg_quality> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-d
+            <avg_duplicates> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-m
+            <min_duplicates> <max_duplicates>] [-t <avg_truncation> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [-x
+            <threads>] [-u <unique_id_mod>] [-g <genome_folder>] [-z Y|N] [-i
+            Y|N] [-s <truth_filepath>] [--metrics <metrics_filepath>] [--profile
+            [<pstats_filepath>]] [--checkpoint <checkpoint_interval>] [--resume]
+            [--shard <shard>/<shards>] [--quality-profile <quality_profile>]
+            [--indels <insertion_rate> <deletion_rate> <homopolymer_mod>]
+            [--long-reads <avg_read_length> N|G|U|E|L
+            <stdev>|<alpha_mod>|<max_dist>|<histogram_file>|<sigma>] [--adapters
+            <adapter_1> <adapter_2>] [--poly-g Y|N] [--optical <optical_rate>
+            <optical_distance>] [--pcr-errors <pcr_error_rate>] [--casava Y|N]
+            [--max-n <max_n_fraction>]
 """
 
 NAME = "Generate_Reads.py"
@@ -240,14 +670,32 @@ PRINT_METRICS = True
 
 FILEMOD__FASTQ_1 = "__READS_r1.fq"
 FILEMOD__FASTQ_2 = "__READS_r2.fq"
+FILEMOD__FASTQ_I = "__READS.fq"
+FILEMOD__GZIP = ".gz"
 
 # For name string
 DEFAULT__STR__unique_id_mod = ""
+STR__shard_id = "S{i}_" # Added to the unique ID of each shard
 COPY_DIGITS = 3
 STR__forward = "__r1"
 STR__reverse = "__r2"
+STR__name = "%s%s__%0" + str(COPY_DIGITS) + "d%s" # Precompiled template
+STR__cluster = ":%d:%d:%d"
+
+# For compact (CASAVA-style) name string
+STR__casava_instrument = "SIM"
+STR__casava_run = "1"
+STR__casava_flowcell = "FC1"
+STR__casava_name = ("%s" + STR__casava_instrument + ":" + STR__casava_run +
+        ":" + STR__casava_flowcell + ":%d:%d:%d:%d")
+STR__casava_forward = " 1:N:0:1"
+STR__casava_reverse = " 2:N:0:1"
+STR__casava_mate_1 = "/1"
+STR__casava_mate_2 = "/2"
 
-PRINT_INTERVAL = 10000
+PRINT_INTERVAL = 10000 # Number of fragments between progress checks
+
+OUTPUT_BUFFER = 1048576 # Buffer size for uncompressed output files
 
 
 
@@ -275,6 +723,21 @@ DEFAULT__trunc_param = 0
 
 DEFAULT__threads = 1
 
+DEFAULT__compress = False
+DEFAULT__interleaved = False
+
+DEFAULT__checkpoint = 0
+
+DEFAULT__long_insertion_rate = 0.03
+DEFAULT__long_deletion_rate = 0.04
+DEFAULT__long_homopolymer_mod = 0.5
+
+DEFAULT__poly_g = False
+
+DEFAULT__casava = False
+
+DEFAULT__max_n = 1
+
 
 
 # Imported Modules #############################################################
@@ -284,15 +747,31 @@ import os
 
 import random as Random
 
+from math import log
+
 
 
 import _Controlled_Print as PRINT
+import Profiler as PROFILE
 from _Command_Line_Parser import *
 
 from NSeq_Match import *
 from Phred import *
+from Reverse_Complement import *
 
 from FASTA_File_Reader import *
+from Packed_Genome import *
+from Composition_Index import *
+from Gzip_File_Writer import *
+from Truth_File import *
+from Progress import *
+from Checkpoint import *
+from Alias_Table import *
+from Quality_Model import *
+from Substitution_Model import *
+from Indel_Model import *
+from Duplicate_Planner import *
+from Shards import *
 
 
 
@@ -302,6 +781,9 @@ class DIST: # For Distribution
     NORMAL=1 # If this is changed, sync relevant defaults
     GAMMA=2
     UNIFORM=3
+    EMPIRICAL=4
+    PROFILE=5 # Quality profile. Not specified using a distribution parameter
+    LOGNORMAL=6
 
 
 
@@ -343,16 +825,57 @@ For the distribution model, please specify one of:
     NORMAL
     GAMMA
     UNIFORM
+    EMPIRICAL
+    LOGNORMAL
 
 For the parameter, depending on the distribution model chosen, please specify:
     NORMAL - A non-negative number.
     GAMMA - A non-zero number.
-    UNIFORM - A non-negative integer."""
+    UNIFORM - A non-negative integer.
+    EMPIRICAL - The filepath of a valid histogram file.
+    LOGNORMAL - A positive number. (The average must also be positive)"""
 
 STR__invalid_threads = """
 ERROR: Invalid number of threads specified: {s}
 Please specify a positive integer."""
 
+STR__invalid_checkpoint = """
+ERROR: Invalid checkpoint interval specified: {s}
+Please specify a non-negative integer."""
+
+STR__invalid_indels = """
+ERROR: Invalid indel settings:
+    {s1}
+    {s2}
+    {s3}
+Please specify two probabilities between 0 and 1, and a non-negative number."""
+
+STR__invalid_adapters = """
+ERROR: Invalid adapter sequences:
+    {s1}
+    {s2}
+Please specify two sequences, consisting only of the letters A, C, G, T, and
+N."""
+
+STR__invalid_optical = """
+ERROR: Invalid optical duplicate settings:
+    {s1}
+    {s2}
+Please specify a probability between 0 and 1, and a non-negative integer."""
+
+STR__invalid_pcr_errors = """
+ERROR: Invalid PCR error rate: {s}
+Please specify a probability between 0 and 1."""
+
+STR__invalid_max_n = """
+ERROR: Invalid maximum proportion of Ns: {s}
+Please specify a number between 0 and 1."""
+
+STR__invalid_shard = """
+ERROR: Invalid shard specified: {s}
+Please specify the shard number and the number of shards, in the format "i/N".
+The shard number must be between 1 and N."""
+
 
 
 STR__input_invalid = "\nERROR: An unexpected error occured when reading from "\
@@ -361,6 +884,8 @@ STR__output_invalid = "\nERROR: An unexpected error occured when writing to "\
         "the output file."
 STR__generation_invalid = "\nERROR: An unexpected error occured during the "\
         "fragment generation process."
+STR__checkpoint_invalid = "\nERROR: No checkpoint matching these arguments "\
+        "was found to resume from."
 
 
 
@@ -404,6 +929,10 @@ non-negative number."""]
 LIST__normal = ["N", "n", "NORMAL", "Normal", "normal", "NORM", "Norm", "norm"]
 LIST__gamma = ["G", "g", "GAMMA", "Gamma", "gamma"]
 LIST__uniform = ["U", "u", "UNIFORM", "Uniform", "uniform", "UNI", "Uni", "uni"]
+LIST__empirical = ["E", "e", "EMPIRICAL", "Empirical", "empirical", "EMP",
+        "Emp", "emp"]
+LIST__lognormal = ["L", "l", "LOGNORMAL", "LogNormal", "Lognormal", "lognormal",
+        "LOGNORM", "LogNorm", "Lognorm", "lognorm"]
 
 
 
@@ -413,6 +942,8 @@ DICT__dists = {}
 for i in LIST__normal: DICT__dists[i] = DIST.NORMAL
 for i in LIST__gamma: DICT__dists[i] = DIST.GAMMA
 for i in LIST__uniform: DICT__dists[i] = DIST.UNIFORM
+for i in LIST__empirical: DICT__dists[i] = DIST.EMPIRICAL
+for i in LIST__lognormal: DICT__dists[i] = DIST.LOGNORMAL
 
 
 
@@ -428,7 +959,11 @@ PRINT.PRINT_METRICS = PRINT_METRICS
 
 def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
             duplicate_settings, duplicate_minmax, truncation_settings, threads,
-            unique_id_mod):
+            unique_id_mod, genome="", compress=False, interleaved=False,
+            truth_path="", metrics_path="", checkpoint_interval=0,
+            resume=False, shard=None, quality_profile="", indel_settings=None,
+            long_read_settings=None, adapters=None, poly_g=False,
+            optical_settings=None, pcr_error_rate=0, casava=False, max_n=1):
     """
     Generate a series of DNA reads from the DNA fragments in a FASTA file. This
     is designed to imitate the sequencing of DNA fragments in NGS.
@@ -436,7 +971,8 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
     @path_in
             (str - filepath)
             The filepath of the FASTA file which contains the DNA fragment
-            sequences.
+            sequences. If [genome] is specified, this is the filepath of a
+            fragment coordinates table instead.
     @paths_out
             (list<str - filepath))
             The files to which the forward and reverse reads respectively are
@@ -469,6 +1005,7 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
                         0: Normal distribution
                         1: Gamma distribution
                         2: Uniform distribution
+                        3: Empirical distribution
                 3)  (float)
                     The paramter variable to use for the statistical
                     distribution specified by the second variable in this list.
@@ -484,6 +1021,9 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
                             This variable is the difference between the mean of
                             the distribution, and either the upper or lower
                             limits of the distribution range.
+                        EMPIRICAL DISTRIBUTION:
+                            This variable is the filepath of a histogram file.
+                            The mean is not used.
     @duplicate_settings
             ([int, int, float])
             The "quality score" settings used for randomly generating the
@@ -503,13 +1043,89 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
             @quality_settings. (See above)
     @threads
             (int)
-            The number of threads to use. (Multi-threading) Functionality not
-            implemented yet.
+            The number of threads to use for compressing each output file.
     @unique_id_mod
             (str)
             A string prefix which forms part of the fragment ID. Allows reads
             from different runs to be pooled together and still have unique
             IDs relative to each other.
+    @genome
+            (str - dirpath)
+            The filepath of the genome folder from which the fragment sequences
+            are to be obtained, if [path_in] is a fragment coordinates table.
+            An empty string indicates that [path_in] is a FASTA file.
+    @compress
+            (bool)
+            Whether or not to gzip-compress the output files.
+    @interleaved
+            (bool)
+            Whether or not to write the forward and reverse reads into a single
+            interleaved file. (The first of [paths_out])
+    @truth_path
+            (str - filepath)
+            The filepath of the truth file to be written. No truth file is
+            written if this is an empty string.
+    @metrics_path
+            (str - filepath)
+            The filepath of the file to which progress reports are written, as
+            JSON lines. Progress reports are only written to stderr if this is
+            an empty string.
+    @checkpoint_interval
+            (int)
+            The number of fragments to process between checkpoints. No
+            checkpoints are written if this is 0.
+    @resume
+            (bool)
+            Whether or not to resume an interrupted run from its last
+            checkpoint.
+    @shard
+            ([int, int])
+            The shard number and the number of shards, if only one shard of the
+            input file is to be processed. A shard summary file is also written.
+    @quality_profile
+            (str - filepath)
+            The filepath of a quality profile, (or a FASTQ file to learn one
+            from) which replaces [quality_settings] if specified. If the profile
+            contains a substitution matrix, it is also used to choose the bases
+            substituted by sequencing errors.
+    @indel_settings
+            ([float, float, float])
+            The insertion rate, deletion rate, and homopolymer modifier, for
+            simulating insertion and deletion errors. No insertion or deletion
+            errors are simulated if this is not specified.
+    @long_read_settings
+            ([int/float, int, int/float])
+            The average, distribution method, and distribution parameter of the
+            read lengths of long reads. If specified, each fragment is read once
+            from its start, and [read_lengths] and [truncation_settings] are
+            ignored.
+    @adapters
+            ([str, str])
+            The adapter sequences which forward and reverse reads continue into
+            respectively, when they are longer than their fragment. Reads are
+            truncated instead if this is not specified.
+    @poly_g
+            (bool)
+            Whether or not reads which run past the end of their fragment and
+            adapter continue into a poly-G tail.
+    @optical_settings
+            ([float, int])
+            The probability of a cluster having an optical duplicate, and the
+            maximum distance between them. If specified, the cluster
+            coordinates of each read are included in its name.
+    @pcr_error_rate
+            (float)
+            The per-base probability of a PCR error, shared by all the
+            duplicates of a fragment.
+    @casava
+            (bool)
+            Whether or not to give reads compact, CASAVA-style names, containing
+            the fragment number, copy number, and cluster coordinates of each
+            read instead of the name of its fragment.
+    @max_n
+            (float)
+            The maximum proportion of a fragment's bases which can be Ns.
+            Fragments with a greater proportion of Ns produce no reads.
     
     Return a value of 0 if the function runs successfully.
     Return a value of 1 if there is a problem with the input file.
@@ -517,9 +1133,13 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
     Return a value of 3 if there is a problem during the read generation
             process.
     Return a value of 4 if there is a problem with [phred].
+    Return a value of 5 if there is no valid checkpoint to resume from.
     
     Generate_Reads(str, str, [int, int], [int, int, float], [int, int, float],
-            [int, int], [int, int, float], int) -> int
+            [int, int], [int, int, float], int, str, str, bool, bool, str,
+            str, int, bool, [int, int], str, [float, float, float],
+            [int/float, int, int/float], [str, str], bool, [float, int],
+            float, bool, float) -> int
     """
     # Setup reporting
     fragments = 0
@@ -530,29 +1150,125 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
     errors_reverse = 0
     cumulative_score = 0
     cumulative_copies = 0
+    # Checkpoint
+    checkpoint_path = Get_Checkpoint_Path(paths_out[0])
+    settings = [path_in, paths_out, read_lengths, quality_settings,
+            duplicate_settings, duplicate_minmax, truncation_settings,
+            unique_id_mod, genome, compress, interleaved, truth_path, shard,
+            quality_profile, indel_settings, long_read_settings, adapters,
+            poly_g, optical_settings, pcr_error_rate, casava, max_n]
+    if resume:
+        checkpoint = Read_Checkpoint(checkpoint_path)
+        if not checkpoint or not Settings_Match(checkpoint, settings): return 5
+        offsets = checkpoint["outputs"] + [checkpoint["truth"]]
+    else:
+        checkpoint = None
+        offsets = [-1, -1, -1]
     # Calculate distribution parameters
     quality_settings = Calculate_Dist_Params(quality_settings)
     duplicate_settings = Calculate_Dist_Params(duplicate_settings)
     truncation_settings = Calculate_Dist_Params(truncation_settings)
+    if long_read_settings:
+        long_read_settings = Calculate_Dist_Params(long_read_settings)
     # Phred
     if type(phred) == str:
         if phred in LIST__phred33: phred = DICT__scores_to_chars__phred33
         elif phred in LIST__phred64: phred = DICT__scores_to_chars__phred64
         else: return 4
+    # Quality profile
+    if quality_profile:
+        model = Load_Quality_Model(quality_profile, ord(phred[0]))
+        if not model: return 1
+        quality_settings = [0, DIST.PROFILE, model]
+        truncations = Load_Profile_Histogram(quality_profile, "truncations")
+        if truncations: truncation_settings = [0, DIST.EMPIRICAL, truncations]
+        substitutions = Load_Substitution_Model(quality_profile)
+    else: substitutions = None
+    # Indels
+    if indel_settings and ( indel_settings[0] or indel_settings[1] ):
+        indels = Indel_Model(*indel_settings)
+    else: indels = None
+    # Read-through sequences, built once for all reads
+    if ( adapters or poly_g ) and not long_read_settings:
+        extensions = []
+        for i in range(2):
+            if adapters: extension = adapters[i]
+            else: extension = ""
+            if poly_g: extension += "G" * read_lengths[i]
+            extensions.append(extension)
+    else: extensions = None
+    # Duplicates
+    if optical_settings: optical_rate, optical_distance = optical_settings
+    else: optical_rate, optical_distance = [0, 0]
+    planner = Duplicate_Planner(Custom_Random_Distribution, duplicate_settings,
+            duplicate_minmax, optical_rate, optical_distance,
+            bool(optical_settings) or casava, pcr_error_rate, casava, shard)
     # Setup the I/O
     try:
-        f = FASTA_Reader()
-        f.Open(path_in)
+        if genome:
+            f = Fragment_Table_Reader(genome)
+            if f.Open(path_in): return 1
+        else:
+            f = FASTA_Reader()
+            f.Open(path_in)
     except:
         return 1
+    if max_n < 1 and genome: composition = Genome_Composition(f.genome)
+    else: composition = None
+    if shard:
+        try:
+            first, last, start, end = Get_Shard_Range(path_in, genome, shard[0],
+                    shard[1])
+        except:
+            return 1
+        limit = last - first
+    else:
+        first = start = 0
+        end = os.path.getsize(path_in)
+        limit = -1
     try:
-        if read_lengths[0]: o1 = open(paths_out[0], "w")
-        else: o1 = None
-        if read_lengths[1]: o2 = open(paths_out[1], "w")
-        else: o2 = None
+        if interleaved:
+            o1 = o2 = Open_Output(paths_out[0], compress, threads, offsets[0])
+        else:
+            if read_lengths[0]:
+                o1 = Open_Output(paths_out[0], compress, threads, offsets[0])
+            else: o1 = None
+            if read_lengths[1]:
+                o2 = Open_Output(paths_out[1], compress, threads, offsets[1])
+            else: o2 = None
         o = [o1, o2]
+        if truth_path:
+            truth = Truth_File_Writer()
+            if truth.Open(truth_path, offsets[2]): return 2
+        else: truth = None
+        progress = Progress_Reporter(NAME, "bytes", end - start, metrics_path,
+                append = resume)
     except:
         return 2
+    consumed = 0 # Approximate number of bytes of input processed
+    # Shard
+    if genome: f.Seek(start)
+    else:
+        for i in range(first): f.Read()
+    # Resume
+    if checkpoint:
+        if not checkpoint_interval:
+            checkpoint_interval = checkpoint["interval"]
+        (fragments, reads, bases_forward, errors_forward, bases_reverse,
+                errors_reverse, cumulative_score, cumulative_copies) = (
+                checkpoint["metrics"])
+        consumed = checkpoint["consumed"]
+        if genome: f.Seek(checkpoint["input"])
+        else:
+            for i in range(fragments): f.Read()
+        Set_RNG_State(checkpoint["rng"])
+        planner.Set_State(checkpoint.get("plans"))
+        progress.Skip(consumed)
+    report_at = fragments - (fragments % PRINT_INTERVAL) + PRINT_INTERVAL
+    if checkpoint_interval:
+        checkpoint_at = (fragments - (fragments % checkpoint_interval) +
+                checkpoint_interval)
+    else: checkpoint_at = -1
     # Muli-threading
     """
     TODO: Multi-threading has not yet been implemented.
@@ -560,12 +1276,20 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
     threading = None
     # Main loop
     PRINT.printP(STR__GenReads_begin)
-    while not f.End():
+    while not f.End() and fragments != limit:
         f.Read()
         frag = f.Get_Current_SOFT()
-        metrics = Generate_Reads_From_Frag(frag, o, phred, read_lengths,
-            quality_settings, duplicate_settings, duplicate_minmax,
-            truncation_settings, threading, unique_id_mod)
+        if max_n < 1 and Exceeds_Max_N(frag, max_n, composition):
+            metrics = [0, 0, 0, 0, 0, 0, 0]
+        else:
+            plan = planner.Next()
+            if pcr_error_rate and plan:
+                frag = [frag[0], frag[1], planner.Apply_PCR_Errors(frag[2])]
+            metrics = Generate_Reads_From_Frag(frag, o, phred, read_lengths,
+                quality_settings, duplicate_settings, duplicate_minmax,
+                truncation_settings, threading, unique_id_mod, truth,
+                substitutions, indels, long_read_settings, extensions, plan,
+                casava)
         # Update metrics
         fragments += 1
         reads += metrics[0]
@@ -575,25 +1299,178 @@ def Generate_Reads(path_in, paths_out, phred, read_lengths, quality_settings,
         errors_reverse += metrics[4]
         cumulative_score += metrics[5]
         cumulative_copies += metrics[6]
+        # Progress
+        if genome: consumed += len(frag[0]) + len(frag[1]) + 2
+        else: consumed += len(frag[0]) + len(frag[2]) + 3
+        if fragments == report_at:
+            if genome: chr_name = frag[1].split("\t", 1)[0]
+            else: chr_name = None
+            progress.Update(consumed, chr_name, fragments = fragments,
+                    reads = reads, bases = bases_forward + bases_reverse)
+            report_at += PRINT_INTERVAL
+        # Checkpoint
+        if fragments == checkpoint_at:
+            for output in o + [truth]:
+                if output: output.flush()
+            if genome: input_offset = f.Get_Offset()
+            else: input_offset = -1
+            Write_Checkpoint(checkpoint_path, {"settings": settings,
+                    "interval": checkpoint_interval, "input": input_offset,
+                    "outputs": [Get_Output_Offset(output) for output in o],
+                    "truth": Get_Output_Offset(truth), "rng": Get_RNG_State(),
+                    "plans": planner.Get_State(),
+                    "consumed": consumed, "metrics": [fragments, reads,
+                    bases_forward, errors_forward, bases_reverse,
+                    errors_reverse, cumulative_score, cumulative_copies]})
+            checkpoint_at += checkpoint_interval
     # Finish up
-    if read_lengths[0]: o1.close()
-    if read_lengths[1]: o2.close()
+    progress.End_Section(consumed, fragments = fragments, reads = reads,
+            bases = bases_forward + bases_reverse)
+    progress.Finish()
+    if o1: o1.close()
+    if o2 and o2 is not o1: o2.close()
+    if truth: truth.Close()
+    if composition: composition.Close()
     f.Close()
+    if checkpoint_interval: Remove_Checkpoint(checkpoint_path)
+    if shard:
+        if read_lengths[0] or interleaved: path_out_1 = paths_out[0]
+        else: path_out_1 = ""
+        if read_lengths[1] and not interleaved: path_out_2 = paths_out[1]
+        else: path_out_2 = ""
+        try:
+            Write_Shard_Summary(paths_out[0] + FILEMOD__SHARD, NAME, shard[0],
+                    shard[1], [path_out_1, path_out_2, truth_path],
+                    [fragments, reads, bases_forward, errors_forward,
+                    bases_reverse, errors_reverse, cumulative_score,
+                    cumulative_copies])
+        except:
+            return 2
     PRINT.printP(STR__GenReads_complete)
     # Reporting
     Report_Metrics(fragments, reads, bases_forward, errors_forward,
             bases_reverse, errors_reverse, cumulative_score, cumulative_copies)
+    PROFILE.Report()
     # Wrap up
     return 0
 
 
 
+def Open_Output(file_path, compress, threads, offset=-1):
+    """
+    Open an output file for writing. A Gzip File Writer is returned if
+    [compress] is True or [file_path] has a gzip file extension, and a regular
+    file object is returned otherwise.
+    
+    If [offset] is specified, the existing file is kept up to [offset] bytes,
+    and written to from there. (When resuming from a checkpoint)
+    
+    Raise an IOError if the file cannot be opened.
+    
+    Open_Output(str, bool, int, int) -> file/Gzip_File_Writer
+    """
+    if compress or Is_Gzip_Path(file_path):
+        o = Gzip_File_Writer("", threads)
+        if o.Open(file_path, offset): raise IOError
+    elif offset >= 0:
+        o = Open_Truncated(file_path, offset, "r+", OUTPUT_BUFFER)
+    else:
+        o = open(file_path, "w", OUTPUT_BUFFER)
+    return PROFILE.Wrap_File(o, "Writing")
+
+def Get_Output_Offset(output):
+    """
+    Return the current position in an output file, which should have just been
+    flushed, for recording in a checkpoint.
+    
+    Return -1 if there is no output file.
+    
+    Get_Output_Offset(file/Gzip_File_Writer/Truth_File_Writer) -> int
+    """
+    if not output: return -1
+    return output.tell()
+
+
+
+def Get_Shard_Range(path_in, table, shard, shards):
+    """
+    Return the range of fragments within the input file at [path_in] which are
+    to be processed by the specified shard.
+    
+    The input file is divided into byte ranges of equal size, and each fragment
+    belongs to the shard whose range contains the start of its record. A record
+    is a single line if [table] is specified, (a fragment coordinates table) and
+    a FASTA entry otherwise.
+    
+    Return a list containing the index of the shard's first fragment, the index
+    after its last fragment, and the byte offsets of the start and end of its
+    records.
+    
+    Get_Shard_Range(str, str, int, int) -> [int, int, int, int]
+    """
+    lower, upper = Get_Shard_Bounds(os.path.getsize(path_in), shard, shards)
+    first = last = 0
+    start = end = -1
+    offset = 0
+    f = open(path_in, "rb")
+    for line in f:
+        if table or line.startswith(">"):
+            if offset < lower: first += 1
+            elif offset < upper:
+                if start == -1: start = offset
+            else:
+                end = offset
+                break
+            last += 1
+        offset += len(line)
+    f.close()
+    if end == -1: end = offset
+    if start == -1: start = end
+    return [first, last, start, end]
+
 def Generate_Reads_From_Frag(frag, outputs, phred, read_lengths,
             quality_settings, duplicate_settings, duplicate_minmax,
-            truncation_settings, threading, unique_id_mod):
+            truncation_settings, threading, unique_id_mod, truth=None,
+            substitutions=None, indels=None, long_reads=None, extensions=None,
+            plan=None, casava=False):
     """
     Generate a number of DNA reads from a given DNA fragment.
     
+    All the reads from the fragment are written to each output with a single
+    write. If both outputs are the same, the forward and reverse reads are
+    interleaved.
+    
+    If a Truth File Writer is supplied as [truth], the true origin of each read
+    is written to it.
+    
+    If a Substitution Model is supplied as [substitutions], it is used to choose
+    the bases substituted by sequencing errors.
+    
+    If an Indel Model is supplied as [indels], insertion and deletion errors are
+    also simulated. The homopolymer runs of the fragment are only mapped once,
+    for all of its reads.
+    
+    If the read length distribution settings are supplied as [long_reads], a
+    single long read is generated from the start of the fragment instead of a
+    pair of short reads.
+    
+    If the read-through sequences for forward and reverse reads are supplied as
+    [extensions], reads which are longer than the fragment continue into them,
+    instead of being truncated.
+    
+    If a duplicate plan (as produced by a Duplicate Planner) is supplied as
+    [plan], one read or read pair is generated for each copy in the plan,
+    instead of drawing the number of duplicates. Cluster coordinates in the plan
+    are appended to the read names.
+    
+    If [casava] is True, the reads are given compact, CASAVA-style names
+    instead, built from the cluster coordinates in [plan]. The names which
+    describe the fragment are then written to [truth] as the origins of the
+    reads.
+    
+    The names of every copy are formatted at once, before any reads are
+    generated.
+    
     Return a list containing various metrics for how this operation went.
     
     This is a modular component of Generate_Reads. Generate_Reads works with an
@@ -614,39 +1491,109 @@ def Generate_Reads_From_Frag(frag, outputs, phred, read_lengths,
     min_, max_ = duplicate_minmax
     d1, d2, d3 = duplicate_settings
     t1, t2, t3 = truncation_settings
+    if long_reads: l1, l2, l3 = long_reads
+    # Output buffers
+    sb_f = []
+    if outputs[0] is outputs[1]: sb_r = sb_f # Interleaved
+    else: sb_r = []
+    # Truth
+    if truth:
+        chr_name, frag_start, frag_end, frag_sense = Get_Frag_Coords(frag)
+        mismatches = []
+    else: mismatches = None
+    # Indels
+    if indels: run_map = indels.Get_Run_Map(frag_seq)
+    # Reverse complement of the end of the fragment, shared by all reverse reads
+    if length_r and not long_reads:
+        if indels: tail = frag_seq[-length_r*2:] # Extra template for deletions
+        else: tail = frag_seq[-length_r:]
+        tail = Reverse_Complement(tail)
+        if indels: tail_map = indels.Get_Run_Map(tail)
     # Determine duplicates
-    if min_ == max_:
+    if plan != None:
+        duplicates = len(plan)
+    elif min_ == max_:
         duplicates = min_
     else:
         duplicates = Custom_Random_Distribution(d1, d2, d3)
         if duplicates < min_: duplicates = min_
         elif duplicates > max_: duplicates = max_
+    # Names
+    if casava:
+        names = Generate_CASAVA_Names(unique_id_mod, plan)
+        plan = None # Origins do not need cluster coordinates
+    if truth or not casava:
+        names_f = Generate_Names(unique_id_mod, frag_name, duplicates,
+                STR__forward, plan)
+        if length_r and not long_reads:
+            names_r = Generate_Names(unique_id_mod, frag_name, duplicates,
+                    STR__reverse, plan)
     # Per duplicate
     while duplicates > 0:
         # Lengths
-        if ( t2 == DIST.NORMAL and t3 == 0 ):
-            if type(t1) == float: t1 = int(t1+0.5)
-            trunc_f = trunc_r = t1
+        if long_reads: # Single read of the whole fragment
+            temp_f = Custom_Random_Distribution(l1, l2, l3, True)
+            if temp_f > len(frag_seq): temp_f = len(frag_seq)
+            temp_r = 0
         else:
-            trunc_f = Custom_Random_Distribution(t1, t2, t3)
-            trunc_r = Custom_Random_Distribution(t1, t2, t3)
-        if trunc_f < 0: trunc_f = 0
-        if trunc_r < 0: trunc_r = 0
-        temp_f = length_f - trunc_f
-        temp_r = length_r - trunc_r
+            if ( t2 == DIST.NORMAL and t3 == 0 ):
+                if type(t1) == float: t1 = int(t1+0.5)
+                trunc_f = trunc_r = t1
+            else:
+                trunc_f = Custom_Random_Distribution(t1, t2, t3)
+                trunc_r = Custom_Random_Distribution(t1, t2, t3)
+            if trunc_f < 0: trunc_f = 0
+            if trunc_r < 0: trunc_r = 0
+            temp_f = length_f - trunc_f
+            temp_r = length_r - trunc_r
         # Generate reads
         flag_copy = False
         if temp_f > 1: # Forward
             # Generate read
-            name = Generate_Name(unique_id_mod, frag_name, duplicates,
-                    STR__forward)
-            seq = frag_seq[:temp_f]
-            results = Generate_Read_From_Seq(seq, phred, temp_f,
-                    quality_settings)
+            if casava:
+                name = names[duplicates-1]
+                header = name + STR__casava_forward
+                name += STR__casava_mate_1
+                if truth: origin = names_f[duplicates-1]
+            else:
+                name = header = names_f[duplicates-1]
+                origin = ""
+            if indels: # Deletions may require extra template
+                seq, span, cigar, count = indels.Apply(frag_seq[:temp_f*2],
+                        temp_f, run_map)
+            else:
+                seq = frag_seq[:temp_f]
+                count = 0
+            clip = 0
+            if extensions and len(seq) < temp_f: # Read-through
+                temp = extensions[0][:temp_f - len(seq)]
+                clip = len(temp)
+                seq += temp
+            if long_reads:
+                results = Generate_Long_Read_From_Seq(seq, phred,
+                        quality_settings, mismatches, substitutions)
+            else:
+                results = Generate_Read_From_Seq(seq, phred, temp_f,
+                        quality_settings, mismatches, substitutions)
             read, scores, errors, total = results
+            errors += count
             # Write
-            sb = "@" + name + "\n" + read + "\n+\n" + scores + "\n"
-            outputs[0].write(sb)
+            sb_f.append("@" + header + "\n" + read + "\n+\n" + scores + "\n")
+            if truth:
+                if indels:
+                    length = span
+                    cigar = Format_CIGAR(cigar, not frag_sense)
+                else:
+                    length = len(read) - clip
+                    cigar = str(length) + "M"
+                if clip: # Soft clip the read-through
+                    if frag_sense: cigar += str(clip) + "S"
+                    else: cigar = str(clip) + "S" + cigar
+                if frag_sense: pos = frag_start
+                else: pos = frag_end - length + 1
+                truth.Write(name, chr_name, pos, frag_sense, cigar,
+                        mismatches, origin)
+                mismatches = []
             # Metrics
             reads += 1
             bases_forward += temp_f
@@ -655,16 +1602,46 @@ def Generate_Reads_From_Frag(frag, outputs, phred, read_lengths,
             cumulative_score += total
         if temp_r > 1: # Reverse
             # Generate read
-            name = Generate_Name(unique_id_mod, frag_name, duplicates,
-                    STR__reverse)
-            temp = frag_seq[-temp_r:]
-            seq = Get_Complement(temp)
+            if casava:
+                name = names[duplicates-1]
+                header = name + STR__casava_reverse
+                name += STR__casava_mate_2
+                if truth: origin = names_r[duplicates-1]
+            else:
+                name = header = names_r[duplicates-1]
+                origin = ""
+            if indels: # Deletions may require extra template
+                seq, span, cigar, count = indels.Apply(tail[:temp_r*2], temp_r,
+                        tail_map)
+            else:
+                seq = tail[:temp_r]
+                count = 0
+            clip = 0
+            if extensions and len(seq) < temp_r: # Read-through
+                temp = extensions[1][:temp_r - len(seq)]
+                clip = len(temp)
+                seq += temp
             results = Generate_Read_From_Seq(seq, phred, temp_r,
-                    quality_settings)
+                    quality_settings, mismatches, substitutions)
             read, scores, errors, total = results
+            errors += count
             # Write
-            sb = "@" + name + "\n" + read + "\n+\n" + scores + "\n"
-            outputs[1].write(sb)
+            sb_r.append("@" + header + "\n" + read + "\n+\n" + scores + "\n")
+            if truth:
+                if indels:
+                    length = span
+                    cigar = Format_CIGAR(cigar, frag_sense)
+                else:
+                    length = len(read) - clip
+                    cigar = str(length) + "M"
+                if clip: # Soft clip the read-through
+                    if frag_sense: cigar = str(clip) + "S" + cigar
+                    else: cigar += str(clip) + "S"
+                if frag_sense: pos = frag_end - length + 1
+                else: pos = frag_start
+                truth.Write(name, chr_name, pos, not frag_sense, cigar,
+                        mismatches, origin)
+                mismatches = []
             # Metrics
             reads += 1
             bases_reverse += temp_r
@@ -674,16 +1651,86 @@ def Generate_Reads_From_Frag(frag, outputs, phred, read_lengths,
         #
         if flag_copy: cumulative_copies += 1
         duplicates -= 1
+    # Write
+    if sb_f: outputs[0].write("".join(sb_f))
+    if sb_r and sb_r is not sb_f: outputs[1].write("".join(sb_r))
     # Return
     return [reads, bases_forward, errors_forward, bases_reverse,
             errors_reverse, cumulative_score, cumulative_copies]
 
-def Generate_Read_From_Seq(seq, phred, length, quality_settings):
+def Get_Frag_Coords(frag):
+    """
+    Return the chromosome, start, end, and directionality of a fragment, as
+    read from either a fragment coordinates table or a FASTA file.
+    
+    For fragments from a fragment coordinates table, these are taken from the
+    annotation. For fragments from a FASTA file, the end and directionality are
+    taken from the fragment name, (see Generate_Frag_Name() in
+    Generate_Fragments.py) the start is calculated from the length of the
+    sequence, and the chromosome is unknown. ("*")
+    
+    Get_Frag_Coords([str, str, str]) -> [str, int, int, bool]
+    """
+    frag_name, anno, frag_seq = frag
+    values = anno.split("\t")
+    if len(values) == 4: # Fragment coordinates table
+        try:
+            return [values[0], int(values[1]), int(values[2]),
+                    values[3] != "-"]
+        except:
+            pass
+    try: # Name ends in "_<direction>_<end>"
+        temp, direction, end = frag_name.rsplit("_", 2)
+        end = int(end)
+        return ["*", end - len(frag_seq) + 1, end, direction != "R"]
+    except:
+        return ["*", 0, 0, True]
+
+def Exceeds_Max_N(frag, max_n, composition=None):
+    """
+    Return True if the proportion of Ns in the fragment [frag] is greater than
+    [max_n], and False otherwise.
+    
+    If [composition] is specified, the fragment is assumed to be from a
+    fragment coordinates table, and its N content is looked up in the
+    composition index of its chromosome. Otherwise, its sequence is counted.
+    
+    @frag
+            ([str, str, str])
+            The name, annotation, and sequence of the fragment.
+    @max_n
+            (float)
+            The maximum proportion of the fragment's bases which can be Ns.
+    @composition
+            (Genome_Composition)
+            The composition indexes of the genome the fragment came from.
+    
+    Exceeds_Max_N([str, str, str], float, Genome_Composition) -> bool
+    """
+    if composition:
+        values = frag[1].split("\t")
+        counts = composition.Count(values[0], int(values[1]), int(values[2]))
+    else: counts = Count_Composition(frag[2])
+    if not counts: return False
+    total = sum(counts)
+    return total > 0 and counts[4] > max_n * total
+
+
+def Generate_Read_From_Seq(seq, phred, length, quality_settings,
+            mismatches=None, substitutions=None):
     """
     Generate a DNA read from a given DNA sequence.
     
     This is a modular component of Generate_Reads_From_Frag. Each fragment can
     generate multiple reads. This function deals with individual reads.
+    
+    If a list is supplied as [mismatches], the (1-based) positions of any
+    mismatches within the read are appended to it.
+    
+    If a Substitution Model is supplied as [substitutions], the bases
+    substituted by the errors in the read are chosen all at once, depending on
+    the true base, its quality score, and the preceding base. Otherwise, each
+    substituted base is chosen uniformly from the other bases.
     """
     if length > len(seq): length = len(seq)
     # Quality
@@ -701,9 +1748,14 @@ def Generate_Read_From_Seq(seq, phred, length, quality_settings):
     # Setup
     read = ""
     scores = ""
+    if q2 == DIST.EMPIRICAL: batch = iter(q3.Sample_Batch(len(seq)))
+    elif q2 == DIST.PROFILE: batch = iter(q3.Generate(len(seq)))
+    else: batch = None
+    if substitutions: errors_at = []
     # Loop
     for char in seq:
-        q = Custom_Random_Distribution(q1, q2, q3, True)
+        if batch: q = abs(next(batch))
+        else: q = Custom_Random_Distribution(q1, q2, q3, True)
         if q > 42: q = 42
         threshold = DICT__scores_to_probs[q]
         r = Random.random()
@@ -711,15 +1763,93 @@ def Generate_Read_From_Seq(seq, phred, length, quality_settings):
             read += char
         else: # Mismatch
             errors += 1
-            possible = DICT__mismatches[char]
-            char = Random.choice(possible)
+            if mismatches != None: mismatches.append(len(read) + 1)
+            if substitutions: errors_at.append([len(read), q])
+            else:
+                possible = DICT__mismatches[char]
+                char = Random.choice(possible)
             read += char
         scores += phred[q]
         total += q   
+    # Substitutions
+    if substitutions and errors_at:
+        refs = [seq[i] for i, q in errors_at]
+        previous = [i and seq[i-1] or "N" for i, q in errors_at]
+        bases = substitutions.Sample_Batch(refs, [q for i, q in errors_at],
+                previous)
+        read = list(read)
+        for j in range(len(errors_at)): read[errors_at[j][0]] = bases[j]
+        read = "".join(read)
     # Return
     if len(read) != len(scores): print "###"
     return [read, scores, errors, total]
 
+def Generate_Long_Read_From_Seq(seq, phred, quality_settings, mismatches=None,
+            substitutions=None):
+    """
+    Generate a long DNA read from a given DNA sequence. The whole sequence is
+    read.
+    
+    Functionally equivalent to Generate_Read_From_Seq, but designed for reads
+    tens of thousands of bases long. The quality scores of the whole read are
+    generated at once, and rather than testing every base for an error, the
+    positions of candidate errors are sampled directly, using geometrically
+    distributed gaps at the highest error rate in the read. Each candidate is
+    then kept with a probability proportional to the error rate at its
+    position.
+    """
+    length = len(seq)
+    # Quality
+    q1, q2, q3 = quality_settings
+    if q2 == DIST.NORMAL and q3 == 0 and q1 == 0: # Perfect accuracy
+        scores = phred[42] * length
+        return [seq, scores, 0, 0]
+    if q2 == DIST.EMPIRICAL or ( q2 == DIST.UNIFORM and not q1 ):
+        qualities = q3.Sample_Batch(length)
+    elif q2 == DIST.PROFILE:
+        qualities = q3.Generate(length)
+    elif q2 == DIST.NORMAL:
+        normal = Random.normalvariate
+        qualities = [int(normal(q1, q3) + 0.5) for i in xrange(length)]
+    else:
+        qualities = [Custom_Random_Distribution(q1, q2, q3, True)
+                for i in xrange(length)]
+    qualities = [min(abs(q), 42) for q in qualities]
+    scores = "".join([phred[q] for q in qualities])
+    total = sum(qualities)
+    # Error positions
+    probs = DICT__scores_to_probs
+    p = 1 - probs[min(qualities or [42])]
+    errors_at = []
+    if p > 0:
+        if p < 1: log_q = log(1 - p)
+        i = -1
+        while True:
+            if p < 1: i += int(log(1 - Random.random()) / log_q) + 1
+            else: i += 1
+            if i >= length: break
+            if Random.random() * p < 1 - probs[qualities[i]]:
+                errors_at.append(i)
+    # Substitutions
+    if substitutions:
+        bases = substitutions.Sample_Batch([seq[i] for i in errors_at],
+                [qualities[i] for i in errors_at],
+                [i and seq[i-1] or "N" for i in errors_at])
+    else:
+        bases = [Random.choice(DICT__mismatches[seq[i]]) for i in errors_at]
+    pieces = []
+    pos = 0
+    for j in range(len(errors_at)):
+        i = errors_at[j]
+        pieces.append(seq[pos:i])
+        pieces.append(bases[j])
+        pos = i + 1
+    pieces.append(seq[pos:])
+    read = "".join(pieces)
+    if mismatches != None: mismatches.extend([i + 1 for i in errors_at])
+    # Return
+    return [read, scores, len(errors_at), total]
+
 
 
 def Calculate_Dist_Params(settings):
@@ -744,13 +1874,19 @@ def Calculate_Dist_Params(settings):
         if param:
             lower = mean - param
             upper = mean + param
-            param = range(lower, upper+1)
+            param = Alias_Table(range(lower, upper+1))
             mean = 0
         else:
             param = 0
             while mean > 1:
                 param += 1
                 mean -= 1
+    elif dist == DIST.EMPIRICAL:
+        param = Load_Histogram(param)
+        mean = 0
+    elif dist == DIST.LOGNORMAL:
+        mu = log(mean) - ( param ** 2 ) / 2.0
+        param = [mu, param]
     return [mean, dist, param]
 
 def Custom_Random_Distribution(mean, method, param, must_positive=False):
@@ -780,6 +1916,8 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
                 0: Normal distribution
                 1: Gamma distribution
                 2: Uniform distribution
+                3: Empirical distribution
+                4: Log-normal distribution
     @param
             (*)
             Varies depending on the distribution method chosen:
@@ -791,13 +1929,20 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
                     A list containing the Alpha and Beta to be used for the
                     Gamma distribution.
                 UNIFORM:
-                    (list/int)
-                    If @mean is 0, then @param is a list of values, one of which
-                    will be chosen at random with equal probability.
+                    (Alias_Table/int)
+                    If @mean is 0, then @param is an Alias Table of values, one
+                    of which will be chosen at random with equal probability.
                     If @mean is not zero, then @param is the number to add,
                     essentially resulting in a series of numbers which are
                     either FLOOR(@mean) or CEILING(@mean), the average of which
                     is @mean.
+                EMPIRICAL:
+                    (Alias_Table)
+                    An Alias Table of the histogram from which values are drawn.
+                LOG-NORMAL:
+                    ([float, float])
+                    A list containing the mean and standard deviation of the
+                    natural logarithm of the values.
     @must_positive
             (bool)
             Whether or not to forcibly make the result positive if it is
@@ -811,35 +1956,66 @@ def Custom_Random_Distribution(mean, method, param, must_positive=False):
             if r > mean: return param+1
             else: return param
         else:
-            r = Random.choice(param)
+            r = param.Sample()
+    elif method == DIST.EMPIRICAL:
+        r = param.Sample()
     else:
         if method == DIST.NORMAL:
             r = Random.normalvariate(mean, param)
         elif method == DIST.GAMMA:
             r = Random.gammavariate(param[0], param[1])
+        elif method == DIST.LOGNORMAL:
+            r = Random.lognormvariate(param[0], param[1])
         r = int(r+0.5)
     if must_positive:
         if r < 0: r = -r
     return r
 
-def Generate_Name(unique_id, frag_name, duplicates, direction):
+def Generate_Names(unique_id, frag_name, duplicates, direction, plan=None):
     """
-    Generate a read name, given the name of a fragment, the current duplicate
-    number, and the orientation of the read.
+    Generate the read names of every duplicate of a fragment at once, given the
+    name of the fragment, the number of duplicates, and the orientation of the
+    reads. If a duplicate plan containing the tile, x, and y coordinates of
+    each cluster is supplied, they are appended to the names.
+    
+    Return a list of names, in order of duplicate number.
     
     @unique_id   (str)
     @frag_name   (str)
     @duplicates  (int)
     @direction   (str)
+    @plan        (list<[int, int, int]>)
+    
+    Generate_Names(str, str, int, str, list<[int, int, int]>) -> list<str>
+    """
+    template = STR__name
+    names = [template % (unique_id, frag_name, i, direction)
+            for i in range(1, duplicates + 1)]
+    if plan and plan[0]:
+        template = STR__cluster
+        names = [names[i] + template % tuple(plan[i])
+                for i in range(duplicates)]
+    return names
+
+def Generate_CASAVA_Names(unique_id, plan):
+    """
+    Generate the compact, CASAVA-style read names of every duplicate of a
+    fragment at once, given a duplicate plan containing the lane, tile, x, and
+    y coordinates of each cluster. The instrument, run, and flowcell are the
+    same for every read, so each name is identified by its cluster coordinates
+    alone. Mates share the same name.
     
-    Generate_Name(str, str, int, str) -> str
+    Return a list of names, in order of duplicate number.
+    
+    @unique_id   (str)
+    @plan        (list<[int, int, int, int]>)
+    
+    Generate_CASAVA_Names(str, list<[int, int, int, int]>) -> list<str>
     """
-    # Duplicate string
-    s = str(duplicates)
-    s = Pad_Str(s, COPY_DIGITS, "0")
-    # SB
-    sb = unique_id + frag_name + "__" + s + direction
-    return sb
+    template = STR__casava_name
+    return [template % (unique_id, cluster[0], cluster[1], cluster[2],
+            cluster[3])
+            for cluster in plan]
 
 
 
@@ -920,6 +2096,27 @@ def Report_Metrics(fragments, reads, bases_forward, errors_forward,
             E1 = str_f_e, L2 = str_r, E2 = str_r_e, Q = str_avg_score,
             D = str_avg_copies))
 
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the functions and methods which make up the
+    main stages of this program.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(FASTA_Reader, "Read", "Reading")
+    PROFILE.Instrument(Fragment_Table_Reader, "Read", "Reading")
+    PROFILE.Instrument(globals(), "Generate_Read_From_Seq", "Sampling")
+    PROFILE.Instrument(globals(), "Generate_Long_Read_From_Seq", "Sampling")
+    PROFILE.Instrument(globals(), "Custom_Random_Distribution", "Sampling")
+    PROFILE.Instrument(globals(), "Exceeds_Max_N", "Composition")
+    PROFILE.Instrument(Indel_Model, "Get_Run_Map", "Sampling")
+    PROFILE.Instrument(Indel_Model, "Apply", "Sampling")
+    PROFILE.Instrument(globals(), "Generate_Names", "String assembly")
+    PROFILE.Instrument(globals(), "Generate_CASAVA_Names", "String assembly")
+    PROFILE.Instrument(globals(), "Reverse_Complement", "String assembly")
+    PROFILE.Instrument(Truth_File_Writer, "Write", "Writing")
+
+
 
 
 # Command Line Parsing #########################################################
@@ -944,6 +2141,12 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
         print(HELP_DOC)
         return 0
     
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
     # Initial validation (Redundant in current version)
     if len(inputs) < 1:
         PRINT.printE(STR__insufficient_inputs)
@@ -979,20 +2182,43 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
     trunc_param = DEFAULT__trunc_param
     threads = DEFAULT__threads
     unique_id_mod = DEFAULT__STR__unique_id_mod
+    genome = ""
+    compress = DEFAULT__compress
+    interleaved = DEFAULT__interleaved
+    truth_path = ""
+    metrics_path = ""
+    checkpoint_interval = DEFAULT__checkpoint
+    resume = False
+    shard = None
+    quality_profile = ""
+    indel_settings = None
+    long_read_settings = None
+    adapters = None
+    poly_g = DEFAULT__poly_g
+    optical_settings = None
+    pcr_error_rate = 0
+    casava = DEFAULT__casava
+    max_n = DEFAULT__max_n
+    paths_specified = False
     
     # Validate optional inputs (except output path)
     while inputs:
         arg = inputs.pop(0)
         
         # Confirm valid flag
-        if arg in ["-p", "-x", "-u"]: # Second argument
+        if arg in ["-p", "-x", "-u", "-g", "-z", "-i", "-s", "--metrics",
+                "--checkpoint", "--shard", "--quality-profile", "--poly-g",
+                "--pcr-errors", "--casava", "--max-n"]: # Second argument
             try:
                 arg2 = inputs.pop(0)
             except:
                 PRINT.printE(STR__insufficient_inputs)
                 PRINT.printE(STR__use_help)
                 return 1
-        elif arg in ["-o", "-r", "-m"]: # Second and third arguments
+        elif arg in ["--resume"]: # No further arguments
+            pass
+        elif arg in ["-o", "-r", "-m", "--adapters",
+                "--optical"]: # Second and third arguments
             try:
                 arg2 = inputs.pop(0)
                 arg3 = inputs.pop(0)
@@ -1000,7 +2226,8 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
                 PRINT.printE(STR__insufficient_inputs)
                 PRINT.printE(STR__use_help)
                 return 1
-        elif arg in ["-q", "-d", "-t"]: # Second, third, and fourth arguments
+        elif arg in ["-q", "-d", "-t", "--indels",
+                "--long-reads"]: # Second, third, and fourth arguments
             try:
                 arg2 = inputs.pop(0)
                 arg3 = inputs.pop(0)
@@ -1019,6 +2246,7 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
         if arg == "-o": # Output files - Actual validation done later
             path_out_r1 = arg2
             path_out_r2 = arg3
+            paths_specified = True
         elif arg == "-r":
             len_1 = Validate_Int_NonNeg(arg2)
             len_2 = Validate_Int_NonNeg(arg3)
@@ -1045,11 +2273,95 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
                 return 1
         elif arg == "-u":
             unique_id_mod = arg2
+        elif arg == "-g":
+            genome = arg2
+            if not os.path.isdir(genome):
+                PRINT.printE(STR__IO_error_read.format(f = genome))
+                return 1
+        elif arg == "-z":
+            compress = Validate_Bool(arg2)
+            if compress == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "-i":
+            interleaved = Validate_Bool(arg2)
+            if interleaved == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "-s": # Truth file - Actual validation done later
+            truth_path = arg2
+        elif arg == "--metrics": # Metrics file - Actual validation done later
+            metrics_path = arg2
+        elif arg == "--checkpoint":
+            checkpoint_interval = Validate_Int_NonNeg(arg2)
+            if checkpoint_interval == -1:
+                PRINT.printE(STR__invalid_checkpoint.format(s = arg2))
+                return 1
+        elif arg == "--resume":
+            resume = True
+        elif arg == "--shard":
+            shard = Parse_Shard(arg2)
+            if not shard:
+                PRINT.printE(STR__invalid_shard.format(s = arg2))
+                return 1
+        elif arg == "--quality-profile":
+            quality_profile = arg2
+            if not os.path.isfile(quality_profile):
+                PRINT.printE(STR__IO_error_read.format(f = quality_profile))
+                return 1
+        elif arg == "--indels":
+            insertion_rate = Validate_Float_NonNeg(arg2)
+            deletion_rate = Validate_Float_NonNeg(arg3)
+            homopolymer_mod = Validate_Float_NonNeg(arg4)
+            if (insertion_rate == -1 or deletion_rate == -1 or
+                    homopolymer_mod == -1 or insertion_rate > 1 or
+                    deletion_rate > 1):
+                PRINT.printE(STR__invalid_indels.format(s1 = arg2, s2 = arg3,
+                        s3 = arg4))
+                return 1
+            indel_settings = [insertion_rate, deletion_rate, homopolymer_mod]
+        elif arg == "--adapters":
+            adapters = [arg2.upper(), arg3.upper()]
+            if adapters[0].strip("ACGTN") or adapters[1].strip("ACGTN"):
+                PRINT.printE(STR__invalid_adapters.format(s1 = arg2, s2 = arg3))
+                return 1
+        elif arg == "--poly-g":
+            poly_g = Validate_Bool(arg2)
+            if poly_g == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--optical":
+            optical_rate = Validate_Float_NonNeg(arg2)
+            optical_distance = Validate_Int_NonNeg(arg3)
+            if optical_rate == -1 or optical_rate > 1 or optical_distance == -1:
+                PRINT.printE(STR__invalid_optical.format(s1 = arg2, s2 = arg3))
+                return 1
+            optical_settings = [optical_rate, optical_distance]
+        elif arg == "--pcr-errors":
+            pcr_error_rate = Validate_Float_NonNeg(arg2)
+            if pcr_error_rate == -1 or pcr_error_rate > 1:
+                PRINT.printE(STR__invalid_pcr_errors.format(s = arg2))
+                return 1
+        elif arg == "--casava":
+            casava = Validate_Bool(arg2)
+            if casava == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--max-n":
+            max_n = Validate_Float_NonNeg(arg2)
+            if max_n == -1 or max_n > 1:
+                PRINT.printE(STR__invalid_max_n.format(s = arg2))
+                return 1
         else:
             # Determine type
             if arg == "-q": dist = "quality score"
             if arg == "-d": dist = "duplicate copy number"
             if arg == "-t": dist = "truncation length"
+            if arg == "--long-reads": dist = "long read length"
             
             # Validate
             avg = Validate_Number(arg2)
@@ -1063,6 +2375,9 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
             if avg == 0 and params[0] == DIST.GAMMA:
                 PRINT.printE(STR__invalid_params.format(s=dist, d=arg3, p=arg4))
                 return 1
+            if avg <= 0 and params[0] == DIST.LOGNORMAL:
+                PRINT.printE(STR__invalid_params.format(s=dist, d=arg3, p=arg4))
+                return 1
             
             # Type specific
             if arg == "-q":
@@ -1074,6 +2389,8 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
             if arg == "-t":
                 avg_trunc = avg
                 trunc_dist, trunc_param = params
+            if arg == "--long-reads":
+                long_read_settings = [avg, params[0], params[1]]
     
     # Validate phred
     if phred in LIST__phred33: phred = DICT__scores_to_chars__phred33
@@ -1082,8 +2399,33 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
         PRINT.printE(STR__invalid_phred.format(s = phred))
         return 1
     
-    # Validate output path
-    if len_1:
+    # Long reads (A single read per fragment, output to the first file)
+    if long_read_settings:
+        len_1, len_2 = [1, 0]
+        if not indel_settings:
+            indel_settings = [DEFAULT__long_insertion_rate,
+                    DEFAULT__long_deletion_rate, DEFAULT__long_homopolymer_mod]
+    
+    # Default output paths
+    if interleaved and not paths_specified:
+        path_out_r1 = Generate_Default_Output_File_Path_From_Folder(path_in,
+                FILEMOD__FASTQ_I)
+    if compress and not paths_specified:
+        path_out_r1 += FILEMOD__GZIP
+        path_out_r2 += FILEMOD__GZIP
+    
+    # Shard output paths
+    if shard:
+        path_out_r1 = Add_Shard_Tag(path_out_r1, shard[0], shard[1])
+        path_out_r2 = Add_Shard_Tag(path_out_r2, shard[0], shard[1])
+        if truth_path:
+            truth_path = Add_Shard_Tag(truth_path, shard[0], shard[1])
+        if metrics_path:
+            metrics_path = Add_Shard_Tag(metrics_path, shard[0], shard[1])
+        if not casava: unique_id_mod += STR__shard_id.format(i = shard[0])
+    
+    # Validate output path (Existing outputs are expected when resuming)
+    if (len_1 or interleaved) and not resume:
         valid_out_1 = Validate_Write_Path(path_out_r1)
         if valid_out_1 == 2: return 0
         if valid_out_1 == 3:
@@ -1092,7 +2434,7 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
         if valid_out_1 == 4:
             PRINT.printE(STR__IO_error_write_unable)
             return 1
-    if len_2:
+    if len_2 and not interleaved and not resume:
         valid_out_2 = Validate_Write_Path(path_out_r2)
         if valid_out_2 == 2: return 0
         if valid_out_2 == 3:
@@ -1102,11 +2444,35 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
             PRINT.printE(STR__IO_error_write_unable)
             return 1
     
+    if truth_path and not resume:
+        valid_out_3 = Validate_Write_Path(truth_path)
+        if valid_out_3 == 2: return 0
+        if valid_out_3 == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out_3 == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
+    
+    if metrics_path and not resume:
+        valid_out_4 = Validate_Write_Path(metrics_path)
+        if valid_out_4 == 2: return 0
+        if valid_out_4 == 3:
+            PRINT.printE(STR__IO_error_write_forbid)
+            return 1
+        if valid_out_4 == 4:
+            PRINT.printE(STR__IO_error_write_unable)
+            return 1
+    
     # Run program
     exit_state = Generate_Reads(path_in, [path_out_r1, path_out_r2], phred,
             [len_1, len_2], [avg_quality, quality_dist, quality_param],
             [avg_dupes, dupes_dist, dupes_param], [min_dupes, max_dupes],
-            [avg_trunc, trunc_dist, trunc_param], threads, unique_id_mod)
+            [avg_trunc, trunc_dist, trunc_param], threads, unique_id_mod,
+            genome, compress, interleaved, truth_path, metrics_path,
+            checkpoint_interval, resume, shard, quality_profile,
+            indel_settings, long_read_settings, adapters, poly_g,
+            optical_settings, pcr_error_rate, casava, max_n)
     
     # Exit
     if exit_state == 0: return 0
@@ -1114,6 +2480,7 @@ def Parse_Command_Line_Input__Generate_Reads(raw_command_line_input):
         if exit_state == 1: PRINT.printE(STR__input_invalid)
         if exit_state == 2: PRINT.printE(STR__output_invalid)
         if exit_state == 3: PRINT.printE(STR__generation_invalid)
+        if exit_state == 5: PRINT.printE(STR__checkpoint_invalid)
         PRINT.printE(STR__use_help)
         return 1
 
@@ -1129,8 +2496,9 @@ def Validate_Dist_Params(method, param):
     parameters are valid.
     Return an empty list if the parameters are invalid.
     
-    Valid values for [method] include "Normal", "Gamma", and "Uniform", and all
-    capitalization variants of these strings.
+    Valid values for [method] include "Normal", "Gamma", "Uniform",
+    "Empirical", and "Lognormal", and all capitalization variants of these
+    strings.
     
     Regarding param:
         
@@ -1144,6 +2512,12 @@ def Validate_Dist_Params(method, param):
         
         For a uniform distribution, [param] is how far away from the average the
         distribution range goes.
+        
+        For an empirical distribution, [param] is the filepath of a valid
+        histogram file.
+        
+        For a log-normal distribution, [param] is the standard deviation of the
+        natural logarithm of the values, a positive number.
     
     Validate_Dist_Params(str, str) -> list<*>
     """
@@ -1157,6 +2531,11 @@ def Validate_Dist_Params(method, param):
     elif dist == 3: # Uniform
         param = Validate_Int_NonNeg(param)
         if param == -1: return []
+    elif dist == 4: # Empirical
+        if not Read_Histogram(param): return []
+    elif dist == 6: # Log-normal
+        param = Validate_Float_Positive(param)
+        if param == -1: return []
     else:
         return []
     return [dist, param]
@@ -0,0 +1,239 @@
+"""
+GZIP FILE WRITER
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for writing gzip-compressed flat files, with the
+compression spread across multiple threads.
+
+Files are written in the BGZF format. (Blocked GNU Zip Format, as used by
+SAMtools and HTSlib) A BGZF file is a series of independent gzip members, each
+containing up to 64KB of uncompressed data. As each block is compressed
+independently, blocks can be compressed in parallel, in a similar manner to
+pigz. BGZF files are valid gzip files and can be read by any program which can
+read gzip files.
+
+The zlib module releases the GIL while compressing, so multiple threads
+compress in parallel while the main thread continues to generate data.
+"""
+
+# Imported Modules #############################################################
+
+import struct
+import zlib
+
+from multiprocessing.pool import ThreadPool
+
+from Checkpoint import Open_Truncated
+
+
+
+# Configurations ###############################################################
+
+BGZF_BLOCK_SIZE = 65280 # Maximum uncompressed data per block
+
+BATCH_BLOCKS = 16 # Number of blocks handed to the compressor threads at once
+
+COMPRESSION_LEVEL = 6
+
+
+
+# Strings ######################################################################
+
+# BGZF header: gzip magic, FEXTRA flag, MTIME, XFL, OS, XLEN, "BC" subfield
+STR__BGZF_header = "\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00"
+
+# Empty block, used as the end-of-file marker
+STR__BGZF_EOF = ("\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00" +
+        "\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00")
+
+
+
+# Lists ########################################################################
+
+LIST__gzip = [".gz", ".bgz", ".gzip"]
+
+
+
+# Functions ####################################################################
+
+def Compress_BGZF_Block(data, level=COMPRESSION_LEVEL):
+    """
+    Compress a string of data into a single BGZF block.
+    
+    @data
+            (str)
+            The uncompressed data. Must not be longer than BGZF_BLOCK_SIZE.
+    @level
+            (int)
+            The zlib compression level. (0-9)
+    
+    Compress_BGZF_Block(str, int) -> str
+    """
+    c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    compressed = c.compress(data) + c.flush()
+    bsize = len(compressed) + 25 # Header (18), CRC32 (4), ISIZE (4), minus 1
+    crc = zlib.crc32(data) & 0xffffffff
+    return (STR__BGZF_header + struct.pack("<H", bsize) + compressed +
+            struct.pack("<II", crc, len(data) & 0xffffffff))
+
+def Is_Gzip_Path(file_path):
+    """
+    Return True if [file_path] has a gzip file extension.
+    
+    Is_Gzip_Path(str) -> bool
+    """
+    for ext in LIST__gzip:
+        if file_path.endswith(ext): return True
+    return False
+
+
+
+# Classes ######################################################################
+
+class Gzip_File_Writer:
+    """
+    A writer for BGZF-compressed files.
+    
+    Data is buffered as it is written. Once enough data has been buffered, it is
+    split into blocks and handed to a pool of compressor threads. Compressed
+    blocks are written to the file in their original order. At most one batch
+    per thread is in flight at any time, which bounds the memory used.
+    
+    Has write() and close() methods, so it can be used in place of a regular
+    file object.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path="", threads=1, level=COMPRESSION_LEVEL):
+        """
+        Creates a Gzip File Writer object. The file will be opened immediately
+        if a filepath is supplied.
+        
+        [threads] is the number of compressor threads. If [threads] is 1,
+        blocks are compressed in the calling thread.
+        """
+        self.file_path = ""
+        self.file = None
+        self.threads = max(1, threads)
+        self.level = level
+        self._pool = None
+        if file_path: self.Open(file_path)
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path, offset=-1):
+        """
+        Open the file at [file_path] for writing.
+        
+        If [offset] is specified, the existing file is kept up to [offset]
+        bytes, and written to from there. [offset] must be the end of a block,
+        as returned by Tell().
+        
+        Return 0 if successful.
+        Return 1 if the file could not be written to.
+        """
+        if self.file: self.Close()
+        try:
+            if offset >= 0: self.file = Open_Truncated(file_path, offset)
+            else: self.file = open(file_path, "wb")
+        except:
+            self.file = None
+            return 1
+        self.file_path = file_path
+        self._buffer = []
+        self._buffered = 0
+        self._pending = [] # Batches being compressed, in order
+        if self.threads > 1: self._pool = ThreadPool(self.threads)
+        return 0
+    
+    def IsOpen(self):
+        """
+        Return True if a file is currently open.
+        """
+        return self.file != None
+    
+    def Tell(self):
+        """
+        Return the current position in the compressed file. Only meaningful
+        immediately after Flush().
+        """
+        return self.file.tell()
+    
+    def Close(self):
+        """
+        Compress and write all remaining data, write the end-of-file marker,
+        and close the file.
+        """
+        if not self.file: return
+        self._Submit(True)
+        while self._pending: self._Write_Batch()
+        self.file.write(STR__BGZF_EOF)
+        self.file.close()
+        self.file = None
+        if self._pool:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+    
+    
+    
+    # File Writing Methods #####################################################
+    
+    def Write(self, string):
+        """
+        Write a string to the file.
+        """
+        self._buffer.append(string)
+        self._buffered += len(string)
+        if self._buffered >= BGZF_BLOCK_SIZE * BATCH_BLOCKS: self._Submit()
+    
+    def _Submit(self, final=False):
+        """
+        Split the buffered data into blocks and hand them to the compressor.
+        Unless [final] is True, any data which does not fill a whole block is
+        kept in the buffer.
+        """
+        data = "".join(self._buffer)
+        if final: cutoff = len(data)
+        else: cutoff = len(data) - (len(data) % BGZF_BLOCK_SIZE)
+        if cutoff < len(data): self._buffer = [data[cutoff:]]
+        else: self._buffer = []
+        self._buffered = len(data) - cutoff
+        blocks = [data[i:i+BGZF_BLOCK_SIZE]
+                for i in range(0, cutoff, BGZF_BLOCK_SIZE)]
+        if not blocks: return
+        if self._pool:
+            level = self.level
+            batch = self._pool.map_async(
+                    lambda block: Compress_BGZF_Block(block, level), blocks)
+            self._pending.append(batch)
+            while len(self._pending) > self.threads: self._Write_Batch()
+        else:
+            for block in blocks:
+                self.file.write(Compress_BGZF_Block(block, self.level))
+    
+    def Flush(self):
+        """
+        Compress and write all buffered data, ending the current block early if
+        necessary.
+        """
+        self._Submit(True)
+        while self._pending: self._Write_Batch()
+        self.file.flush()
+    
+    def _Write_Batch(self):
+        """
+        Wait for the oldest pending batch to be compressed, and write it.
+        """
+        batch = self._pending.pop(0)
+        self.file.write("".join(batch.get()))
+    
+    # File object compatibility
+    write = Write
+    flush = Flush
+    tell = Tell
+    close = Close
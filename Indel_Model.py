@@ -0,0 +1,248 @@
+"""
+INDEL MODEL
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for simulating insertion and deletion errors in
+reads, at rates which can depend on the length of the homopolymer run each base
+belongs to.
+
+The homopolymer runs of a fragment are mapped once, and the map is shared by all
+the reads generated from it. The map divides the fragment into segments: each
+homopolymer run of at least 3 bases, and the stretches between them. It records
+the cumulative hazard, -log(1 - rate), at the start of each segment. Rather than
+testing every base for an error, the position of the next error is found
+directly, by drawing an exponentially distributed amount of hazard and locating
+the base at which it is used up. (Which gives exactly the same distribution of
+errors as testing every base) Each run is therefore handled at its own error
+rate, and a long run does not affect the rest of the fragment.
+
+Runs of 2 bases are too common to be worth mapping. Stretches between mapped
+runs are instead handled at the error rate of a run of 2 bases, and candidate
+errors at bases which turn out to be on their own are kept with a probability of
+(rate for 1 base / rate for 2 bases). As errors are rare, only a handful of
+random numbers are required per read.
+
+The rate of errors at a base belonging to a homopolymer run of length L is:
+    
+    (insertion rate + deletion rate) * ( 1 + homopolymer modifier * (L - 1) )
+
+capped at 1. Inserted bases within homopolymer runs extend the run. Elsewhere,
+they are chosen uniformly.
+"""
+
+# Imported Modules #############################################################
+
+import re
+import random as Random
+
+from bisect import bisect_left
+from math import ceil, log
+
+
+
+# Configurations ###############################################################
+
+# The hazard of a base with an error rate of 1. (Its chance of being error-free
+# is then below the resolution of random numbers)
+MAX_HAZARD = 40.0
+
+
+
+# Lists ########################################################################
+
+LIST__bases = ["A", "C", "G", "T"]
+
+
+
+# Regular Expressions ##########################################################
+
+REGEX__run = re.compile(r"(.)\1\1+") # Homopolymer runs of at least 3 bases
+
+
+
+# Functions ####################################################################
+
+def Format_CIGAR(cigar, reverse=False):
+    """
+    Return the CIGAR string for the list of CIGAR operations [cigar], as
+    returned by Indel_Model.Apply(). If [reverse] is True, the operations are
+    reversed, for reads which align to the reverse strand.
+    
+    Format_CIGAR(list<[int, str]>, bool) -> str
+    """
+    if reverse: cigar = cigar[::-1]
+    return "".join([str(count) + op for count, op in cigar])
+
+
+
+# Classes ######################################################################
+
+class Indel_Model:
+    """
+    A model of insertion and deletion errors in reads, with rates which depend
+    on homopolymer run length.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, insertion_rate, deletion_rate, homopolymer_mod=0):
+        """
+        Creates an Indel Model object, with the per-base [insertion_rate] and
+        [deletion_rate] outside of homopolymer runs, and the [homopolymer_mod]
+        by which each additional base in a homopolymer run increases them.
+        """
+        self.rate = float(insertion_rate + deletion_rate)
+        self.homopolymer_mod = homopolymer_mod
+        if self.rate: self.insertion_ratio = insertion_rate / self.rate
+        else: self.insertion_ratio = 0
+        self._rates = [0.0]
+        self._hazards = [0.0]
+        # Chance of keeping a candidate error at a base which is on its own
+        rate_2 = self._Get_Rate(2)
+        if rate_2: self._isolated = self._Get_Rate(1) / rate_2
+        else: self._isolated = 0
+    
+    def _Get_Rate(self, run):
+        """
+        Return the error rate for a base in a homopolymer run of length [run].
+        """
+        rates = self._rates
+        while len(rates) <= run:
+            rate = self.rate * (1 + self.homopolymer_mod * (len(rates) - 1))
+            rates.append(min(rate, 1.0))
+        return rates[run]
+    
+    def _Get_Hazard(self, run):
+        """
+        Return the hazard, -log(1 - rate), for a base in a homopolymer run of
+        length [run].
+        """
+        hazards = self._hazards
+        while len(hazards) <= run:
+            rate = self._Get_Rate(len(hazards))
+            if rate < 1: hazards.append(min(-log(1 - rate), MAX_HAZARD))
+            else: hazards.append(MAX_HAZARD)
+        return hazards[run]
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Get_Run_Map(self, seq):
+        """
+        Return a map of the homopolymer runs in [seq], for use by Apply().
+        
+        The sequence is divided into segments: homopolymer runs of at least 3
+        bases, and the stretches between them. (Without a homopolymer modifier,
+        the whole sequence is a single stretch)
+        
+        Return a list containing the start of each segment, (followed by the
+        length of [seq]) the cumulative hazard at the start of each segment,
+        (followed by the total hazard) the hazard per base of each segment, and
+        the homopolymer run length of each segment. (0 for stretches between
+        runs, whose bases may be in runs of 1 or 2 bases)
+        """
+        if self.homopolymer_mod: stretch = 0
+        else: stretch = 1 # Every base has the same rate
+        starts = []
+        runs = []
+        end = 0
+        if self.homopolymer_mod:
+            for match in REGEX__run.finditer(seq):
+                start = match.start()
+                if start > end: # Stretch between runs
+                    starts.append(end)
+                    runs.append(stretch)
+                end = match.end()
+                starts.append(start)
+                runs.append(end - start)
+        if end < len(seq) or not starts:
+            starts.append(end)
+            runs.append(stretch)
+        starts.append(len(seq))
+        # Hazards
+        get_hazard = self._Get_Hazard
+        hazards = [get_hazard(run or 2) for run in runs]
+        cumulative = [0.0]
+        total = 0.0
+        for k in xrange(len(runs)):
+            total += hazards[k] * (starts[k+1] - starts[k])
+            cumulative.append(total)
+        return [starts, cumulative, hazards, runs]
+    
+    def Apply(self, seq, length, run_map):
+        """
+        Return a read of up to [length] bases, transcribed from the template
+        sequence [seq] with insertion and deletion errors. [run_map] is the map
+        returned by Get_Run_Map() for [seq], or for a longer sequence which
+        begins with [seq].
+        
+        Return a list containing the read, the number of template bases
+        consumed, the CIGAR operations of the read, (as a list of [length, op]
+        pairs, in read orientation) and the number of insertions and deletions.
+        
+        Insertions and deletions are never placed before the first base.
+        """
+        starts, cumulative, hazards, runs = run_map
+        total = cumulative[-1]
+        h = hazards[0] # Hazard used up to the end of the first base
+        n = len(seq)
+        pieces = []
+        cigar = []
+        out = 0
+        pos = 0
+        indels = 0
+        i = 0
+        while out < length:
+            # Next error position
+            h -= log(1 - Random.random())
+            if h >= total: break
+            k = bisect_left(cumulative, h) - 1 # Segment the hazard runs out in
+            i = starts[k] + int(ceil((h - cumulative[k]) / hazards[k]))
+            h = cumulative[k] + ((i - starts[k]) * hazards[k])
+            i -= 1 # The base which used up the hazard
+            if i >= n: break
+            run = runs[k]
+            if not run: # Between mapped runs
+                if seq[i-1] == seq[i] or (i + 1 < n and seq[i+1] == seq[i]):
+                    run = 2
+                elif Random.random() < self._isolated: run = 1
+                else: continue
+            # Bases before the error
+            take = min(i - pos, length - out)
+            if take > 0:
+                pieces.append(seq[pos:pos + take])
+                self._Add_Op(cigar, take, "M")
+                out += take
+                pos += take
+            if out >= length: break
+            indels += 1
+            if Random.random() < self.insertion_ratio: # Insertion
+                if run > 1: base = seq[i]
+                else: base = Random.choice(LIST__bases)
+                pieces.append(base)
+                self._Add_Op(cigar, 1, "I")
+                out += 1
+            else: # Deletion
+                self._Add_Op(cigar, 1, "D")
+                pos += 1
+        take = min(n - pos, length - out)
+        if take > 0:
+            pieces.append(seq[pos:pos + take])
+            self._Add_Op(cigar, take, "M")
+            pos += take
+        # Trailing deletion
+        if cigar and cigar[-1][1] == "D":
+            count = cigar.pop()[0]
+            pos -= count
+            indels -= count
+        return ["".join(pieces), pos, cigar, indels]
+    
+    def _Add_Op(self, cigar, count, op):
+        """
+        Add [count] of the CIGAR operation [op] to the CIGAR operations list
+        [cigar], merging it with the previous operation if they are the same.
+        """
+        if cigar and cigar[-1][1] == op: cigar[-1][0] += count
+        else: cigar.append([count, op])
@@ -0,0 +1,968 @@
+"""
+PACKED GENOME
+(version 1.0)
+by Angelo Chan
+
+This module contains functions and Classes for reading and writing DNA sequences
+stored in a packed binary format, with 2 bits per nucleotide. The format used is
+the UCSC ".2bit" format, so files produced by this module can also be read by
+other tools, and vice versa.
+
+Only A, C, G, and T can be stored in the packed sequence itself. Runs of
+non-ACGT characters (Ns) and runs of lowercase (soft-masked) characters are
+stored separately in tables of block starts and block sizes. Non-ACGT characters
+other than N (such as IUPAC ambiguity codes) are therefore stored as Ns.
+
+A packed file is memory-mapped when it is read. Any region of a sequence can be
+retrieved directly, at a cost proportional to the size of the region, without
+reading or parsing any other part of the file. A packed file takes up roughly a
+quarter of the space of the equivalent FASTA file.
+
+In the context of this library, a packed "genome" is a folder of ".2bit" files,
+each containing a single chromosome, in the same way as a FASTA genome is a
+folder of FASTA files each containing a single chromosome.
+
+This module also contains a reader for fragment coordinates tables, which
+produces fragment sequences from a genome on demand, so that fragment sequences
+never need to be written to disk.
+"""
+
+# Imported Modules #############################################################
+
+import os
+import re
+import mmap
+import struct
+import tempfile
+
+from bisect import bisect_right
+
+from _Command_Line_Parser import LIST__FASTA
+
+from Reverse_Complement import Reverse_Complement
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__2BIT = ".2bit"
+
+TWOBIT_SIGNATURE = 0x1A412743
+
+BUFFER_SIZE = 1048576 # Number of nucleotides packed or unpacked at a time
+
+
+
+# Lists ########################################################################
+
+LIST__2BIT = [".2bit"]
+
+LIST__packed_order = ["T", "C", "A", "G"] # The 2-bit code of each nucleotide
+
+LIST__unpack = [] # Byte value : 4 nucleotides
+for i in range(256):
+    LIST__unpack.append(LIST__packed_order[(i >> 6) & 3] +
+            LIST__packed_order[(i >> 4) & 3] +
+            LIST__packed_order[(i >> 2) & 3] +
+            LIST__packed_order[i & 3])
+
+
+
+# Dictionaries #################################################################
+
+DICT__pack = {} # 4 nucleotides : byte value
+for i in range(256): DICT__pack[LIST__unpack[i]] = chr(i)
+
+
+
+# Regular Expressions ##########################################################
+
+REGEX__N = re.compile("[^ACGTacgt]+")
+REGEX__mask = re.compile("[a-z]+")
+
+
+
+# Translation Tables ###########################################################
+
+# Uppercase ACGT, and convert everything else to T. (Ns are packed as T)
+TABLE__normalize = ["T"] * 256
+for c in "ACGT":
+    TABLE__normalize[ord(c)] = c
+    TABLE__normalize[ord(c.lower())] = c
+TABLE__normalize = "".join(TABLE__normalize)
+
+# Byte value : number of As, Cs, Gs, or Ts respectively in the byte
+LIST__count_tables = []
+for c in "ACGT":
+    LIST__count_tables.append("".join([chr(LIST__unpack[i].count(c))
+            for i in range(256)]))
+
+
+
+# Functions ####################################################################
+
+def Pack_Sequence(seq):
+    """
+    Pack a DNA sequence into a string of bytes, with 4 nucleotides per byte.
+    
+    Non-ACGT characters are packed as Ts. If the length of [seq] is not a
+    multiple of 4, the final byte is padded out with Ts.
+    
+    @seq
+            (str)
+            The DNA sequence to be packed.
+    
+    Pack_Sequence(str) -> str
+    """
+    seq = seq.translate(TABLE__normalize)
+    remainder = len(seq) % 4
+    if remainder: seq += "T" * (4 - remainder)
+    d = DICT__pack
+    return "".join([d[seq[i:i+4]] for i in xrange(0, len(seq), 4)])
+
+def Unpack_Sequence(data):
+    """
+    Unpack a string of bytes produced by Pack_Sequence() into a DNA sequence.
+    The resulting sequence will be 4 times as long as [data].
+    
+    @data
+            (str)
+            The packed bytes.
+    
+    Unpack_Sequence(str) -> str
+    """
+    return "".join(map(LIST__unpack.__getitem__, bytearray(data)))
+
+def Count_Packed(data, length):
+    """
+    Return a count of the As, Cs, Gs, and Ts, respectively, in the first
+    [length] nucleotides of a string of bytes produced by Pack_Sequence().
+    
+    The counting is done by translating each byte into its count, so the packed
+    bytes never need to be unpacked.
+    
+    @data
+            (str)
+            The packed bytes.
+    @length
+            (int)
+            The number of nucleotides in [data].
+    
+    Count_Packed(str, int) -> [int, int, int, int]
+    """
+    full = length/4
+    remainder = length % 4
+    data_full = data[:full]
+    counts = []
+    for table in LIST__count_tables:
+        temp = data_full.translate(table)
+        counts.append(temp.count("\x01") + 2*temp.count("\x02") +
+                3*temp.count("\x03") + 4*temp.count("\x04"))
+    if remainder:
+        seq = Unpack_Sequence(data[full:full+1])[:remainder]
+        for i in range(4): counts[i] += seq.count("ACGT"[i])
+    return counts
+
+def Get_Blocks(seq, regex, offset, blocks):
+    """
+    Find all runs of characters in [seq] which match [regex], and add them to
+    [blocks] as [start, size] pairs. (0-based) Runs which continue directly on
+    from the last block in [blocks] are merged into that block.
+    
+    @seq
+            (str)
+            The DNA sequence to be scanned.
+    @regex
+            (regex)
+            The compiled regular expression which matches a run of characters.
+    @offset
+            (int)
+            The position of the first character of [seq] within the overall
+            sequence.
+    @blocks
+            (list<[int, int]>)
+            The list of blocks found so far. This list is modified.
+    
+    Get_Blocks(str, regex, int, list<[int, int]>) -> None
+    """
+    for match in regex.finditer(seq):
+        start = offset + match.start()
+        size = match.end() - match.start()
+        if blocks and blocks[-1][0] + blocks[-1][1] == start:
+            blocks[-1][1] += size
+        else:
+            blocks.append([start, size])
+
+def Get_2Bit_Names(file_path):
+    """
+    Return a list of the names of all the sequences in the packed file at
+    [file_path].
+    Return an empty list if the file is not a valid packed file.
+    
+    Get_2Bit_Names(str) -> list<str>
+    """
+    try:
+        f = open(file_path, "rb")
+        index = Read_2Bit_Index(f)
+        f.close()
+    except:
+        return []
+    return [pair[0] for pair in index]
+
+def Read_2Bit_Index(file):
+    """
+    Read the header and sequence index of a packed file.
+    Raise an IOError if the file is not a valid packed file.
+    
+    @file
+            (file)
+            The file object of the packed file, opened in binary mode.
+    
+    Return a list of pairs, each containing the name of a sequence and the
+    offset of its record within the file.
+    
+    Read_2Bit_Index(file) -> list<[str, int]>
+    """
+    file.seek(0)
+    header = file.read(16)
+    if len(header) < 16: raise IOError("Not a .2bit file")
+    signature, version, count, reserved = struct.unpack("<IIII", header)
+    if signature != TWOBIT_SIGNATURE or version != 0:
+        raise IOError("Not a .2bit file")
+    index = []
+    while count:
+        name_len = ord(file.read(1))
+        name = file.read(name_len)
+        offset = struct.unpack("<I", file.read(4))[0]
+        index.append([name, offset])
+        count -= 1
+    return index
+
+def Is_2Bit_Path(file_path):
+    """
+    Return True if [file_path] is the filepath of a packed file, as determined
+    by its file extension.
+    
+    Is_2Bit_Path(str) -> bool
+    """
+    for ext in LIST__2BIT:
+        if file_path.endswith(ext): return True
+    return False
+
+
+
+# Classes ######################################################################
+
+class Packed_Sequence:
+    """
+    A read-only, memory-mapped, random-access view of a single sequence within a
+    packed file.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path, name=""):
+        """
+        Open the packed file at [file_path] and read the record of the sequence
+        named [name]. If no name is specified, the first sequence in the file
+        will be used.
+        
+        Raise an IOError if the file is not a valid packed file or does not
+        contain the specified sequence.
+        """
+        self.file_path = file_path
+        self.file = open(file_path, "rb")
+        try:
+            index = Read_2Bit_Index(self.file)
+            if not index: raise IOError("No sequences in: " + file_path)
+            offset = -1
+            if not name:
+                name, offset = index[0]
+            for pair in index:
+                if pair[0] == name: offset = pair[1]
+            if offset == -1: raise IOError("No sequence named: " + name)
+            self.name = name
+            self._Read_Record(offset)
+            self._mm = mmap.mmap(self.file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+        except:
+            self.file.close()
+            raise
+    
+    def _Read_Record(self, offset):
+        """
+        Read the sequence size and the N and mask block tables of the record at
+        [offset].
+        """
+        f = self.file
+        f.seek(offset)
+        self.length, count = struct.unpack("<II", f.read(8))
+        fmt = "<%dI" % count
+        size = struct.calcsize(fmt)
+        self._n_starts = list(struct.unpack(fmt, f.read(size)))
+        self._n_sizes = list(struct.unpack(fmt, f.read(size)))
+        count = struct.unpack("<I", f.read(4))[0]
+        fmt = "<%dI" % count
+        size = struct.calcsize(fmt)
+        self._mask_starts = list(struct.unpack(fmt, f.read(size)))
+        self._mask_sizes = list(struct.unpack(fmt, f.read(size)))
+        f.read(4) # Reserved
+        self._dna_offset = f.tell()
+    
+    def Close(self):
+        """
+        Close the packed file.
+        """
+        self._mm.close()
+        self.file.close()
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Get_Name(self):
+        """
+        Return the name of the sequence.
+        """
+        return self.name
+    
+    def Get_Length(self):
+        """
+        Return the length of the sequence.
+        """
+        return self.length
+    
+    def Get_N_Blocks(self):
+        """
+        Return a list of the runs of Ns in the sequence, as [start, size] pairs.
+        (0-based)
+        """
+        return [list(pair) for pair in zip(self._n_starts, self._n_sizes)]
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Get_Slice(self, start, end):
+        """
+        Return the nucleotides between [start] and [end], inclusive. (1-based)
+        Coordinates beyond either end of the sequence are trimmed.
+        
+        Get_Slice(int, int) -> str
+        """
+        if start < 1: start = 1
+        if end > self.length: end = self.length
+        if end < start: return ""
+        start_ = start - 1 # 0-based, half-open
+        first = start_ / 4
+        last = (end + 3) / 4
+        data = self._mm[self._dna_offset + first : self._dna_offset + last]
+        seq = Unpack_Sequence(data)
+        trim = first * 4
+        seq = seq[start_ - trim : end - trim]
+        # Ns
+        seq = self._Apply_Blocks(seq, start_, end, self._n_starts,
+                self._n_sizes, True)
+        # Soft-masking
+        seq = self._Apply_Blocks(seq, start_, end, self._mask_starts,
+                self._mask_sizes, False)
+        return seq
+    
+    def _Apply_Blocks(self, seq, start_, end, starts, sizes, n_flag):
+        """
+        Apply the blocks, described by [starts] and [sizes], which overlap the
+        region [start_]-[end] (0-based, half-open) to [seq], which is the
+        sequence of said region.
+        
+        If [n_flag] is True, the blocks are replaced with Ns. Otherwise, the
+        blocks are made lowercase.
+        """
+        i = bisect_right(starts, start_) - 1
+        if i < 0: i = 0
+        pieces = []
+        prev = 0
+        while i < len(starts) and starts[i] < end:
+            a = starts[i] - start_
+            b = a + sizes[i]
+            if a < prev: a = prev
+            if b > len(seq): b = len(seq)
+            if b > a:
+                pieces.append(seq[prev:a])
+                if n_flag: pieces.append("N" * (b - a))
+                else: pieces.append(seq[a:b].lower())
+                prev = b
+            i += 1
+        if not pieces: return seq
+        pieces.append(seq[prev:])
+        return "".join(pieces)
+
+
+
+class Loaded_Sequence:
+    """
+    A random-access sequence object for a single-sequence FASTA file, which is
+    read into memory in its entirety.
+    
+    Has the same sequence interface as Packed_Sequence, allowing FASTA genomes
+    to be used where a packed genome is expected.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path):
+        """
+        Read the FASTA file at [file_path] into memory.
+        
+        Raise an IOError if the file cannot be read.
+        """
+        self.file_path = file_path
+        f = open(file_path, "U")
+        self.name = f.readline().strip()[1:].split("\t")[0]
+        lines = f.read().split("\n")
+        f.close()
+        self.seq = "".join([line.strip() for line in lines])
+        self.length = len(self.seq)
+    
+    def Close(self):
+        """
+        Release the sequence.
+        """
+        self.seq = ""
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Get_Name(self):
+        """
+        Return the name of the sequence.
+        """
+        return self.name
+    
+    def Get_Length(self):
+        """
+        Return the length of the sequence.
+        """
+        return self.length
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Get_Slice(self, start, end):
+        """
+        Return the nucleotides between [start] and [end], inclusive. (1-based)
+        Coordinates beyond either end of the sequence are trimmed.
+        
+        Get_Slice(int, int) -> str
+        """
+        if start < 1: start = 1
+        return self.seq[start-1:end]
+
+
+
+class Genome_Folder:
+    """
+    Provides random access to the chromosomes in a genome folder, which may
+    contain packed files, FASTA files, or a mixture of both.
+    
+    Chromosomes are identified by their file names, minus the file extension,
+    in the same manner as in Sequence_Extractor.py and Sequence_Inserter.py.
+    Only one chromosome is kept open at a time. Packed files are preferred over
+    FASTA files if both are present for the same chromosome.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, dirpath):
+        """
+        Create a Genome Folder object for the folder at [dirpath].
+        """
+        self.dirpath = dirpath
+        self.paths = {} # chr_name : filepath
+        for name in sorted(os.listdir(dirpath)):
+            chr_name = name.split(".")[0]
+            path = dirpath + "\\" + name
+            if Is_2Bit_Path(name):
+                self.paths[chr_name] = path
+            elif chr_name not in self.paths:
+                for ext in LIST__FASTA:
+                    if name.endswith(ext): self.paths[chr_name] = path
+        self._name = ""
+        self._seq = None
+    
+    def Close(self):
+        """
+        Close the currently open chromosome, if any.
+        """
+        if self._seq: self._seq.Close()
+        self._name = ""
+        self._seq = None
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Get_Chromosomes(self):
+        """
+        Return a sorted list of the names of all the chromosomes in the folder.
+        """
+        return sorted(self.paths.keys())
+    
+    def Get_Chromosome(self, chr_name):
+        """
+        Return the sequence object (Packed_Sequence or Loaded_Sequence) of the
+        chromosome named [chr_name], opening it if necessary.
+        Return None if there is no such chromosome or it cannot be read.
+        """
+        if chr_name == self._name: return self._seq
+        self.Close()
+        path = self.paths.get(chr_name, "")
+        if not path: return None
+        try:
+            if Is_2Bit_Path(path): seq = Packed_Sequence(path)
+            else: seq = Loaded_Sequence(path)
+        except:
+            return None
+        self._name = chr_name
+        self._seq = seq
+        return seq
+    
+    
+    
+    # Sequence Methods #########################################################
+    
+    def Get_Slice(self, chr_name, start, end):
+        """
+        Return the nucleotides between [start] and [end], inclusive, (1-based)
+        of the chromosome named [chr_name].
+        Return an empty string if there is no such chromosome.
+        
+        Get_Slice(str, int, int) -> str
+        """
+        seq = self.Get_Chromosome(chr_name)
+        if not seq: return ""
+        return seq.Get_Slice(start, end)
+
+
+
+class Chr_2Bit_Reader:
+    """
+    A sequential, nucleotide-by-nucleotide reader for packed chromosome files.
+    
+    Has the same reading interface as the Chr_FASTA_Reader from the File_Reader
+    module, and can be used in its place. Additionally, Read_N() allows many
+    nucleotides to be read at once.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path="", auto_open=False):
+        """
+        Creates a Chr 2Bit Reader object. The file will be opened immediately if
+        a filepath is supplied and [auto_open] is True.
+        """
+        self.file_path = file_path
+        self._seq = None
+        self._Reset()
+        if file_path and auto_open: self.Open(file_path)
+    
+    def _Reset(self):
+        """
+        Reset the read head and buffer.
+        """
+        self._length = 0
+        self._pos = 0 # Number of nucleotides read so far
+        self._buffer = ""
+        self._buffer_start = 0 # Position of the first nucleotide in the buffer
+        self._current = ""
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path=""):
+        """
+        Open the packed file at [file_path] for reading.
+        
+        Return 0 if successful.
+        Return 1 if the file could not be opened.
+        """
+        self.Close()
+        if file_path: self.file_path = file_path
+        try:
+            self._seq = Packed_Sequence(self.file_path)
+        except:
+            self._seq = None
+            return 1
+        self._length = self._seq.Get_Length()
+        return 0
+    
+    def Close(self):
+        """
+        Close the file if it is open.
+        """
+        if self._seq: self._seq.Close()
+        self._seq = None
+        self._Reset()
+    
+    def IsOpen(self):
+        """
+        Return True if a file is currently open.
+        """
+        return self._seq != None
+    
+    
+    
+    # Property Methods #########################################################
+    
+    def Get_Name(self):
+        """
+        Return the name of the chromosome.
+        """
+        if self._seq: return self._seq.Get_Name()
+        return ""
+    
+    def Get_Length(self):
+        """
+        Return the length of the chromosome.
+        """
+        return self._length
+    
+    def Get_Position(self):
+        """
+        Return the number of nucleotides which have been read so far. This is
+        also the (1-based) position of the current nucleotide.
+        """
+        return self._pos
+    
+    
+    
+    # File Reading Methods #####################################################
+    
+    def End(self):
+        """
+        Return True if there are no more nucleotides to be read.
+        """
+        return self._pos >= self._length
+    
+    def Read(self):
+        """
+        Read the next nucleotide.
+        """
+        i = self._pos - self._buffer_start
+        if i >= len(self._buffer):
+            self._Fill(self._pos)
+            i = 0
+        self._current = self._buffer[i]
+        self._pos += 1
+    
+    def Read_N(self, n):
+        """
+        Read the next [n] nucleotides and return them as a string. Fewer than
+        [n] nucleotides will be returned if the end of the chromosome is
+        reached. The last nucleotide read becomes the current nucleotide.
+        
+        Read_N(int) -> str
+        """
+        if n < 1: return ""
+        i = self._pos - self._buffer_start
+        if i + n <= len(self._buffer):
+            seq = self._buffer[i:i+n]
+        else:
+            seq = self._seq.Get_Slice(self._pos + 1, self._pos + n)
+        if seq:
+            self._pos += len(seq)
+            self._current = seq[-1]
+        return seq
+    
+    def _Fill(self, pos):
+        """
+        Fill the buffer, starting with the nucleotide after position [pos].
+        """
+        self._buffer = self._seq.Get_Slice(pos + 1, pos + BUFFER_SIZE)
+        self._buffer_start = pos
+    
+    def Get(self):
+        """
+        Return the current nucleotide.
+        """
+        return self._current
+    
+    def Get_Current(self):
+        """
+        Return the current nucleotide.
+        """
+        return self._current
+
+
+
+class Fragment_Table_Reader:
+    """
+    A reader for fragment coordinates tables, as produced by
+    Generate_Fragments.py. Each fragment's sequence is sliced out of a genome
+    folder (packed or FASTA) as the fragment is read.
+    
+    Has the same reading interface as the FASTA_Reader from the File_Reader
+    module, and can be used in its place.
+    
+    A fragment coordinates table is a tab-separated file with the following
+    columns:
+        1)  Chromosome name
+        2)  Start (1-based, inclusive)
+        3)  End (1-based, inclusive)
+        4)  Directionality ("+" or "-")
+        5)  Fragment name
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, genome_dirpath):
+        """
+        Creates a Fragment Table Reader object, which will obtain sequences from
+        the genome folder at [genome_dirpath].
+        """
+        self.genome = Genome_Folder(genome_dirpath)
+        self.file = None
+        self._next = ""
+        self._offset = 0 # Position of the next fragment in the file
+        self._current = ["", "", ""]
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path):
+        """
+        Open the fragment coordinates table at [file_path] for reading.
+        
+        Return 0 if successful.
+        Return 1 if the file could not be opened.
+        """
+        self.Close()
+        try:
+            self.file = open(file_path, "U")
+        except:
+            self.file = None
+            return 1
+        self._offset = 0
+        self._next = self.file.readline()
+        return 0
+    
+    def Close(self):
+        """
+        Close the file and the genome, if they are open.
+        """
+        if self.file: self.file.close()
+        self.file = None
+        self._next = ""
+        self.genome.Close()
+    
+    
+    
+    # File Reading Methods #####################################################
+    
+    def End(self):
+        """
+        Return True if there are no more fragments to be read.
+        """
+        return not self._next
+    
+    def Read(self):
+        """
+        Read the next fragment, and obtain its sequence from the genome.
+        """
+        values = self._next.rstrip("\r\n").split("\t")
+        self._offset = self.file.tell()
+        self._next = self.file.readline()
+        chr_name, start, end, direction, name = values[:5]
+        seq = self.genome.Get_Slice(chr_name, int(start), int(end))
+        if direction == "-": seq = Reverse_Complement(seq)
+        self._current = [name, "\t".join(values[:4]), seq]
+    
+    def Get_Current_SOFT(self):
+        """
+        Return the current fragment as a list containing its name, annotation,
+        and sequence. The annotation consists of the first four columns of the
+        fragment's row.
+        """
+        return self._current
+    
+    def Get_Offset(self):
+        """
+        Return the position in the file of the next fragment to be read.
+        """
+        return self._offset
+    
+    def Seek(self, offset):
+        """
+        Move to the fragment at [offset] in the file, as returned by
+        Get_Offset(). It will be the next fragment to be read.
+        """
+        self.file.seek(offset)
+        self._offset = offset
+        self._next = self.file.readline()
+
+
+
+class Packed_File_Writer:
+    """
+    A writer for packed files, containing a single sequence.
+    
+    Nucleotides are packed in batches as they are written, and the packed
+    sequence is staged in a temporary file. The final file is assembled when the
+    writer is closed, as the N and mask block tables must precede the packed
+    sequence.
+    
+    Has the same writing methods as the Width_File_Writer from the File_Writer
+    module. As packed files have no lines, Newline() does nothing.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path="", name=""):
+        """
+        Creates a Packed File Writer object. The file will be opened immediately
+        if a filepath is supplied.
+        """
+        self.file_path = ""
+        self.name = ""
+        self._temp = None
+        if file_path: self.Open(file_path, name)
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path, name=""):
+        """
+        Begin writing a sequence named [name] to a packed file at [file_path].
+        If no name is specified, the name of the file, minus the file extension,
+        is used.
+        
+        Return 0 if successful.
+        Return 1 if the file could not be written to.
+        """
+        if self._temp: self.Close()
+        if not name:
+            name = os.path.basename(file_path.replace("\\", "/"))
+            name = name.split(".")[0]
+        try:
+            f = open(file_path, "wb")
+            f.close()
+            self._temp = tempfile.TemporaryFile()
+        except:
+            self._temp = None
+            return 1
+        self.file_path = file_path
+        self.name = name[:255]
+        self._size = 0
+        self._buffer = []
+        self._buffered = 0
+        self._leftover = ""
+        self._n_blocks = []
+        self._mask_blocks = []
+        return 0
+    
+    def IsOpen(self):
+        """
+        Return True if a file is currently open.
+        """
+        return self._temp != None
+    
+    def Close(self):
+        """
+        Write the packed file, and close it.
+        """
+        if not self._temp: return
+        self._Flush()
+        if self._leftover:
+            self._temp.write(Pack_Sequence(self._leftover))
+            self._leftover = ""
+        # Header, index, and record
+        n_count = len(self._n_blocks)
+        mask_count = len(self._mask_blocks)
+        offset = 16 + 1 + len(self.name) + 4
+        sb = struct.pack("<IIII", TWOBIT_SIGNATURE, 0, 1, 0)
+        sb += chr(len(self.name)) + self.name + struct.pack("<I", offset)
+        sb += struct.pack("<II", self._size, n_count)
+        sb += struct.pack("<%dI" % n_count, *[b[0] for b in self._n_blocks])
+        sb += struct.pack("<%dI" % n_count, *[b[1] for b in self._n_blocks])
+        sb += struct.pack("<I", mask_count)
+        sb += struct.pack("<%dI" % mask_count,
+                *[b[0] for b in self._mask_blocks])
+        sb += struct.pack("<%dI" % mask_count,
+                *[b[1] for b in self._mask_blocks])
+        sb += struct.pack("<I", 0)
+        # Assemble
+        o = open(self.file_path, "wb")
+        o.write(sb)
+        self._temp.seek(0)
+        data = self._temp.read(BUFFER_SIZE)
+        while data:
+            o.write(data)
+            data = self._temp.read(BUFFER_SIZE)
+        o.close()
+        self._temp.close()
+        self._temp = None
+    
+    def Close_Newline(self):
+        """
+        Write the packed file, and close it.
+        """
+        self.Close()
+    
+    
+    
+    # File Writing Methods #####################################################
+    
+    def Write(self, seq):
+        """
+        Write a sequence of nucleotides to the file.
+        """
+        self._buffer.append(seq)
+        self._buffered += len(seq)
+        if self._buffered >= BUFFER_SIZE: self._Flush()
+    
+    def Write_1(self, char):
+        """
+        Write a single nucleotide to the file.
+        """
+        self._buffer.append(char)
+        self._buffered += 1
+        if self._buffered >= BUFFER_SIZE: self._Flush()
+    
+    def Write_Packed(self, data, length):
+        """
+        Write a sequence of nucleotides which have already been packed by
+        Pack_Sequence() to the file. [length] is the number of nucleotides in
+        [data].
+        
+        All previous writes must have been a multiple of 4 nucleotides in
+        length, and [data] must not contain any Ns.
+        """
+        self._Flush()
+        self._temp.write(data)
+        self._size += length
+    
+    def Newline(self):
+        """
+        Does nothing. Packed files have no lines.
+        """
+        pass
+    
+    def _Flush(self):
+        """
+        Record the N and mask blocks of the buffered nucleotides, and pack them.
+        """
+        if not self._buffer: return
+        seq = "".join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        Get_Blocks(seq, REGEX__N, self._size, self._n_blocks)
+        Get_Blocks(seq, REGEX__mask, self._size, self._mask_blocks)
+        self._size += len(seq)
+        seq = self._leftover + seq
+        cutoff = len(seq) - (len(seq) % 4)
+        self._temp.write(Pack_Sequence(seq[:cutoff]))
+        self._leftover = seq[cutoff:]
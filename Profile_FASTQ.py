@@ -0,0 +1,661 @@
+HELP_DOC = """
+FASTQ PROFILER
+(version 1.0)
+by Angelo Chan
+
+This is a program for learning the characteristics of real sequencing reads, so
+that the Read Generator from this (Synthetic In-Silico Genome Generator) library
+can be calibrated against a real sequencing run.
+
+The input file is streamed in a single pass, in constant memory, so FASTQ files
+of any size can be profiled. Reads are processed in large batches, and the
+quality scores of each batch are counted a whole cycle (read position) at a
+time, rather than one base at a time.
+
+The following are recorded in the profile:
+    
+    1)  The quality score histogram of each cycle
+    2)  The quality score histogram of each cycle, following each quality score
+        in the previous cycle (If "-m Y" is used)
+    3)  The read length distribution
+    4)  The truncation length distribution (The number of bases by which each
+        read is shorter than the longest read)
+    5)  The substitution matrix, by reference base, preceding reference base,
+        and quality score bin (SAM input only)
+
+The substitution matrix requires the reference bases, so it can only be learned
+from aligned reads. A SAM file (with MD tags) may be used as input instead of a
+FASTQ file for this purpose. Only primary alignments are used.
+
+The profile is a JSON file, which can be used by the Read Generator using its
+"--quality-profile" option.
+
+
+
+USAGE:
+    
+    python27 Profile_FASTQ.py <input_filepath> [-o <output_filepath>] [-p
+            <phred>] [-n <max_reads>] [-m Y|N] [--profile [<pstats_filepath>]]
+
+
+
+MANDATORY:
+    
+    input_filepath
+        
+        The filepath of the input file. (FASTQ or SAM) Gzipped FASTQ files are
+        also accepted.
+
+OPTIONAL:
+    
+    output_filepath
+        
+        (DEFAULT path generation available)
+        
+        The filepath of the profile to be output.
+    
+    phred
+        
+        (DEFAULT: phred33)
+        
+        The phred system used to denote the quality scores of the input reads.
+    
+    max_reads
+        
+        (DEFAULT: 0)
+        
+        The maximum number of reads to profile. Specify 0 to profile all reads.
+    
+    markov
+        (-m)
+        
+        (DEFAULT: Y)
+        
+        Whether or not to record the dependency of each quality score on the
+        quality score of the previous base.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent reading and counting once the run
+        is complete. If a filepath is specified after the flag, the run is also
+        profiled using cProfile, and the statistics are saved to said file.
+        (They can be examined using the pstats module)
+
+
+
+EXAMPLES SCENARIO EXPLANATION:
+    
+    1:
+    Profile a gzipped FASTQ file.
+    
+    2:
+    Profile the first million reads of a SAM file, including substitutions.
+
+EXAMPLES:
+    
+    python27 Profile_FASTQ.py Path/Reads_r1.fq.gz
+    
+    python27 Profile_FASTQ.py Path/Aligned.sam -o Path/Profile.json -n 1000000
+
+USAGE:
+    
+    python27 Profile_FASTQ.py <input_filepath> [-o <output_filepath>] [-p
+            <phred>] [-n <max_reads>] [-m Y|N] [--profile [<pstats_filepath>]]
+"""
+
+NAME = "Profile_FASTQ.py"
+
+
+
+# Configurations ###############################################################
+
+AUTORUN = True
+
+WRITE_PREVENT = False # Completely prevent overwritting existing files
+WRITE_CONFIRM = True # Check to confirm overwritting existing files
+
+PRINT_ERRORS = True
+PRINT_PROGRESS = True
+PRINT_METRICS = True
+
+
+
+# Minor Configurations #########################################################
+
+FILEMOD = "__PROFILE.json"
+
+BATCH_SIZE = 10000 # Number of reads counted at a time
+
+PRINT_INTERVAL = 100000 # Number of reads between progress checks
+
+MAX_QUALITY = 42
+
+
+
+# Defaults #####################################################################
+"NOTE: altering these will not alter the values displayed in the HELP DOC"
+
+DEFAULT__phred = "phred33"
+
+DEFAULT__max_reads = 0
+
+DEFAULT__markov = True
+
+
+
+# Imported Modules #############################################################
+
+import sys
+import os
+
+import gzip
+import json
+import re
+
+from bisect import bisect_right
+from itertools import islice, izip_longest
+from operator import add
+
+
+
+import _Controlled_Print as PRINT
+import Profiler as PROFILE
+from _Command_Line_Parser import *
+
+from NSeq_Match import *
+from Reverse_Complement import *
+from Phred import *
+
+from Progress import *
+
+
+
+# Strings ######################################################################
+
+STR__use_help = "\nUse the -h option for help:\n\t python "\
+"Profile_FASTQ.py -h"
+
+
+
+STR__invalid_phred = """
+ERROR: Invalid phred system specified: {s}
+Please specify one of:
+    phred33
+    phred64"""
+
+STR__invalid_max_reads = """
+ERROR: Invalid maximum number of reads specified: {s}
+Please specify a non-negative integer."""
+
+STR__no_reads = "\nERROR: No reads were found in the input file."
+
+STR__input_invalid = "\nERROR: An unexpected error occured when reading from "\
+        "the input file."
+STR__output_invalid = "\nERROR: An unexpected error occured when writing to "\
+        "the output file."
+
+
+
+STR__metrics = """
+                 Reads profiled: {R}
+                 Bases profiled: {B}
+            Average read length: {L}
+          Average quality score: {Q}
+         Substitutions observed: {S}"""
+
+
+
+STR__Profile_begin = "\nRunning Profile_FASTQ..."
+
+STR__Profile_complete = "\nProfile_FASTQ successfully finished."
+
+
+
+# Lists ########################################################################
+
+LIST__SAM = [".sam"]
+
+LIST__quality_bins = [0, 10, 20, 30] # Lower bounds of the quality score bins
+
+# Dictionaries #################################################################
+
+DICT__phred_offsets = {}
+for i in LIST__phred33: DICT__phred_offsets[i] = 33
+for i in LIST__phred64: DICT__phred_offsets[i] = 64
+
+DICT__base_indexes = {"A": 0, "C": 1, "G": 2, "T": 3}
+
+DICT__complements = {"A": "T", "C": "G", "G": "C", "T": "A", "N": "N"}
+
+
+
+# Apply Globals ################################################################
+
+PRINT.PRINT_ERRORS = PRINT_ERRORS
+PRINT.PRINT_PROGRESS = PRINT_PROGRESS
+PRINT.PRINT_METRICS = PRINT_METRICS
+
+
+
+# Functions ####################################################################
+
+def Profile_FASTQ(path_in, path_out, phred_offset, max_reads=0, markov=True):
+    """
+    Profile the reads in a FASTQ or SAM file, and write the profile to a JSON
+    file.
+    
+    @path_in
+            (str - filepath)
+            The filepath of the input FASTQ or SAM file.
+    @path_out
+            (str - filepath)
+            The filepath of the profile to be written.
+    @phred_offset
+            (int)
+            The ASCII value of the character denoting a quality score of 0.
+    @max_reads
+            (int)
+            The maximum number of reads to profile. All reads are profiled if
+            this is 0.
+    @markov
+            (bool)
+            Whether or not to record the dependency of each quality score on
+            the quality score of the previous base.
+    
+    Return a value of 0 if the function runs successfully.
+    Return a value of 1 if there is a problem with the input file.
+    Return a value of 2 if there is a problem with the output file.
+    Return a value of 3 if there are no reads in the input file.
+    
+    Profile_FASTQ(str, str, int, int, bool) -> int
+    """
+    PRINT.printP(STR__Profile_begin)
+    # Setup
+    cycle_counts = []
+    transition_counts = []
+    lengths = {}
+    substitutions = None
+    sam = os.path.splitext(path_in)[1].lower() in LIST__SAM
+    if sam:
+        substitutions = [{} for i in LIST__quality_bins]
+    try:
+        if path_in.lower().endswith(".gz"): f = gzip.open(path_in, "rb")
+        else: f = open(path_in, "rb")
+        progress = Progress_Reporter(NAME, "reads")
+    except:
+        return 1
+    # Main loop
+    reads = 0
+    report_at = PRINT_INTERVAL
+    try:
+        while not max_reads or reads < max_reads:
+            if max_reads: size = min(BATCH_SIZE, max_reads - reads)
+            else: size = BATCH_SIZE
+            if sam: batch = Read_SAM_Batch(f, size, substitutions, phred_offset)
+            else: batch = Read_FASTQ_Batch(f, size)
+            if not batch: break
+            reads += len(batch)
+            Count_Qualities(batch, cycle_counts, transition_counts,
+                    phred_offset, markov)
+            for length in map(len, batch):
+                lengths[length] = lengths.get(length, 0) + 1
+            if reads >= report_at:
+                progress.Update(reads)
+                report_at += PRINT_INTERVAL
+        f.close()
+    except:
+        return 1
+    progress.End_Section(reads)
+    progress.Finish()
+    if not reads: return 3
+    # Write profile
+    longest = max(lengths)
+    profile = {"phred": phred_offset, "reads": reads,
+            "cycles": cycle_counts,
+            "lengths": dict([(str(k), lengths[k]) for k in lengths]),
+            "truncations": dict([(str(longest - k), lengths[k])
+                    for k in lengths])}
+    if markov:
+        profile["transitions"] = [dict([(str(k), row[k]) for k in row])
+                for row in transition_counts]
+    if sam:
+        profile["quality_bins"] = LIST__quality_bins
+        profile["substitutions"] = substitutions
+    try:
+        o = open(path_out, "w")
+        o.write(json.dumps(profile, sort_keys = True))
+        o.close()
+    except:
+        return 2
+    PRINT.printP(STR__Profile_complete)
+    # Reporting
+    Report_Metrics(profile)
+    PROFILE.Report()
+    # Wrap up
+    return 0
+
+
+
+def Read_FASTQ_Batch(f, size):
+    """
+    Read up to [size] reads from the FASTQ file [f].
+    
+    Return a list of the quality strings of the reads.
+    
+    Read_FASTQ_Batch(file, int) -> list<str>
+    """
+    lines = list(islice(f, 4*size))
+    return [line.rstrip("\r\n") for line in lines[3::4]]
+
+def Read_SAM_Batch(f, size, substitutions, phred_offset):
+    """
+    Read up to [size] primary alignments from the SAM file [f], and record the
+    substitutions in those reads in [substitutions].
+    
+    Return a list of the quality strings of the reads, in the orientation in
+    which they were sequenced.
+    
+    Read_SAM_Batch(file, int, list<dict>, int) -> list<str>
+    """
+    quals = []
+    while len(quals) < size:
+        line = f.readline()
+        if not line: break
+        if line.startswith("@"): continue # Header
+        values = line.rstrip("\r\n").split("\t")
+        flag = int(values[1])
+        if flag & 2304: continue # Secondary or supplementary
+        seq = values[9].upper()
+        qual = values[10]
+        if qual == "*": continue
+        reverse = bool(flag & 16)
+        md = ""
+        if not flag & 4: # Mapped
+            for tag in values[11:]:
+                if tag.startswith("MD:Z:"): md = tag[5:]
+        if md: refs = Get_Reference_Bases(seq, values[5], md)
+        # Orientation in which the read was sequenced
+        if reverse:
+            qual = qual[::-1]
+            if md:
+                seq = Reverse_Complement(seq)
+                refs = [DICT__complements.get(r, "N") for r in refs[::-1]]
+        if md: Count_Substitutions(seq, qual, refs, substitutions, phred_offset)
+        quals.append(qual)
+    return quals
+
+def Get_Reference_Bases(seq, cigar, md):
+    """
+    Return a list of the reference bases aligned to each base of the read
+    [seq], using its [cigar] string and MD tag. Bases which are not aligned to
+    the reference (insertions and soft-clipped bases) are denoted by "N".
+    
+    Get_Reference_Bases(str, str, str) -> list<str>
+    """
+    # Expand the MD tag (None for a matching base)
+    md_refs = []
+    for token in re.findall("[0-9]+|\^[A-Z]+|[A-Z]", md.upper()):
+        if token[0].isdigit(): md_refs += [None] * int(token)
+        elif token[0] != "^": md_refs.append(token) # Deletions are skipped
+    # Walk the CIGAR string
+    refs = ["N"] * len(seq)
+    read_pos = 0
+    md_pos = 0
+    for length, op in re.findall("([0-9]+)([MIDNSHP=X])", cigar):
+        length = int(length)
+        if op in "M=X":
+            for i in range(length):
+                if md_pos < len(md_refs) and md_refs[md_pos]:
+                    refs[read_pos] = md_refs[md_pos]
+                elif read_pos < len(seq): refs[read_pos] = seq[read_pos]
+                read_pos += 1
+                md_pos += 1
+        elif op in "IS": read_pos += length
+    return refs[:len(seq)]
+
+def Count_Substitutions(seq, qual, refs, substitutions, phred_offset):
+    """
+    Record the read base observed for each reference base in [refs], by quality
+    score bin and preceding reference base, in [substitutions]. Matches are
+    recorded as well as substitutions, so that error rates can be derived.
+    
+    Count_Substitutions(str, str, list<str>, list<dict>, int) -> None
+    """
+    previous = "N"
+    for i in range(len(seq)):
+        ref = refs[i]
+        base = DICT__base_indexes.get(seq[i], -1)
+        if ref in DICT__base_indexes and base != -1:
+            q = ord(qual[i]) - phred_offset
+            b = bisect_right(LIST__quality_bins, q) - 1
+            if b < 0: b = 0
+            key = previous + ref
+            row = substitutions[b].get(key)
+            if not row:
+                row = [0, 0, 0, 0]
+                substitutions[b][key] = row
+            row[base] += 1
+        previous = ref
+
+def Count_Qualities(quals, cycle_counts, transition_counts, phred_offset,
+            markov):
+    """
+    Add the quality scores of a batch of reads to the per-cycle quality score
+    counts, and optionally to the per-cycle transition counts.
+    
+    The quality strings are transposed into cycles, so the scores within each
+    cycle are counted using string operations, and the pairs of scores in
+    consecutive cycles are counted in a single pass.
+    
+    Count_Qualities(list<str>, list<list<int>>, list<dict<int:list<int>>>, int,
+            bool) -> None
+    """
+    columns = list(izip_longest(*quals, fillvalue = ""))
+    while len(cycle_counts) < len(columns):
+        cycle_counts.append([0] * (MAX_QUALITY + 1))
+        transition_counts.append({})
+    previous = None
+    for i in range(len(columns)):
+        column = columns[i]
+        # Per-cycle counts
+        column_str = "".join(column)
+        counts = cycle_counts[i]
+        for char in set(column_str):
+            q = min(max(ord(char) - phred_offset, 0), MAX_QUALITY)
+            counts[q] += column_str.count(char)
+        # Transition counts
+        if markov and previous:
+            pairs = {}
+            for pair in map(add, previous, column):
+                pairs[pair] = pairs.get(pair, 0) + 1
+            for pair in pairs:
+                if len(pair) != 2: continue # Read has ended
+                p = min(max(ord(pair[0]) - phred_offset, 0), MAX_QUALITY)
+                q = min(max(ord(pair[1]) - phred_offset, 0), MAX_QUALITY)
+                row = transition_counts[i].get(p)
+                if not row:
+                    row = [0] * (MAX_QUALITY + 1)
+                    transition_counts[i][p] = row
+                row[q] += pairs[pair]
+        previous = column
+
+def Report_Metrics(profile):
+    """
+    Print a report into the command line interface of the number of reads and
+    bases profiled, the average read length and quality score, and the number
+    of substitutions observed.
+    
+    Report_Metrics(dict) -> None
+    """
+    reads = profile["reads"]
+    bases = 0
+    score = 0
+    for counts in profile["cycles"]:
+        for q in range(len(counts)):
+            bases += counts[q]
+            score += q * counts[q]
+    substitutions = 0
+    for bin in profile.get("substitutions", []):
+        for key in bin:
+            ref = DICT__base_indexes[key[1]]
+            substitutions += sum(bin[key]) - bin[key][ref]
+    if not profile.get("substitutions"): substitutions = "N/A"
+    str_avg_len = Trim_Percentage_Str(str(float(bases)/reads) + "0", 2)
+    str_avg_score = Trim_Percentage_Str(str(float(score)/bases) + "0", 2)
+    PRINT.printM(STR__metrics.format(R = reads, B = bases, L = str_avg_len,
+            Q = str_avg_score, S = substitutions))
+
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the stages of the profiling process.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(globals(), "Read_FASTQ_Batch", "Reading")
+    PROFILE.Instrument(globals(), "Read_SAM_Batch", "Reading")
+    PROFILE.Instrument(globals(), "Count_Qualities", "Counting")
+    PROFILE.Instrument(globals(), "Count_Substitutions", "Counting")
+
+
+
+# Command Line Parsing #########################################################
+
+def Parse_Command_Line_Input__Profile_FASTQ(raw_command_line_input):
+    """
+    Parse the command line input and call the Profile_FASTQ function with
+    appropriate arguments if the command line input is valid.
+    """
+    PRINT.printP(STR__parsing_args)
+    # Remove the runtime environment variable and program name from the inputs
+    inputs = Strip_Non_Inputs(raw_command_line_input, NAME)
+    
+    # No inputs
+    if not inputs:
+        PRINT.printE(STR__no_inputs)
+        PRINT.printE(STR__use_help)
+        return 1
+    
+    # Help option
+    if inputs[0] in LIST__help:
+        print(HELP_DOC)
+        return 0
+    
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
+    # Validate mandatory inputs
+    path_in = inputs.pop(0)
+    valid = Validate_Read_Path(path_in)
+    if valid == 1:
+        PRINT.printE(STR__IO_error_read.format(f = path_in))
+        PRINT.printE(STR__use_help)
+        return 1
+    
+    # Set up rest of the parsing
+    path_out = Generate_Default_Output_File_Path_From_Folder(path_in, FILEMOD)
+    phred = DEFAULT__phred
+    max_reads = DEFAULT__max_reads
+    markov = DEFAULT__markov
+    
+    # Validate optional inputs (except output path)
+    while inputs:
+        arg = inputs.pop(0)
+        try: # Second argument
+            arg2 = inputs.pop(0)
+        except:
+            PRINT.printE(STR__insufficient_inputs)
+            PRINT.printE(STR__use_help)
+            return 1
+        if arg == "-o": # Output file - Actual validation done later
+            path_out = arg2
+        elif arg == "-p":
+            phred = arg2
+            if phred not in DICT__phred_offsets:
+                PRINT.printE(STR__invalid_phred.format(s = arg2))
+                return 1
+        elif arg == "-n":
+            max_reads = Validate_Int_NonNeg(arg2)
+            if max_reads == -1:
+                PRINT.printE(STR__invalid_max_reads.format(s = arg2))
+                return 1
+        elif arg == "-m":
+            markov = Validate_Bool(arg2)
+            if markov == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
+        else: # Invalid
+            arg = Strip_X(arg)
+            PRINT.printE(STR__invalid_argument.format(s = arg))
+            PRINT.printE(STR__use_help)
+            return 1
+    
+    # Validate output path
+    valid_out = Validate_Write_Path(path_out)
+    if valid_out == 2: return 0
+    if valid_out == 3:
+        PRINT.printE(STR__IO_error_write_forbid)
+        return 1
+    if valid_out == 4:
+        PRINT.printE(STR__IO_error_write_unable)
+        return 1
+    
+    # Run program
+    exit_state = Profile_FASTQ(path_in, path_out, DICT__phred_offsets[phred],
+            max_reads, markov)
+    
+    # Exit
+    if exit_state == 0: return 0
+    else:
+        if exit_state == 1: PRINT.printE(STR__input_invalid)
+        if exit_state == 2: PRINT.printE(STR__output_invalid)
+        if exit_state == 3: PRINT.printE(STR__no_reads)
+        PRINT.printE(STR__use_help)
+        return 1
+
+def Validate_Write_Path(filepath):
+    """
+    Validates the filepath of the output file.
+    Return 0 if the filepath is writtable.
+    Return 1 if the user decides to overwrite an existing file.
+    Return 2 if the user declines to overwrite an existing file.
+    Return 3 if the file exists and the program is set to forbid overwriting.
+    Return 4 if the program is unable to write to the filepath specified.
+    
+    Validate_Write_Path(str) -> int
+    """
+    try:
+        f = open(filepath, "U")
+        f.close()
+    except: # File does not exist.
+        try:
+            f = open(filepath, "w")
+            f.close()
+            return 0 # File does not exist and it is possible to write
+        except:
+            return 4 # File does not exist but it is not possible to write
+    # File exists
+    if WRITE_PREVENT: return 3
+    if WRITE_CONFIRM:
+        confirm = raw_input(STR__overwrite_confirm.format(f = filepath))
+        if confirm not in LIST__yes: return 2
+    # User is not prevented from overwritting and may have chosen to overwrite
+    try:
+        f = open(filepath, "w")
+        f.close()
+        if WRITE_CONFIRM: return 1 # User has chosen to overwrite existing file
+        return 0 # Overwriting existing file is possible
+    except:
+        return 4 # Unable to write to specified filepath
+
+
+
+# Main Loop ####################################################################
+
+if AUTORUN and (__name__ == "__main__"):
+    exit_code = Parse_Command_Line_Input__Profile_FASTQ(sys.argv)
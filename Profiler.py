@@ -0,0 +1,246 @@
+"""
+PROFILER
+(version 1.0)
+by Angelo Chan
+
+This module contains a lightweight instrumentation layer, consisting of named
+timers and counters, for finding out where the time goes within a run of any of
+the programs in this library.
+
+Instrumentation is off by default. Timers are installed by wrapping the relevant
+functions and methods only once profiling has been enabled, so there is no
+overhead at all when profiling is not in use.
+
+Each timer records the number of calls made and the time spent in those calls,
+excluding any time spent in other instrumented calls made from within them. The
+times of all the timers therefore add up to the total instrumented time.
+
+Optionally, the standard cProfile profiler can also be run, with its statistics
+saved to a file which can be examined using the pstats module.
+"""
+
+# Imported Modules #############################################################
+
+import cProfile
+import pstats
+
+from timeit import default_timer as Timer
+
+import _Controlled_Print as PRINT
+
+
+
+# Configurations ###############################################################
+
+ENABLED = False
+
+PSTATS_LINES = 20 # Number of functions to list from the cProfile statistics
+
+
+
+# Strings ######################################################################
+
+STR__profile_flag = "--profile"
+
+STR__report = """
+Profile (wall time: {t:.2f}s):
+
+    {h1:<24}{h2:>12}{h3:>12}{h4:>8}{h5:>16}
+{s}"""
+STR__report_line = "    {s:<24}{c:>12}{t:>11.2f}s{p:>7.1f}%{b:>16}\n"
+
+STR__pstats_saved = "\ncProfile statistics saved to: {f}"
+
+
+
+# Lists ########################################################################
+
+LIST__stack = [] # Time spent in nested instrumented calls, per level
+
+
+
+# Dictionaries #################################################################
+
+DICT__timers = {} # Timer name : [calls, seconds]
+DICT__counters = {} # Counter name : count
+
+
+
+# Global Variables #############################################################
+
+_start = 0.0
+_profiler = None
+_pstats_path = ""
+
+
+
+# Functions ####################################################################
+
+def Parse_Profile_Flag(inputs, mandatory=1):
+    """
+    Remove the profiling flag, and the pstats filepath which may follow it, from
+    a list of command line inputs, the first [mandatory] of which (not counting
+    the flag) are the program's mandatory inputs.
+    
+    A pstats filepath can only follow the flag if the flag comes after the
+    mandatory inputs. Otherwise, the input following the flag is a mandatory
+    input, and is left in place.
+    
+    Return a list containing whether or not the profiling flag was present, and
+    the pstats filepath. (An empty string if none was specified)
+    
+    Parse_Profile_Flag(list<str>, int) -> [bool, str]
+    """
+    if STR__profile_flag not in inputs: return [False, ""]
+    i = inputs.index(STR__profile_flag)
+    inputs.pop(i)
+    pstats_path = ""
+    if i >= mandatory and i < len(inputs) and not inputs[i].startswith("-"):
+        pstats_path = inputs.pop(i)
+    return [True, pstats_path]
+
+def Enable(pstats_path=""):
+    """
+    Enable profiling. If [pstats_path] is specified, cProfile is also run, and
+    its statistics are saved to [pstats_path] when Report() is called.
+    
+    Enable(str) -> None
+    """
+    global ENABLED, _start, _profiler, _pstats_path
+    ENABLED = True
+    _start = Timer()
+    _pstats_path = pstats_path
+    if pstats_path:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def Instrument(target, name, timer_name):
+    """
+    Replace the function [name] within [target] with a version which records
+    its calls under the timer [timer_name]. [target] may be a Class, a module,
+    or a dictionary of globals.
+    
+    Does nothing if profiling has not been enabled.
+    
+    Instrument(class/module/dict, str, str) -> None
+    """
+    if not ENABLED: return
+    if type(target) == dict: function = target[name]
+    else: function = getattr(target, name)
+    timer = DICT__timers.setdefault(timer_name, [0, 0.0])
+    def Timed(*args, **kwargs):
+        LIST__stack.append(0.0)
+        start = Timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = Timer() - start
+            nested = LIST__stack.pop()
+            timer[0] += 1
+            timer[1] += elapsed - nested
+            if LIST__stack: LIST__stack[-1] += elapsed
+    if type(target) == dict: target[name] = Timed
+    else: setattr(target, name, Timed)
+
+def Wrap_File(file, timer_name):
+    """
+    Return a version of the file object [file] whose writes are recorded under
+    the timer [timer_name], and whose written bytes are recorded under the
+    counter of the same name.
+    
+    Return [file] itself if profiling has not been enabled.
+    
+    Wrap_File(file, str) -> file/Timed_File
+    """
+    if not ENABLED: return file
+    return Timed_File(file, timer_name)
+
+def Count(counter_name, n=1):
+    """
+    Add [n] to the counter [counter_name].
+    
+    Count(str, int) -> None
+    """
+    DICT__counters[counter_name] = DICT__counters.get(counter_name, 0) + n
+
+def Report():
+    """
+    Print a breakdown of the time spent in each timer, and save the cProfile
+    statistics, if applicable.
+    
+    Does nothing if profiling has not been enabled.
+    
+    Report() -> None
+    """
+    if not ENABLED: return
+    if _profiler: _profiler.disable()
+    wall = Timer() - _start
+    if not wall: wall = 1e-9
+    # Timers
+    sb = ""
+    total = 0.0
+    for timer_name in sorted(DICT__timers, key = lambda k: -DICT__timers[k][1]):
+        calls, seconds = DICT__timers[timer_name]
+        if not calls: continue # Instrumented, but not used in this run
+        total += seconds
+        sb += STR__report_line.format(s = timer_name, c = calls, t = seconds,
+                p = 100*seconds/wall, b = DICT__counters.get(timer_name, ""))
+    other = max(wall - total, 0.0)
+    sb += STR__report_line.format(s = "(Other)", c = "", t = other,
+            p = 100*other/wall, b = "")
+    PRINT.printM(STR__report.format(t = wall, h1 = "Stage", h2 = "Calls",
+            h3 = "Time", h4 = "%", h5 = "Bytes", s = sb))
+    # cProfile
+    if _profiler:
+        _profiler.dump_stats(_pstats_path)
+        PRINT.printM(STR__pstats_saved.format(f = _pstats_path))
+        stats = pstats.Stats(_pstats_path)
+        stats.sort_stats("cumulative").print_stats(PSTATS_LINES)
+
+
+
+# Classes ######################################################################
+
+class Timed_File:
+    """
+    A wrapper for a file object, which records the time spent writing to it and
+    the number of bytes written.
+    """
+    
+    def __init__(self, file, timer_name):
+        """
+        Creates a Timed File object wrapping [file].
+        """
+        self.file = file
+        self.timer_name = timer_name
+        self._timer = DICT__timers.setdefault(timer_name, [0, 0.0])
+    
+    def write(self, string):
+        """
+        Write [string] to the file.
+        """
+        start = Timer()
+        self.file.write(string)
+        elapsed = Timer() - start
+        self._timer[0] += 1
+        self._timer[1] += elapsed
+        if LIST__stack: LIST__stack[-1] += elapsed
+        Count(self.timer_name, len(string))
+    
+    def flush(self):
+        """
+        Flush the file.
+        """
+        self.file.flush()
+    
+    def tell(self):
+        """
+        Return the current position in the file.
+        """
+        return self.file.tell()
+    
+    def close(self):
+        """
+        Close the file.
+        """
+        self.file.close()
@@ -0,0 +1,211 @@
+"""
+PROGRESS
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for reporting the progress of long runs, so that a
+stalled job can be told apart from a slow one.
+
+Each progress event contains the amount of work done so far, (usually in bases)
+the number of items emitted, (fragments, reads, etc) the current chromosome, the
+throughput since the previous event, and an estimate of the time remaining.
+Events are written to stderr, unless progress printing has been switched off
+through the _Controlled_Print module, and, optionally, to a metrics file with
+one JSON object per line. The metrics file is written to either way.
+
+Events are rate-limited. The program only asks the reporter for an update once
+every so many units of work, and the reporter only emits an event if enough time
+has passed since the previous one, so progress reporting never shows up when a
+run is profiled.
+"""
+
+# Imported Modules #############################################################
+
+import json
+import sys
+import time
+
+from timeit import default_timer as Timer
+
+import _Controlled_Print as PRINT
+
+
+
+# Configurations ###############################################################
+
+REPORT_SECONDS = 30 # Minimum number of seconds between progress events
+
+
+
+# Strings ######################################################################
+
+STR__progress = ("[{tool}] {chr}{done}{total} {unit}{percent}{counts} | " +
+        "{rate} {unit}/s")
+STR__progress_ETA = " | ETA {eta}"
+STR__progress_complete = " | Complete"
+
+
+
+# Functions ####################################################################
+
+def Format_Seconds(seconds):
+    """
+    Return a number of seconds as a string in the format "H:MM:SS".
+    
+    Format_Seconds(int/float) -> str
+    """
+    seconds = int(seconds + 0.5)
+    return "%d:%02d:%02d" % (seconds/3600, (seconds/60) % 60, seconds % 60)
+
+
+
+# Classes ######################################################################
+
+class Progress_Reporter:
+    """
+    A reporter which emits rate-limited progress events for a long run.
+    
+    The work is divided into sections, (usually chromosomes or input files) and
+    updates are given relative to the start of the current section. The reporter
+    keeps the running totals across sections.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, tool, unit="bases", total=0, metrics_path="",
+                seconds=REPORT_SECONDS, append=False):
+        """
+        Creates a Progress Reporter object for the program [tool].
+        
+        [total] is the expected amount of work, in [unit]s, and is used to
+        estimate the time remaining. It may be approximate, or 0 if unknown.
+        
+        If [metrics_path] is specified, events are also written to that file as
+        JSON lines. If [append] is True, existing events in the file are kept.
+        """
+        self.tool = tool
+        self.unit = unit
+        self.total = total
+        self.seconds = seconds
+        self.metrics = None
+        self.metrics_path = metrics_path
+        if append: mode = "a"
+        else: mode = "w"
+        if metrics_path: self.metrics = open(metrics_path, mode)
+        self._start = Timer()
+        self._last = self._start
+        self._last_done = 0
+        self._done = 0 # Totals of all finished sections
+        self._counts = {}
+        self._skipped = 0 # Work done before this run, if resumed
+        self.chr_name = ""
+    
+    
+    
+    # Reporting Methods ########################################################
+    
+    def Skip(self, done):
+        """
+        Record that [done] units of work in the current section were completed
+        before this run started, (when resuming an interrupted run) so they are
+        excluded from the throughput.
+        """
+        self._skipped = self._done + done
+        self._last_done = self._skipped
+    
+    def Get_Done(self):
+        """
+        Return the total amount of work done in all finished sections.
+        """
+        return self._done
+    
+    def Begin_Section(self, chr_name=""):
+        """
+        Begin a new section of work, on the chromosome [chr_name].
+        """
+        self.chr_name = chr_name
+    
+    def Update(self, done, chr_name=None, **counts):
+        """
+        Report that [done] units of work have been completed in the current
+        section, and that the items in [counts] have been emitted. If
+        [chr_name] is specified, it replaces the name of the current
+        chromosome.
+        
+        An event is only emitted if enough time has passed since the previous
+        one.
+        """
+        now = Timer()
+        if now - self._last < self.seconds: return
+        if chr_name != None: self.chr_name = chr_name
+        self._Emit(now, self._done + done, self._Add_Counts(counts), False)
+    
+    def End_Section(self, done, **counts):
+        """
+        Finish the current section, in which [done] units of work were
+        completed and the items in [counts] were emitted.
+        """
+        self._done += done
+        self._counts = self._Add_Counts(counts)
+    
+    def Finish(self):
+        """
+        Emit a final event and close the metrics file.
+        """
+        self._Emit(Timer(), self._done, self._counts, True)
+        if self.metrics: self.metrics.close()
+        self.metrics = None
+    
+    def _Add_Counts(self, counts):
+        """
+        Return the totals of all finished sections, plus [counts].
+        """
+        totals = dict(self._counts)
+        for name in counts: totals[name] = totals.get(name, 0) + counts[name]
+        return totals
+    
+    def _Emit(self, now, done, counts, complete):
+        """
+        Write a progress event to stderr, if progress printing is switched on,
+        and to the metrics file.
+        """
+        elapsed = now - self._start
+        interval = now - self._last
+        if complete: interval = elapsed
+        if interval > 0:
+            if complete: rate = (done - self._skipped) / interval
+            else: rate = (done - self._last_done) / interval
+        else: rate = 0.0
+        if complete or not self.total or not rate: eta = None
+        else: eta = max(self.total - done, 0) / rate
+        self._last = now
+        self._last_done = done
+        # stderr
+        if self.total and not complete:
+            total = "/{:,}".format(self.total)
+            percent = " ({:.1f}%)".format(min(100.0*done/self.total, 100.0))
+        else: total = percent = ""
+        if self.chr_name and not complete: chr_name = self.chr_name + ": "
+        else: chr_name = ""
+        sb = STR__progress.format(tool = self.tool, chr = chr_name,
+                done = "{:,}".format(done), total = total, unit = self.unit,
+                percent = percent,
+                counts = "".join([" | {:,} {}".format(counts[name], name)
+                for name in sorted(counts)]), rate = "{:,.0f}".format(rate))
+        if complete: sb += STR__progress_complete
+        elif eta != None:
+            sb += STR__progress_ETA.format(eta = Format_Seconds(eta))
+        if PRINT.PRINT_PROGRESS:
+            sys.stderr.write(sb + "\n")
+            sys.stderr.flush()
+        # Metrics file
+        if self.metrics:
+            if eta != None: eta = round(eta, 1)
+            event = {"time": time.time(), "elapsed": round(elapsed, 3),
+                    "tool": self.tool, "chromosome": self.chr_name,
+                    "unit": self.unit, "done": done, "total": self.total,
+                    "counts": counts, "rate": round(rate, 3),
+                    "eta": eta,
+                    "complete": complete}
+            self.metrics.write(json.dumps(event, sort_keys = True) + "\n")
+            self.metrics.flush()
@@ -0,0 +1,236 @@
+"""
+QUALITY MODEL
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for generating realistic read quality scores, which
+depend on the position (cycle) within the read, and optionally on the quality
+score of the previous base. (A first-order Markov model)
+
+The model is built from counts of quality scores at each cycle, and optionally
+counts of quality scores at each cycle following each possible previous quality
+score. All counts are precompiled into alias tables, so the quality score of
+each base is drawn in constant time, and the quality scores of a whole read are
+drawn in a single call.
+
+Quality models can be saved to and loaded from JSON profiles, or learned from an
+existing FASTQ file. Profiles of real sequencing runs, which also contain other
+entries, can be produced using Profile_FASTQ.py.
+
+The JSON profile contains the following entries:
+    cycles
+            A list, containing a list of counts for each cycle. Each list of
+            counts contains the number of times each quality score (0 to 42)
+            was observed.
+    transitions
+            (Optional) A list, containing a dictionary for each cycle. Each
+            dictionary maps a previous quality score to a list of counts, as
+            above. The first dictionary is empty.
+"""
+
+# Imported Modules #############################################################
+
+import gzip
+import json
+
+from Alias_Table import *
+
+
+
+# Configurations ###############################################################
+
+MAX_QUALITY = 42
+
+
+
+# Lists ########################################################################
+
+LIST__FASTQ = [".fq", ".fastq", ".fq.gz", ".fastq.gz"]
+
+
+
+# Functions ####################################################################
+
+def Is_FASTQ_Path(file_path):
+    """
+    Return True if [file_path] has a FASTQ file extension, compressed or not.
+    
+    Is_FASTQ_Path(str) -> bool
+    """
+    for ext in LIST__FASTQ:
+        if file_path.lower().endswith(ext): return True
+    return False
+
+def Load_Quality_Model(file_path, phred_offset=33):
+    """
+    Return a Quality Model loaded from the JSON profile at [file_path], or
+    learned from the FASTQ file at [file_path], using [phred_offset] to decode
+    its quality scores.
+    
+    Return None if the file could not be read, or contains no quality scores.
+    
+    Load_Quality_Model(str, int) -> Quality_Model/None
+    """
+    if Is_FASTQ_Path(file_path):
+        return Learn_Quality_Model(file_path, phred_offset)
+    try:
+        f = open(file_path, "U")
+        profile = json.loads(f.read())
+        f.close()
+        cycle_counts = profile["cycles"]
+        transition_counts = profile.get("transitions")
+        if transition_counts:
+            transition_counts = [dict([(int(k), row[k]) for k in row])
+                    for row in transition_counts]
+        return Quality_Model(cycle_counts, transition_counts)
+    except:
+        return None
+
+def Learn_Quality_Model(file_path, phred_offset=33, max_reads=0, markov=True):
+    """
+    Return a Quality Model learned from the quality scores of the reads in the
+    FASTQ file at [file_path]. Gzipped FASTQ files are also accepted.
+    
+    @file_path
+            (str - filepath)
+            The filepath of the FASTQ file.
+    @phred_offset
+            (int)
+            The ASCII value of the character denoting a quality score of 0.
+    @max_reads
+            (int)
+            The maximum number of reads to learn from. All reads are used if
+            this is 0.
+    @markov
+            (bool)
+            Whether or not to also learn the dependency of each quality score
+            on the quality score of the previous base.
+    
+    Return None if the file could not be read, or contains no quality scores.
+    
+    Learn_Quality_Model(str, int, int, bool) -> Quality_Model/None
+    """
+    cycle_counts = []
+    transition_counts = []
+    reads = 0
+    try:
+        if file_path.lower().endswith(".gz"): f = gzip.open(file_path, "rb")
+        else: f = open(file_path, "U")
+        while not max_reads or reads < max_reads:
+            if not f.readline(): break # Name
+            f.readline() # Sequence
+            f.readline() # Separator
+            scores = f.readline().rstrip("\r\n")
+            reads += 1
+            while len(cycle_counts) < len(scores):
+                cycle_counts.append([0] * (MAX_QUALITY + 1))
+                transition_counts.append({})
+            previous = -1
+            for i in range(len(scores)):
+                q = min(max(ord(scores[i]) - phred_offset, 0), MAX_QUALITY)
+                cycle_counts[i][q] += 1
+                if markov and previous != -1:
+                    row = transition_counts[i].get(previous)
+                    if not row:
+                        row = [0] * (MAX_QUALITY + 1)
+                        transition_counts[i][previous] = row
+                    row[q] += 1
+                previous = q
+        f.close()
+    except:
+        return None
+    if not cycle_counts: return None
+    if not markov: transition_counts = None
+    return Quality_Model(cycle_counts, transition_counts)
+
+
+
+# Classes ######################################################################
+
+class Quality_Model:
+    """
+    A position-dependent model of read quality scores, with an optional
+    first-order Markov dependency on the previous quality score.
+    
+    Reads longer than the model use the quality scores of the final cycle for
+    all subsequent cycles.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, cycle_counts, transition_counts=None):
+        """
+        Creates a Quality Model object from [cycle_counts], a list of the counts
+        of each quality score at each cycle, and optionally [transition_counts],
+        a list of dictionaries mapping each previous quality score to the
+        counts of each quality score at each cycle.
+        """
+        self.cycle_counts = cycle_counts
+        self.transition_counts = transition_counts
+        self._cycles = []
+        self._transitions = []
+        for i in range(len(cycle_counts)):
+            table = self._Build(cycle_counts[i])
+            if not table: # No data for this cycle
+                if self._cycles: table = self._cycles[-1]
+                else: raise ValueError
+            self._cycles.append(table)
+            transitions = {}
+            if transition_counts and i < len(transition_counts):
+                for previous in transition_counts[i]:
+                    table = self._Build(transition_counts[i][previous])
+                    if table: transitions[previous] = table
+            self._transitions.append(transitions)
+        if not self._cycles: raise ValueError
+        self.markov = bool(transition_counts)
+    
+    def _Build(self, counts):
+        """
+        Return an Alias Table of quality scores, weighted by [counts].
+        Return None if there are no counts.
+        """
+        values = [q for q in range(len(counts)) if counts[q] > 0]
+        if not values: return None
+        return Alias_Table(values, [counts[q] for q in values])
+    
+    
+    
+    # Generation Methods #######################################################
+    
+    def Generate(self, length):
+        """
+        Return a list of [length] random quality scores, for a read.
+        """
+        cycles = self._cycles
+        last = len(cycles) - 1
+        if not self.markov:
+            if length <= last + 1:
+                return [table.Sample() for table in cycles[:length]]
+            tail = cycles[last]
+            return ([table.Sample() for table in cycles] +
+                    tail.Sample_Batch(length - last - 1))
+        transitions = self._transitions
+        results = []
+        q = -1
+        for i in xrange(length):
+            if i > last: i = last
+            table = transitions[i].get(q) or cycles[i]
+            q = table.Sample()
+            results.append(q)
+        return results
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Write(self, file_path):
+        """
+        Save the model to [file_path] as a JSON profile.
+        """
+        profile = {"cycles": self.cycle_counts}
+        if self.markov:
+            profile["transitions"] = [dict([(str(k), row[k]) for k in row])
+                    for row in self.transition_counts]
+        f = open(file_path, "w")
+        f.write(json.dumps(profile, sort_keys = True))
+        f.close()
@@ -0,0 +1,51 @@
+"""
+REVERSE COMPLEMENT
+(version 1.0)
+by Angelo Chan
+
+This module contains functions for getting the reverse complement of DNA
+sequences, shared by all the programs in this library.
+
+Rather than looking up the complement of each base individually, a translation
+table covering every possible byte is precompiled once. The complement of a
+sequence is then produced by a single call to str.translate, and reversed using
+a slice, both of which run at C speed.
+
+All IUPAC nucleotide codes are complemented, and the case of each base is kept,
+so soft-masked (lowercase) regions remain soft-masked. Any other characters are
+left unchanged.
+"""
+
+# Imported Modules #############################################################
+
+from string import maketrans
+
+
+
+# Strings ######################################################################
+
+STR__bases = "ACGTUNRYKMSWBDHVacgtunrykmswbdhv"
+STR__complements = "TGCAANYRMKSWVHDBtgcaanyrmkswvhdb"
+
+STR__table = maketrans(STR__bases, STR__complements)
+
+
+
+# Functions ####################################################################
+
+def Reverse_Complement(seq):
+    """
+    Return the reverse complement of the DNA sequence [seq].
+    
+    Reverse_Complement(str) -> str
+    """
+    return seq.translate(STR__table)[::-1]
+
+def Reverse_Complement_Batch(seqs):
+    """
+    Return a list of the reverse complements of the DNA sequences in [seqs].
+    
+    Reverse_Complement_Batch(list<str>) -> list<str>
+    """
+    table = STR__table
+    return [seq.translate(table)[::-1] for seq in seqs]
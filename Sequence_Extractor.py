@@ -35,7 +35,9 @@ USAGE:
     
     python27 Sequence_Extractor.py <genome_folder> <target_coordinates_table>
             [-d Y|N] [-o <edited_genome_folder> <extracted_sequences_folder>
-            <coordinates_table> <chr_sizes_file>]
+            <coordinates_table> <chr_sizes_file>] [--region
+            <region>|<regions_file>] [--index Y|N] [--profile
+            [<pstats_filepath>]]
 
 
 
@@ -45,6 +47,8 @@ MANDATORY:
         
         The filepath of the input folder containing the template FASTA file(s).
         Each FASTA file is assumed to only contain one DNA sequence per file.
+        Packed ".2bit" files may be used instead of FASTA files, in which case
+        they will be read directly, without being parsed.
     
     target_coordinates_table
         
@@ -103,6 +107,9 @@ OPTIONAL:
         determining its genomic sequence, including which original excised
         sequence is being used as the template, as well as any modifications
         which were subsequently made to said template.
+        
+        An index file for this table, used for region queries, will be created
+        alongside it.
     
     chr_sizes_file
         
@@ -111,6 +118,41 @@ OPTIONAL:
         The filepath of the output chromosome sizes file. This file may be
         necessary when coordinates of the genetic elements are altered to
         simulate "transposition" or "duplication".
+    
+    region
+        
+        (DEFAULT: (All))
+        
+        Only extract the sequences whose coordinates overlap the specified
+        region. The region can be specified as either a chromosome name, or in
+        the format "chromosome:start-end". Alternatively, the filepath of a
+        regions file may be specified. A regions file is a TSV file where the
+        first three columns contain the chromosome name, start, and end.
+        
+        This option may be used more than once.
+        
+        An index file is created alongside the target coordinates table so that
+        the relevant entries can be located without reading the whole table.
+    
+    --index
+        
+        (DEFAULT: N)
+        
+        Whether or not to write a composition index alongside each chromosome of
+        the post-excision genome, recording the cumulative counts of each
+        nucleotide at regular intervals. Other programs in this library use
+        these to find the composition of any region of a chromosome in constant
+        time. The index file is given the same name as the chromosome file, with
+        ".comp" appended to the end.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent reading and writing sequences once
+        the run is complete. If a filepath is specified after the flag, the run
+        is also profiled using cProfile, and the statistics are saved to said
+        file. (They can be examined using the pstats module)
 
 
 
@@ -119,6 +161,14 @@ EXAMPLES SCENARIO EXPLANATION:
     1&2:
     A modified RMSK file is used to provide coordinates for the Transposons in a
     genome, which are cut out of it.
+    
+    3:
+    Only the Transposons on chromosome 7, and those overlapping a region of
+    chromosome 1, are cut out of the genome.
+    
+    4:
+    Composition indexes are written alongside the post-excision genome, for use
+    by Generate_Fragments.py and Generate_Reads.py.
 
 EXAMPLES:
     
@@ -127,12 +177,19 @@ EXAMPLES:
     python27 Sequence_Extractor.py Path/GenomeFolder rmsk__MOD.tsv -o
             Path/TransposonlessGenome Path/Transposons
             Path/TransposonCoordinates.tsv Path/NewChrSizes.tsv -d Y
+    
+    python27 Sequence_Extractor.py Path/GenomeFolder rmsk__MOD.tsv --region
+            chr7 --region chr1:1000000-2000000
+    
+    python27 Sequence_Extractor.py Path/GenomeFolder rmsk__MOD.tsv --index Y
 
 USAGE:
     
     python27 Sequence_Extractor.py <genome_folder> <target_coordinates_table>
             [-d Y|N] [-o <edited_genome_folder> <extracted_sequences_folder>
-            <coordinates_table> <chr_sizes_file>]
+            <coordinates_table> <chr_sizes_file>] [--region
+            <region>|<regions_file>] [--index Y|N] [--profile
+            [<pstats_filepath>]]
 """
 
 NAME = "Sequence_Extractor.py"
@@ -173,6 +230,8 @@ DEFAULT__width = 80
 
 DEFAULT__overlap = False
 
+DEFAULT__index = False
+
 
 
 # Imported Modules #############################################################
@@ -185,14 +244,20 @@ import random as Random
 
 
 import _Controlled_Print as PRINT
+import Profiler as PROFILE
 from _Command_Line_Parser import *
 
 from NSeq_Match import *
+from Reverse_Complement import *
 
 from Chr_FASTA_File_Reader import *
 from Table_File_Reader import *
 from Width_File_Writer import *
 
+from Coords_Index import *
+from Packed_Genome import *
+from Composition_Index import *
+
 
 
 # Strings ######################################################################
@@ -208,6 +273,16 @@ STR__error_no_chr = """
 ERROR: Unable to open chromosome FASTA file:
     {c}"""
 
+STR__error_index = """
+ERROR: Unable to build an index for the coordinates table:
+    {f}"""
+
+STR__error_no_entries = """
+ERROR: No entries in the coordinates table overlap the specified region(s)."""
+
+STR__error_composition = """
+ERROR: Unable to write the composition indexes of the post-excision genome."""
+
 
 
 STR__metrics = """
@@ -259,7 +334,8 @@ PRINT.PRINT_METRICS = PRINT_METRICS
 # Functions ####################################################################
 
 def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
-            output_sequences, output_coordinates, output_chr_sizes):
+            output_sequences, output_coordinates, output_chr_sizes, regions=[],
+            index=False):
     """
     Extract DNA sequences from the DNA template (usually a genome or genome-like
     biological entity) according to the input coordinates, and output the
@@ -270,7 +346,8 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
             (str - dirpath)
             The filepath of the folder containing the FASTA file(s) from which
             the sequences are to be extracted. Each file should only contain a
-            single DNA sequence.
+            single DNA sequence. Packed ".2bit" files may be used instead of
+            FASTA files.
             The folder will typically be a "genome", with each of the files
             within being a chromosome, but does not absolutely have to be a
             "genome".
@@ -307,6 +384,16 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     @outpust_chr_sizes
             (str - filepath)
             The file containing the new chromosome sizes of [output_genome].
+    @regions
+            (list<[str, int, int]>)
+            A list of regions, each consisting of a chromosome name, a start,
+            and an end. If any regions are specified, only the sequences which
+            overlap at least one of the regions will be extracted. An index of
+            [input_coordinates] is used to locate these sequences.
+    @index
+            (bool)
+            Whether or not to write a composition index alongside each
+            chromosome of [output_genome].
     
     Return a value of 0 if the function runs successfully.
     Return a value of 1 if there is a problem accessing the data or if there are
@@ -314,8 +401,10 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     Return a value of 2 if there is a problem with the output file.
     Return a value of 3 if there is a problem during the sequence extraction
             process.
+    Return a value of 4 if no sequences overlap the specified regions.
     
-    Extract_Sequences(str, str, bool, str, str, str, str) -> int
+    Extract_Sequences(str, str, bool, str, str, str, str,
+            list<[str, int, int]>, bool) -> int
     """
     # Setup reporting
     chromosomes = 0
@@ -327,15 +416,28 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     # Setup the I/O
     current_chr_name = ""
     f = Chr_FASTA_Reader()
+    packed_in = False # Whether the current chromosome is a packed file
     old_end = -1
     current_index = -1
     post_ex_index = -1
     non_direction_flag = False # For when an entry has no +/-
     sb = ""
     prev_n = ""
+    chr_write_paths = []
     
-    t = Table_Reader(input_coordinates)
-    t.Set_Delimiter("\t")
+    if regions:
+        t = Indexed_Table_Reader(input_coordinates, regions)
+        t.Set_Delimiter("\t")
+        if t.Open():
+            PRINT.printE(STR__error_index.format(f = input_coordinates))
+            return 1
+        if t.End():
+            t.Close()
+            return 4
+    else:
+        t = Table_Reader(input_coordinates)
+        t.Set_Delimiter("\t")
+        t.Open()
     
     c = open(output_coordinates, "w")
     s = open(output_chr_sizes, "w")
@@ -352,7 +454,6 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     
     # Main loop
     PRINT.printP(STR__Extract_begin)
-    t.Open()
     while not t.End():
         seqs_excised += 1
         # Read
@@ -368,6 +469,11 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
         # New chromosome
         if chr_name != current_chr_name:
             # Finish up previous chromosome
+            if packed_in:
+                bases = f.Read_N(f.Get_Length() - f.Get_Position())
+                current_index += len(bases)
+                w.Write(bases)
+                basepairs_original += len(bases)
             while not f.End():
                 f.Read()
                 current_index += 1
@@ -380,6 +486,9 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
             # New chromosome
             current_chr_name = chr_name
             chr_file_path = Get_Chr_File_Path(input_genome, chr_name)
+            packed_in = Is_2Bit_Path(chr_file_path)
+            if packed_in: f = Chr_2Bit_Reader()
+            else: f = Chr_FASTA_Reader()
             f.Open(chr_file_path)
             if f.End():
                 c.close()
@@ -390,6 +499,7 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
                 PRINT.printE(STR__error_no_chr.format(c = chr_name))
                 return 1
             chr_write_path = output_genome + "\\" + chr_name + FILEMOD__FASTA
+            chr_write_paths.append(chr_write_path)
             w.Close()
             w.Open(chr_write_path)
             w.Write_F(">" + f.Get_Name())
@@ -405,6 +515,12 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
             basepairs_excised += 1
         old_end = end
         # Read along chromosome and add, to new template
+        if packed_in and current_index < start_:
+            bases = f.Read_N(start_ - current_index)
+            current_index += len(bases)
+            w.Write(bases)
+            post_ex_index += len(bases)
+            basepairs_original += len(bases)
         while current_index < start_:
             f.Read()
             current_index += 1
@@ -412,6 +528,12 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
             post_ex_index += 1
             basepairs_original += 1
         # Read along chromosome and add, to sequences
+        if packed_in and current_index < end:
+            bases = f.Read_N(end - current_index)
+            current_index += len(bases)
+            sb += bases
+            basepairs_excised += len(bases)
+            basepairs_original += len(bases)
         while current_index < end:
             f.Read()
             current_index += 1
@@ -421,7 +543,7 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
         # Last chromosome in sequence
         prev_n = f.Get()
         # Direction
-        if direction == "-": sb = Get_Complement(sb, True)
+        if direction == "-": sb = Reverse_Complement(sb)
         elif direction == "+": pass
         else: non_direction_flag = True
         # New coordinates
@@ -444,7 +566,12 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     
     # Close up
     c.close()
+    Build_Coords_Index(output_coordinates)
     
+    if packed_in:
+        bases = f.Read_N(f.Get_Length() - f.Get_Position())
+        w.Write(bases)
+        basepairs_original += len(bases)
     while not f.End():
         f.Read()
         w.Write_1(f.Get())
@@ -458,9 +585,19 @@ def Extract_Sequences(input_genome, input_coordinates, overlap, output_genome,
     
     t.Close()
     
+    # Composition indexes
+    if index:
+        for path in chr_write_paths:
+            try:
+                sequence = Loaded_Sequence(path)
+            except:
+                return 2
+            if not Build_Composition_Index(sequence).path: return 2
+    
     # Reporting
     Report_Metrics(chromosomes, basepairs_original, basepairs_excised,
             overlaps, seqs_excised)
+    PROFILE.Report()
 
     # Wrap up
     return 0
@@ -473,6 +610,7 @@ def Get_Chr_File_Path(genome_folder_path, chr_name):
     """
     names = os.listdir(genome_folder_path)
     for name in names:
+        if name.endswith(FILEMOD__COMPOSITION): continue # Composition index
         first = name.split(".")[0]
         if first == chr_name:
             filepath = genome_folder_path + "\\" + name
@@ -541,6 +679,23 @@ def Report_Metrics(chromosomes, basepairs_original, basepairs_excised,
             C = basepairs_excised, D = overlaps, E = remaining,
             F = seqs_excised, G = average_ex_size))
 
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the functions and methods which make up the
+    main stages of this program.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(Chr_FASTA_Reader, "Read", "Reading")
+    PROFILE.Instrument(Chr_2Bit_Reader, "Read", "Reading")
+    PROFILE.Instrument(Chr_2Bit_Reader, "Read_N", "Reading")
+    PROFILE.Instrument(Composition_Writer, "Add", "Indexing")
+    for name in ["Write", "Write_1", "Write_F", "Newline", "Close"]:
+        PROFILE.Instrument(Width_File_Writer, name, "Writing")
+    for name in ["Write", "Write_1", "Write_Packed", "Close"]:
+        PROFILE.Instrument(Packed_File_Writer, name, "Writing")
+
+
 
 
 # Command Line Parsing #########################################################
@@ -565,6 +720,12 @@ def Parse_Command_Line_Input__Extract_Sequences(raw_command_line_input):
         print(HELP_DOC)
         return 0
     
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs, 2)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
     # Initial validation
     if len(inputs) < 2:
         PRINT.printE(STR__insufficient_inputs)
@@ -573,7 +734,7 @@ def Parse_Command_Line_Input__Extract_Sequences(raw_command_line_input):
     
     # Validate mandatory inputs
     path_in_folder = inputs.pop(0)
-    valid = Validate_FASTA_Folder(path_in_folder)
+    valid = Validate_FASTA_Folder(path_in_folder, LIST__FASTA + LIST__2BIT)
     if valid == 1:
         PRINT.printE(STR__IO_error_read_folder)
         PRINT.printE(STR__use_help)
@@ -595,6 +756,8 @@ def Parse_Command_Line_Input__Extract_Sequences(raw_command_line_input):
     path_out_seqs = path_in_folder + DIRMOD__SEQS
     path_out_coords = path_in_folder + FILEMOD__COORDS
     path_out_sizes = path_in_folder + FILEMOD__SIZES
+    regions = []
+    index = DEFAULT__index
     
     # Validate optional inputs (except output path)
     while inputs:
@@ -624,6 +787,19 @@ def Parse_Command_Line_Input__Extract_Sequences(raw_command_line_input):
             path_out_seqs = arg3
             path_out_coords = arg4
             path_out_sizes = arg5
+        elif arg == "--region": # Region filter
+            new_regions = Get_Regions(arg2)
+            if not new_regions:
+                PRINT.printE(STR__invalid_region.format(s = arg2))
+                PRINT.printE(STR__use_help)
+                return 1
+            regions += new_regions
+        elif arg == "--index": # Composition indexes
+            index = Validate_Bool(arg2)
+            if index == None:
+                PRINT.printE(STR__invalid_bool)
+                PRINT.printE(STR__use_help)
+                return 1
         else: # Invalid
             arg = Strip_X(arg)
             PRINT.printE(STR__invalid_argument.format(s = arg))
@@ -662,20 +838,24 @@ def Parse_Command_Line_Input__Extract_Sequences(raw_command_line_input):
     
     # Run program
     exit_state = Extract_Sequences(path_in_folder, path_in_file, overlap,
-            path_out_genome, path_out_seqs, path_out_coords, path_out_sizes)
+            path_out_genome, path_out_seqs, path_out_coords, path_out_sizes,
+            regions, index)
     
     # Exit
     if exit_state == 0: return 0
     else:
         if exit_state == 1: PRINT.printE(STR__unexpected_failure)
+        if exit_state == 2: PRINT.printE(STR__error_composition)
+        if exit_state == 4: PRINT.printE(STR__error_no_entries)
         PRINT.printE(STR__use_help)
         return 1
     
     
 
-def Validate_FASTA_Folder(dirpath):
+def Validate_FASTA_Folder(dirpath, extensions=LIST__FASTA):
     """
     Validates the dirpath of the input file as containing FASTA files.
+    [extensions] is the list of file extensions which are accepted.
     Return 0 if the dirpath is valid and contains at least 1 FASTA file.
     Return 1 if the dirpath is valid but contains no FASTA files.
     Return 2 if the dirpath is invalid.
@@ -684,7 +864,7 @@ def Validate_FASTA_Folder(dirpath):
     """
     try:
         os.listdir(dirpath)
-        files = Get_Files_W_Extensions(dirpath, LIST__FASTA)
+        files = Get_Files_W_Extensions(dirpath, extensions)
         if len(files) > 0: return 0
         return 1
     except:
@@ -18,7 +18,8 @@ USAGE:
     python27 Sequence_Inserter.py <genome_folder> <coordinates_table>
             <sequences_folder> [-o <output_folder> <output_coordinates_table>
             <output_chr_sizes_file>] [-a <window_min> <window_max>
-            <errors_max> Y|N] [-m Y|N]
+            <errors_max> Y|N] [-m Y|N] [-f <format>] [--region
+            <region>|<regions_file>] [--profile [<pstats_filepath>]]
 
 
 
@@ -28,7 +29,8 @@ MANDATORY:
         
         The filepath of the input folder containing the template FASTA file(s).
         Each FASTA file is assumed to only contain one DNA sequence per file,
-        similar to chromosomal FASTA files.
+        similar to chromosomal FASTA files. Packed ".2bit" files may be used
+        instead of FASTA files.
     
     coordinates_table
         
@@ -121,6 +123,9 @@ OPTIONAL:
         determining its genomic sequence, including which original excised
         sequence is being used as the template, as well as any modifications
         which were subsequently made to said template.
+        
+        An index file for this table, used for region queries, will be created
+        alongside it.
     
     output_chr_sizes_file
         
@@ -167,6 +172,45 @@ OPTIONAL:
         Whether or not to create a "masked" insertion genome. Instead of the
         specified sequence being inserted, a series of Ns of equal length to
         the sequence will be inserted instead.
+    
+    format
+        
+        (DEFAULT: FASTA)
+        
+        The file format of the post-insertion genomic templates. Valid formats
+        are:
+            
+            FASTA
+                Plain text FASTA files.
+            
+            2BIT
+                Packed binary files, with 2 bits per nucleotide. (UCSC ".2bit"
+                format) These are roughly a quarter of the size of FASTA files
+                and can be read directly by the other programs in this library.
+    
+    region
+        
+        (DEFAULT: (All))
+        
+        Only insert the sequences whose coordinates overlap the specified
+        region. The region can be specified as either a chromosome name, or in
+        the format "chromosome:start-end". Alternatively, the filepath of a
+        regions file may be specified. A regions file is a TSV file where the
+        first three columns contain the chromosome name, start, and end.
+        
+        This option may be used more than once.
+        
+        An index file is created alongside the input coordinates table so that
+        the relevant entries can be located without reading the whole table.
+    
+    --profile
+        
+        (DEFAULT: Off)
+        
+        Print a breakdown of the time spent reading, assembling, and writing
+        sequences once the run is complete. If a filepath is specified after the
+        flag, the run is also profiled using cProfile, and the statistics are
+        saved to said file. (They can be examined using the pstats module)
 
 
 
@@ -184,6 +228,12 @@ EXAMPLES SCENARIO EXPLANATION:
     
     3:
     Insert sequences and mask them.
+    
+    4:
+    Only reinsert the sequences on chromosome 7.
+    
+    5:
+    Output the post-insertion genome as packed ".2bit" files.
 
 EXAMPLES:
     
@@ -196,13 +246,20 @@ EXAMPLES:
     
     python27 Sequence_Inserter.py Path/PostExGenomeFolder Path/PostEdCoords.tsv
             Path/ExtractedSequencesFolder -m Y
+    
+    python27 Sequence_Inserter.py Path/PostExGenomeFolder Path/PostEdCoords.tsv
+            Path/ExtractedSequencesFolder --region chr7
+    
+    python27 Sequence_Inserter.py Path/PostExGenomeFolder Path/PostEdCoords.tsv
+            Path/ExtractedSequencesFolder -f 2BIT
 
 USAGE:
     
     python27 Sequence_Inserter.py <genome_folder> <coordinates_table>
             <sequences_folder> [-o <output_folder> <output_coordinates_table>
             <output_chr_sizes_file>] [-a <window_min> <window_max>
-            <errors_max> Y|N] [-m Y|N]
+            <errors_max> Y|N] [-m Y|N] [-f <format>] [--region
+            <region>|<regions_file>] [--profile [<pstats_filepath>]]
 """
 
 NAME = "Sequence_Inserter.py"
@@ -228,6 +285,7 @@ DIRMOD__EDIT = "__INSERTED"
 FILEMOD__COORDS = "__POST_INSERT_COORDS.tsv"
 FILEMOD__SIZES = "__POST_INSERT_SIZES.tsv"
 FILEMOD__FASTA = ".fa"
+FILEMOD__2BIT = ".2bit"
 
 CONFIG__ignore_bad_slicing = False
 CONFIG__mismatch_handling = 0
@@ -244,6 +302,7 @@ DEFAULT__overhang_max = 100
 DEFAULT__overhang_mismatches = 0
 DEFAULT__overhang_largest = True
 DEFAULT__mask = False
+DEFAULT__packed = False
 
 
 
@@ -257,15 +316,21 @@ import random as Random
 
 
 import _Controlled_Print as PRINT
+import Profiler as PROFILE
 from _Command_Line_Parser import *
 
 from NSeq_Match import *
+from Reverse_Complement import *
 from ECSASS_Parser import *
 
 from Chr_FASTA_File_Reader import *
 from Table_File_Reader import *
 from Width_File_Writer import *
 
+from Coords_Index import *
+from Packed_Genome import *
+from Composition_Index import *
+
 
 
 # Strings ######################################################################
@@ -305,6 +370,19 @@ is preferred."""
 STR__invalid_mask = """
 ERROR: Invalid value given for whether or not to mask the inserted sequences."""
 
+STR__invalid_format = """
+ERROR: Invalid output file format: {s}
+Please specify one of:
+    FASTA
+    2BIT"""
+
+STR__error_index = """
+ERROR: Unable to build an index for the coordinates table:
+    {f}"""
+
+STR__error_no_entries = """
+ERROR: No entries in the coordinates table overlap the specified region(s)."""
+
 
 STR__metrics = """
         Pre-insertion genome size: {A}
@@ -338,6 +416,9 @@ Do you wish to overwrite them in the event of a naming clash? (y/n): """
 LIST__yes = ["Y", "y", "YES", "Yes", "yes", "T", "t", "TRUE", "True", "true"]
 LIST__no = ["N", "n", "NO", "No", "no", "F", "f", "FALSE", "False", "false"]
 
+LIST__fasta = ["FASTA", "Fasta", "fasta", "FA", "fa"]
+LIST__2bit = ["2BIT", "2Bit", "2bit"]
+
 
 
 # Dictionaries #################################################################
@@ -356,7 +437,8 @@ PRINT.PRINT_METRICS = PRINT_METRICS
 
 def Insert_Sequences(input_genome, input_coordinates, input_sequences,
             output_genome, output_coordinates, output_chr_sizes, overhang_min,
-            overhang_max, error_max, highest_preferred, mask):
+            overhang_max, error_max, highest_preferred, mask, regions=[],
+            packed=False):
     """
     Assemble and insert DNA sequences into the DNA template (usually a genome or
     genome-like biological entity) according to the sequence assembly
@@ -366,7 +448,8 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
             (str - dirpath)        
             The input folder containing the template FASTA file(s). Each FASTA
             file is assumed to only contain one DNA sequence per file, similar
-            to chromosomal FASTA files.
+            to chromosomal FASTA files. Packed ".2bit" files may be used instead
+            of FASTA files.
     @input_coordinates
             (str - filepath)
             The input file containing the coordinates for sequences to be
@@ -468,6 +551,16 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
             (bool)
             Whether or not to "masked" the inserted sequences by replacing them
             with a string of Ns of equal length.
+    @regions
+            (list<[str, int, int]>)
+            A list of regions, each consisting of a chromosome name, a start,
+            and an end. If any regions are specified, only the sequences which
+            overlap at least one of the regions will be inserted. An index of
+            [input_coordinates] is used to locate these sequences.
+    @packed
+            (bool)
+            Whether to output the post-insertion templates as packed ".2bit"
+            files instead of FASTA files.
     
     Return a value of 0 if the function runs successfully.
     Return a value of 1 if there is a problem accessing the data or if there are
@@ -475,8 +568,10 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
     Return a value of 2 if there is a problem with the output file.
     Return a value of 3 if there is a problem during the sequence extraction
             process.
+    Return a value of 4 if no sequences overlap the specified regions.
     
-    Insert_Sequences(str, str, str, str, str, int, int, int, bool) -> int
+    Insert_Sequences(str, str, str, str, str, int, int, int, bool,
+            list<[str, int, int]>, bool) -> int
     """
     # Setup reporting
     chromosomes = 0
@@ -493,17 +588,31 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
     # Setup the I/O
     current_chr_name = ""
     f = Chr_FASTA_Reader() # Chromosome reader
+    packed_in = False # Whether the current chromosome is a packed file
     original_index = -1
     total_index = -1
     
-    t = Table_Reader(input_coordinates) # Coordinates table file reader
-    t.Set_Delimiter("\t")
+    if regions: # Coordinates table file reader
+        t = Indexed_Table_Reader(input_coordinates, regions)
+        t.Set_Delimiter("\t")
+        if t.Open():
+            PRINT.printE(STR__error_index.format(f = input_coordinates))
+            return 1
+        if t.End():
+            t.Close()
+            return 4
+    else:
+        t = Table_Reader(input_coordinates)
+        t.Set_Delimiter("\t")
+        t.Open()
     
-    o = Width_File_Writer() # Write new chromosomes
-    o.Overwrite_Allow()
-    o.Set_Width(DEFAULT__width)
-    o.Set_Newline("\n")
-    o.Toggle_Printing_M(False)
+    if packed: o = Packed_File_Writer() # Write new chromosomes
+    else:
+        o = Width_File_Writer()
+        o.Overwrite_Allow()
+        o.Set_Width(DEFAULT__width)
+        o.Set_Newline("\n")
+        o.Toggle_Printing_M(False)
     
     c = open(output_coordinates , "w") # New coordinates table
     
@@ -511,7 +620,6 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
     
     # Main loop
     PRINT.printP(STR__Insert_begin)
-    t.Open()
     while not t.End():
         seqs_inserted += 1
         # Read
@@ -528,6 +636,11 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
         # New chromosome
         if chr_name != current_chr_name:
             # Finish up previous chromosome
+            if packed_in:
+                remainder = f.Read_N(f.Get_Length() - f.Get_Position())
+                total_index += len(remainder)
+                o.Write(remainder)
+                basepairs_original += len(remainder)
             while not f.End():
                 f.Read()
                 total_index += 1
@@ -541,17 +654,29 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
             # New chromosome - reading
             current_chr_name = chr_name
             chr_file_path = Get_Chr_File_Path(input_genome, chr_name)
+            packed_in = Is_2Bit_Path(chr_file_path)
+            if packed_in: f = Chr_2Bit_Reader()
+            else: f = Chr_FASTA_Reader()
             f.Open(chr_file_path)
             # New chromosome - writing
-            chr_write_path = output_genome + "\\" + chr_name + FILEMOD__FASTA
-            o.Open(chr_write_path)
-            o.Write_F(">" + f.Get_Name())
-            o.Newline()
+            chr_write_path = output_genome + "\\" + chr_name
+            if packed:
+                o.Open(chr_write_path + FILEMOD__2BIT, f.Get_Name())
+            else:
+                o.Open(chr_write_path + FILEMOD__FASTA)
+                o.Write_F(">" + f.Get_Name())
+                o.Newline()
             # Others
             chromosomes += 1
             original_index = 0
             total_index = 0
         # Copy until insertion point
+        if packed_in and original_index < start_:
+            sb = f.Read_N(start_ - original_index)
+            original_index += len(sb)
+            total_index += len(sb)
+            o.Write(sb)
+            basepairs_original += len(sb)
         while original_index < start_:
             f.Read()
             original_index += 1
@@ -565,7 +690,7 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
         if mask:
             seq = len(seq)*"N"
         else:
-            if direction == "-": seq = Get_Complement(seq)
+            if direction == "-": seq = Reverse_Complement(seq)
             elif direction == "+": pass
             else: irregular_direction = True
         length = len(seq)
@@ -583,7 +708,13 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
     # Close up
     t.Close()
     c.close()
+    Build_Coords_Index(output_coordinates)
     
+    if packed_in:
+        remainder = f.Read_N(f.Get_Length() - f.Get_Position())
+        total_index += len(remainder)
+        o.Write(remainder)
+        basepairs_original += len(remainder)
     while not f.End():
         f.Read()
         total_index += 1
@@ -600,6 +731,7 @@ def Insert_Sequences(input_genome, input_coordinates, input_sequences,
     # Reporting
     Report_Metrics(chromosomes, basepairs_original, seqs_inserted,
             basepairs_inserted, irregular_direction)
+    PROFILE.Report()
     
     # Wrap up
     return 0
@@ -612,6 +744,7 @@ def Get_Chr_File_Path(genome_folder_path, chr_name):
     """
     names = os.listdir(genome_folder_path)
     for name in names:
+        if name.endswith(FILEMOD__COMPOSITION): continue # Composition index
         first = name.split(".")[0]
         if first == chr_name:
             filepath = genome_folder_path + "\\" + name
@@ -678,6 +811,23 @@ def Report_Metrics(chromosomes, basepairs_original, seqs_inserted,
             C = chromosomes, D = avg_chr_size_pre, E = avg_chr_size_post,
             F = seqs_inserted, G = seqs_inserted, H = avg_insert_size))
 
+def Instrument_Profiling():
+    """
+    Install the profiling timers on the functions and methods which make up the
+    main stages of this program.
+    
+    Instrument_Profiling() -> None
+    """
+    PROFILE.Instrument(Chr_FASTA_Reader, "Read", "Reading")
+    PROFILE.Instrument(Chr_2Bit_Reader, "Read", "Reading")
+    PROFILE.Instrument(Chr_2Bit_Reader, "Read_N", "Reading")
+    PROFILE.Instrument(globals(), "Parse_ECSASS", "Assembly")
+    for name in ["Write", "Write_1", "Write_F", "Newline", "Close"]:
+        PROFILE.Instrument(Width_File_Writer, name, "Writing")
+    for name in ["Write", "Write_1", "Write_Packed", "Close"]:
+        PROFILE.Instrument(Packed_File_Writer, name, "Writing")
+
+
 
 
 # Command Line Parsing #########################################################
@@ -703,6 +853,12 @@ def Parse_Command_Line_Input__Insert_Sequences(raw_command_line_input):
         return 0
         return 0
     
+    # Profiling
+    profile, pstats_path = PROFILE.Parse_Profile_Flag(inputs, 3)
+    if profile:
+        PROFILE.Enable(pstats_path)
+        Instrument_Profiling()
+    
     # Initial validation
     if len(inputs) < 3:
         PRINT.printE(STR__insufficient_inputs)
@@ -711,7 +867,8 @@ def Parse_Command_Line_Input__Insert_Sequences(raw_command_line_input):
     
     # Validate mandatory inputs
     input_genome_filepath = inputs.pop(0) # Input genome
-    valid = Validate_FASTA_Folder(input_genome_filepath)
+    valid = Validate_FASTA_Folder(input_genome_filepath,
+            LIST__FASTA + LIST__2BIT)
     if valid == 1:
         PRINT.printE(STR__IO_error_read_folder)
         PRINT.printE(STR__use_help)
@@ -746,13 +903,15 @@ def Parse_Command_Line_Input__Insert_Sequences(raw_command_line_input):
     error_max = DEFAULT__overhang_mismatches
     highest_preferred = DEFAULT__overhang_largest
     mask = DEFAULT__mask
+    packed = DEFAULT__packed
+    regions = []
     
     # Initial validation
     while inputs:
         arg = inputs.pop(0)
         flag = 0
         try: # Following arguments
-            if arg in ["-m"]:
+            if arg in ["-m", "-f", "--region"]:
                 arg2 = inputs.pop(0)
             elif arg in ["-o"]:
                 arg2 = inputs.pop(0)
@@ -803,6 +962,20 @@ def Parse_Command_Line_Input__Insert_Sequences(raw_command_line_input):
             if mask == None:
                 PRINT.printE(STR__invalid_mask.format(s = arg3))
                 return 1
+        elif arg == "-f":
+            if arg2 in LIST__fasta: packed = False
+            elif arg2 in LIST__2bit: packed = True
+            else:
+                PRINT.printE(STR__invalid_format.format(s = arg2))
+                PRINT.printE(STR__use_help)
+                return 1
+        elif arg == "--region":
+            new_regions = Get_Regions(arg2)
+            if not new_regions:
+                PRINT.printE(STR__invalid_region.format(s = arg2))
+                PRINT.printE(STR__use_help)
+                return 1
+            regions += new_regions
     
     # Validate output paths
     valid_out = Validate_Write_Path__FOLDER(path_out_genome)
@@ -836,20 +1009,23 @@ def Parse_Command_Line_Input__Insert_Sequences(raw_command_line_input):
     exit_state = Insert_Sequences(input_genome_filepath,
             input_coordinates_filepath, input_sequences_filepath,
             path_out_genome, path_out_coords, path_out_sizes,
-            overhang_min, overhang_max, error_max, highest_preferred, mask)
+            overhang_min, overhang_max, error_max, highest_preferred, mask,
+            regions, packed)
     
     # Exit
     if exit_state == 0: return 0
     else:
         if exit_state == 1: PRINT.printE(STR__unexpected_failure)
+        if exit_state == 4: PRINT.printE(STR__error_no_entries)
         PRINT.printE(STR__use_help)
         return 1
     
     
 
-def Validate_FASTA_Folder(dirpath):
+def Validate_FASTA_Folder(dirpath, extensions=LIST__FASTA):
     """
     Validates the dirpath of the input file as containing FASTA files.
+    [extensions] is the list of file extensions which are accepted.
     Return 0 if the dirpath is valid and contains at least 1 FASTA file.
     Return 1 if the dirpath is valid but contains no FASTA files.
     Return 2 if the dirpath is invalid.
@@ -858,7 +1034,7 @@ def Validate_FASTA_Folder(dirpath):
     """
     try:
         os.listdir(dirpath)
-        files = Get_Files_W_Extensions(dirpath, LIST__FASTA)
+        files = Get_Files_W_Extensions(dirpath, extensions)
         if len(files) > 0: return 0
         return 1
     except:
@@ -0,0 +1,144 @@
+"""
+SHARDS
+(version 1.0)
+by Angelo Chan
+
+This module contains functions for splitting a single simulation into multiple
+"shards", which can be run independently on different machines, and for
+gathering the results back together.
+
+Shards are specified as "i/N", meaning the i-th of N shards, with i starting at
+1. Each shard deterministically processes its own disjoint subset of the input,
+so no communication between shards is necessary.
+
+The filepaths of all the files output by a shard are tagged with the shard
+number, so the same command line can be used for every shard. Each shard also
+writes a summary file, which records the shard number, the files it output, and
+its metrics. The summary files are used to gather the shards back together.
+"""
+
+# Imported Modules #############################################################
+
+import json
+import os
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__SHARD = "__SHARD.json"
+
+
+
+# Strings ######################################################################
+
+STR__shard_tag = "__SHARD_{i}of{n}"
+
+
+
+# Lists ########################################################################
+
+LIST__compressed = [".gz", ".bgz", ".gzip"] # Extensions kept with the previous
+
+
+
+# Functions ####################################################################
+
+def Parse_Shard(string):
+    """
+    Parse a shard specification in the format "i/N".
+    
+    Return a list containing the shard number and the number of shards if the
+    specification is valid.
+    Return an empty list otherwise.
+    
+    Parse_Shard(str) -> [int, int]
+    """
+    values = string.split("/")
+    if len(values) != 2: return []
+    try:
+        shard = int(values[0])
+        shards = int(values[1])
+    except:
+        return []
+    if shards < 1 or shard < 1 or shard > shards: return []
+    return [shard, shards]
+
+def Add_Shard_Tag(file_path, shard, shards):
+    """
+    Return [file_path] with the tag for the specified shard inserted before its
+    file extension. ("Reads.fq.gz" becomes "Reads__SHARD_1of4.fq.gz")
+    
+    Add_Shard_Tag(str, int, int) -> str
+    """
+    head, ext = os.path.splitext(file_path)
+    if ext in LIST__compressed:
+        head, ext_2 = os.path.splitext(head)
+        ext = ext_2 + ext
+    return head + STR__shard_tag.format(i = shard, n = shards) + ext
+
+def Remove_Shard_Tag(file_path, shard, shards):
+    """
+    Return [file_path] with the tag for the specified shard removed.
+    
+    Remove_Shard_Tag(str, int, int) -> str
+    """
+    return file_path.replace(STR__shard_tag.format(i = shard, n = shards), "")
+
+def Get_Shard_Bounds(size, shard, shards):
+    """
+    Return the start and end (exclusive) of the specified shard's portion of a
+    range of length [size], such that the portions of all the shards are
+    contiguous, disjoint, and as even as possible.
+    
+    Get_Shard_Bounds(int, int, int) -> [int, int]
+    """
+    return [size * (shard - 1) / shards, size * shard / shards]
+
+def Write_Shard_Summary(file_path, tool, shard, shards, outputs, metrics):
+    """
+    Write a shard summary file.
+    
+    @file_path
+            (str - filepath)
+            The filepath of the shard summary file.
+    @tool
+            (str)
+            The name of the program which produced the shard.
+    @shard
+            (int)
+            The shard number. (Starting at 1)
+    @shards
+            (int)
+            The number of shards.
+    @outputs
+            (list<str>)
+            The filepaths of the files output by the shard, in a fixed order.
+            Empty strings indicate outputs which were not produced.
+    @metrics
+            (list)
+            The metrics of the shard, as required by the program to merge them.
+    
+    Write_Shard_Summary(str, str, int, int, list<str>, list) -> None
+    """
+    f = open(file_path, "w")
+    f.write(json.dumps({"tool": tool, "shard": shard, "shards": shards,
+            "outputs": outputs, "metrics": metrics}, sort_keys = True))
+    f.close()
+
+def Read_Shard_Summary(file_path):
+    """
+    Read a shard summary file.
+    
+    Return the summary as a dictionary if successful.
+    Return None if the file could not be read.
+    
+    Read_Shard_Summary(str) -> dict/None
+    """
+    try:
+        f = open(file_path, "U")
+        summary = json.loads(f.read())
+        f.close()
+    except:
+        return None
+    return summary
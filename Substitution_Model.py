@@ -0,0 +1,140 @@
+"""
+SUBSTITUTION MODEL
+(version 1.0)
+by Angelo Chan
+
+This module contains a Class for choosing the base which a sequencing error
+substitutes for the true base, depending on the true (reference) base, the
+quality score bin of the base, and the preceding reference base.
+
+The model is built from a substitution matrix, as recorded in the profiles
+produced by Profile_FASTQ.py. For every combination of quality score bin,
+preceding base, and reference base, the counts of the three possible erroneous
+bases are precompiled into an alias table. Combinations with no observed errors
+fall back to the counts for the reference base and quality score bin regardless
+of the preceding base, then to the counts for the reference base alone, and
+finally to a uniform choice.
+
+The substitute bases for all the errors in a read are chosen in a single call.
+"""
+
+# Imported Modules #############################################################
+
+import json
+
+from bisect import bisect_right
+
+from Alias_Table import *
+
+
+
+# Lists ########################################################################
+
+LIST__bases = ["A", "C", "G", "T"]
+LIST__preceding = ["A", "C", "G", "T", "N"]
+
+
+
+# Functions ####################################################################
+
+def Load_Substitution_Model(file_path):
+    """
+    Return a Substitution Model loaded from the substitution matrix in the JSON
+    profile at [file_path].
+    
+    Return None if the file could not be read, or the profile does not contain
+    a substitution matrix.
+    
+    Load_Substitution_Model(str) -> Substitution_Model/None
+    """
+    try:
+        f = open(file_path, "U")
+        profile = json.loads(f.read())
+        f.close()
+        return Substitution_Model(profile["substitutions"],
+                profile["quality_bins"])
+    except:
+        return None
+
+
+
+# Classes ######################################################################
+
+class Substitution_Model:
+    """
+    A model of the base substituted for the true base by a sequencing error,
+    conditioned on the reference base, the quality score bin, and the preceding
+    reference base.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, substitutions, quality_bins):
+        """
+        Creates a Substitution Model object.
+        
+        [substitutions] is a list containing a dictionary for each quality score
+        bin. Each dictionary maps the preceding reference base and the
+        reference base (as a two-letter string) to the counts of the read bases
+        (A, C, G, and T) observed for them.
+        
+        [quality_bins] contains the lowest quality score of each bin.
+        """
+        self.quality_bins = quality_bins
+        self._tables = {}
+        self._uniform = Alias_Table(LIST__bases)
+        # Totals, for the fallbacks
+        totals_bin = [{} for i in quality_bins]
+        totals_ref = {}
+        for b in range(len(quality_bins)):
+            for key in substitutions[b]:
+                ref = key[1]
+                counts = substitutions[b][key]
+                for totals in [totals_bin[b], totals_ref]:
+                    row = totals.setdefault(ref, [0, 0, 0, 0])
+                    for i in range(4): row[i] += counts[i]
+        # Precompile every combination
+        for ref in LIST__bases:
+            uniform = self._Build(ref, [1, 1, 1, 1])
+            fallback = self._Build(ref, totals_ref.get(ref)) or uniform
+            for b in range(len(quality_bins)):
+                fallback_bin = (self._Build(ref, totals_bin[b].get(ref)) or
+                        fallback)
+                for previous in LIST__preceding:
+                    table = self._Build(ref,
+                            substitutions[b].get(previous + ref))
+                    self._tables[(b, previous, ref)] = table or fallback_bin
+    
+    def _Build(self, ref, counts):
+        """
+        Return an Alias Table of the bases which can be substituted for [ref],
+        weighted by [counts].
+        Return None if no substitutions were counted.
+        """
+        if not counts: return None
+        bases = [base for base in LIST__bases if base != ref]
+        weights = [counts[LIST__bases.index(base)] for base in bases]
+        if not sum(weights): return None
+        return Alias_Table(bases, weights)
+    
+    
+    
+    # Sampling Methods #########################################################
+    
+    def Sample_Batch(self, refs, scores, previous):
+        """
+        Return a list of the bases substituted for each of the reference bases
+        in [refs], which have the quality scores [scores], and are preceded by
+        the reference bases in [previous]. Reference bases other than A, C, G,
+        and T are substituted uniformly.
+        """
+        tables = self._tables
+        uniform = self._uniform
+        bins = self.quality_bins
+        results = []
+        for i in range(len(refs)):
+            b = bisect_right(bins, scores[i]) - 1
+            if b < 0: b = 0
+            table = tables.get((b, previous[i], refs[i])) or uniform
+            results.append(table.Sample())
+        return results
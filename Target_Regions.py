@@ -0,0 +1,147 @@
+"""
+TARGET REGIONS
+(version 1.0)
+by Angelo Chan
+
+This module contains functions and a Class for restricting fragment generation
+to a set of target regions, such as the baits of an exome or other capture
+panel, as specified in a BED file.
+
+The target intervals of each chromosome are padded, sorted, and merged. The
+chromosome is then divided into alternating on-target and off-target segments,
+each of which is given a weight: 1 for on-target segments, and the off-target
+rate for off-target segments. (The density of off-target fragments relative to
+on-target fragments)
+
+Fragment midpoints are placed by measuring the distances between them in
+weighted bases rather than in bases. Distances are converted by binary searching
+for the current segment and then stepping through the segments, so the program
+can jump directly from one target region to the next. Off-target segments are
+skipped entirely if the off-target rate is 0.
+
+BED files use 0-based, half-open coordinates. These are converted into the
+1-based, inclusive coordinates used everywhere else in this library.
+"""
+
+# Imported Modules #############################################################
+
+from bisect import bisect_left
+from math import ceil
+
+
+
+# Configurations ###############################################################
+
+MAX_POSITION = 2**63 - 1 # Used as the end of the final segment
+
+
+
+# Lists ########################################################################
+
+LIST__BED_headers = ["#", "track", "browser"]
+
+
+
+# Functions ####################################################################
+
+def Load_Target_Regions(file_path, padding=0, off_target_rate=0):
+    """
+    Return a Target Regions object loaded from the BED file at [file_path],
+    with [padding] bases added to each side of every target interval.
+    
+    Return None if the file could not be read, or contains no valid intervals.
+    
+    Load_Target_Regions(str, int, float) -> Target_Regions/None
+    """
+    intervals = {}
+    try:
+        f = open(file_path, "U")
+        for line in f:
+            if not line.strip(): continue
+            if [1 for h in LIST__BED_headers if line.startswith(h)]: continue
+            values = line.rstrip("\r\n").split("\t")
+            start = int(values[1]) + 1 - padding
+            end = int(values[2]) + padding
+            if start < 1: start = 1
+            if end < start: continue
+            intervals.setdefault(values[0], []).append([start, end])
+        f.close()
+    except:
+        return None
+    if not intervals: return None
+    return Target_Regions(intervals, off_target_rate)
+
+
+
+# Classes ######################################################################
+
+class Target_Regions:
+    """
+    A set of target regions, used to convert distances in weighted bases into
+    distances in bases.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, intervals, off_target_rate=0):
+        """
+        Creates a Target Regions object from [intervals], a dictionary mapping
+        chromosome names to lists of [start, end] target intervals, (1-based,
+        inclusive) and the [off_target_rate], the density of fragments in
+        off-target regions relative to on-target regions.
+        """
+        self.off_target_rate = float(off_target_rate)
+        self._tracks = {}
+        for chr_name in intervals:
+            self._tracks[chr_name] = self._Build(intervals[chr_name])
+        self._default = [[MAX_POSITION], [self.off_target_rate]]
+    
+    def _Build(self, intervals):
+        """
+        Return the ends and weights of the segments of a chromosome, given its
+        target [intervals]. Overlapping and adjacent intervals are merged.
+        """
+        ends = []
+        weights = []
+        previous = 0
+        for start, end in sorted(intervals):
+            if ends and start <= previous + 1: # Merge
+                if end > previous:
+                    ends[-1] = end
+                    previous = end
+                continue
+            if start > previous + 1: # Off-target
+                ends.append(start - 1)
+                weights.append(self.off_target_rate)
+            ends.append(end)
+            weights.append(1.0)
+            previous = end
+        ends.append(MAX_POSITION)
+        weights.append(self.off_target_rate)
+        return [ends, weights]
+    
+    
+    
+    # Query Methods ############################################################
+    
+    def Advance(self, chr_name, position, distance):
+        """
+        Return the position reached by moving [distance] weighted bases along
+        the chromosome named [chr_name], starting from [position].
+        
+        Return MAX_POSITION if there are no more bases with a non-zero weight.
+        """
+        ends, weights = self._tracks.get(chr_name, self._default)
+        i = bisect_left(ends, position + 1)
+        remaining = distance
+        while True:
+            weight = weights[i]
+            end = ends[i]
+            if weight:
+                room = (end - position) * weight
+                if remaining <= room:
+                    return position + int(ceil(remaining / weight))
+                remaining -= room
+            elif end == MAX_POSITION: return end
+            position = end
+            i += 1
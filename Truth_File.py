@@ -0,0 +1,331 @@
+"""
+TRUTH FILE
+(version 1.0)
+by Angelo Chan
+
+This module contains Classes for writing and reading "truth" files, which record
+where each simulated read truly came from. Truth files allow the output of an
+aligner to be scored without having to parse the names of the reads.
+
+Each record in a truth file contains:
+    1)  Read name
+    2)  Chromosome name ("*" if unknown)
+    3)  Position (1-based, of the leftmost nucleotide on the forward strand)
+    4)  Strand ("+" or "-")
+    5)  CIGAR string
+    6)  Positions of injected mismatches (1-based, relative to the read as it
+        was sequenced, comma-separated, or "." if there are none)
+    7)  Origin (Optional. The fragment and copy the read came from, for reads
+        whose names do not describe them)
+
+Truth files can be written either as tab-separated text with the columns above
+(similar to a stripped-down SAM file) or in a compact binary format.
+
+The binary format begins with a 4 byte signature, followed by the records.
+Each record consists of, in order, (all integers are little-endian)
+    Read name length (uint16) and read name
+    Chromosome name length (uint8) and chromosome name
+    Position (uint32)
+    Strand (uint8, 0 for "+", 1 for "-")
+    CIGAR string length (uint16) and CIGAR string
+    Mismatch count (uint16) and mismatch positions (uint16 each)
+    Origin length (uint16) and origin (0 bytes if there is none)
+
+Binary files with the older signature, which have no origins, can still be
+read.
+"""
+
+# Imported Modules #############################################################
+
+import struct
+
+from Checkpoint import Open_Truncated
+
+
+
+# Configurations ###############################################################
+
+FILEMOD__TRUTH = "__TRUTH.tsv"
+
+TRUTH_SIGNATURE = "SGT2"
+TRUTH_SIGNATURE_V1 = "SGT1" # No origins
+
+
+
+# Lists ########################################################################
+
+LIST__truth_binary = [".bin"]
+
+
+
+# Functions ####################################################################
+
+def Is_Binary_Truth_Path(file_path):
+    """
+    Return True if [file_path] has a binary truth file extension.
+    
+    Is_Binary_Truth_Path(str) -> bool
+    """
+    for ext in LIST__truth_binary:
+        if file_path.endswith(ext): return True
+    return False
+
+
+
+# Classes ######################################################################
+
+class Truth_File_Writer:
+    """
+    A writer for truth files, in either the text or the binary format.
+    
+    Has flush(), tell(), and close() methods, so it can be flushed and closed in
+    the same way as a regular file object.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path="", binary=None):
+        """
+        Creates a Truth File Writer object. The file will be opened immediately
+        if a filepath is supplied.
+        
+        If [binary] is None, the format is determined by the file extension.
+        """
+        self.file_path = ""
+        self.file = None
+        self.binary = binary
+        if file_path: self.Open(file_path)
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path, offset=-1):
+        """
+        Open the file at [file_path] for writing.
+        
+        If [offset] is specified, the existing file is kept up to [offset]
+        bytes, and written to from there.
+        
+        Return 0 if successful.
+        Return 1 if the file could not be written to.
+        """
+        if self.file: self.Close()
+        if self.binary == None: binary = Is_Binary_Truth_Path(file_path)
+        else: binary = self.binary
+        try:
+            if offset >= 0:
+                if binary: mode = "r+b"
+                else: mode = "r+"
+                self.file = Open_Truncated(file_path, offset, mode)
+            elif binary:
+                self.file = open(file_path, "wb")
+                self.file.write(TRUTH_SIGNATURE)
+            else:
+                self.file = open(file_path, "w")
+        except:
+            self.file = None
+            return 1
+        self.file_path = file_path
+        self._binary = binary
+        return 0
+    
+    def IsOpen(self):
+        """
+        Return True if a file is currently open.
+        """
+        return self.file != None
+    
+    def Flush(self):
+        """
+        Write any buffered data to the file.
+        """
+        self.file.flush()
+    
+    def Tell(self):
+        """
+        Return the current position in the file. Only meaningful immediately
+        after Flush().
+        """
+        return self.file.tell()
+    
+    def Close(self):
+        """
+        Close the file.
+        """
+        if self.file: self.file.close()
+        self.file = None
+    
+    
+    
+    # File Writing Methods #####################################################
+    
+    def Write(self, name, chr_name, position, strand, cigar, mismatches,
+            origin=""):
+        """
+        Write a truth record.
+        
+        @name
+                (str)
+                The name of the read.
+        @chr_name
+                (str)
+                The name of the chromosome the read came from.
+        @position
+                (int)
+                The 1-based position of the leftmost nucleotide of the read, on
+                the forward strand.
+        @strand
+                (bool)
+                True if the read is on the forward strand.
+        @cigar
+                (str)
+                The CIGAR string of the read.
+        @mismatches
+                (list<int>)
+                The 1-based positions, within the read as it was sequenced, of
+                any mismatches which were injected.
+        @origin
+                (str)
+                The fragment and copy the read came from, if the name of the
+                read does not describe them. Omitted from text files if empty.
+        
+        Write(str, str, int, bool, str, list<int>, str) -> None
+        """
+        if self._binary:
+            sb = (struct.pack("<H", len(name)) + name +
+                    struct.pack("<B", len(chr_name)) + chr_name +
+                    struct.pack("<IB", position, not strand) +
+                    struct.pack("<H", len(cigar)) + cigar +
+                    struct.pack("<H%dH" % len(mismatches), len(mismatches),
+                    *mismatches) + struct.pack("<H", len(origin)) + origin)
+        else:
+            if strand: strand = "+"
+            else: strand = "-"
+            if mismatches: m = ",".join([str(i) for i in mismatches])
+            else: m = "."
+            sb = (name + "\t" + chr_name + "\t" + str(position) + "\t" +
+                    strand + "\t" + cigar + "\t" + m)
+            if origin: sb += "\t" + origin
+            sb += "\n"
+        self.file.write(sb)
+    
+    # File object compatibility
+    flush = Flush
+    tell = Tell
+    close = Close
+
+
+
+class Truth_File_Reader:
+    """
+    A reader for truth files, in either the text or the binary format. The
+    format is detected automatically.
+    """
+    
+    # Constructor & Destructor #################################################
+    
+    def __init__(self, file_path="", auto_open=False):
+        """
+        Creates a Truth File Reader object. The file will be opened immediately
+        if a filepath is supplied and [auto_open] is True.
+        """
+        self.file_path = file_path
+        self.file = None
+        self._current = []
+        self._next = None
+        if file_path and auto_open: self.Open(file_path)
+    
+    
+    
+    # File I/O Methods #########################################################
+    
+    def Open(self, file_path=""):
+        """
+        Open the truth file at [file_path] for reading.
+        
+        Return 0 if successful.
+        Return 1 if the file could not be opened.
+        """
+        self.Close()
+        if file_path: self.file_path = file_path
+        try:
+            self.file = open(self.file_path, "rb")
+        except:
+            self.file = None
+            return 1
+        signature = self.file.read(4)
+        self._binary = signature in [TRUTH_SIGNATURE, TRUTH_SIGNATURE_V1]
+        self._origins = signature == TRUTH_SIGNATURE
+        if not self._binary: self.file.seek(0)
+        self._Read_Next()
+        return 0
+    
+    def Close(self):
+        """
+        Close the file if it is open.
+        """
+        if self.file: self.file.close()
+        self.file = None
+        self._next = None
+    
+    
+    
+    # File Reading Methods #####################################################
+    
+    def End(self):
+        """
+        Return True if there are no more records to be read.
+        """
+        return not self._next
+    
+    def Read(self):
+        """
+        Read the next record.
+        """
+        self._current = self._next
+        self._Read_Next()
+    
+    def Get_Current(self):
+        """
+        Return the current record, as a list containing the read name,
+        chromosome name, position, strand, CIGAR string, mismatch positions,
+        and origin. (An empty string if there is none)
+        
+        Get_Current() -> [str, str, int, bool, str, list<int>, str]
+        """
+        return self._current
+    
+    def _Read_Next(self):
+        """
+        Parse the next record in the file, in advance.
+        """
+        f = self.file
+        if self._binary:
+            data = f.read(2)
+            if len(data) < 2:
+                self._next = None
+                return
+            name = f.read(struct.unpack("<H", data)[0])
+            chr_name = f.read(struct.unpack("<B", f.read(1))[0])
+            position, strand = struct.unpack("<IB", f.read(5))
+            cigar = f.read(struct.unpack("<H", f.read(2))[0])
+            count = struct.unpack("<H", f.read(2))[0]
+            mismatches = list(struct.unpack("<%dH" % count, f.read(2*count)))
+            if self._origins:
+                origin = f.read(struct.unpack("<H", f.read(2))[0])
+            else: origin = ""
+            self._next = [name, chr_name, position, not strand, cigar,
+                    mismatches, origin]
+        else:
+            line = f.readline()
+            if not line:
+                self._next = None
+                return
+            values = line.rstrip("\r\n").split("\t")
+            if values[5] == ".": mismatches = []
+            else: mismatches = [int(i) for i in values[5].split(",")]
+            if len(values) > 6: origin = values[6]
+            else: origin = ""
+            self._next = [values[0], values[1], int(values[2]),
+                    values[3] == "+", values[4], mismatches, origin]